@@ -9,7 +9,12 @@ from alembic import context
 
 from src.models.base import Base
 from src.models.category import Category
+from src.models.comment import Comment
+from src.models.counter import PostCounter
+from src.models.feed import FeedItem, Subscription, SubscriptionCounter
+from src.models.media import Media, MediaBlob, MediaJob, MediaUpload
 from src.models.post import Posts
+from src.models.user import AuthSession, RefreshToken, User
 
 from src.configs.app import settings
 
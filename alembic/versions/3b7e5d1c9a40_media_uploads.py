@@ -0,0 +1,57 @@
+"""media uploads
+
+Revision ID: 3b7e5d1c9a40
+Revises: 6789cdd99e1d
+Create Date: 2026-10-18 15:22:41.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7e5d1c9a40'
+down_revision: Union[str, Sequence[str], None] = '6789cdd99e1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # posts.media_id не ссылается на media внешним ключом: у уже
+    # существующих постов media_id случайный и файла за ним нет
+    op.create_table('media',
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('update_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('uuid')
+    )
+    op.create_index(op.f('ix_media_sha256'), 'media', ['sha256'], unique=False)
+    op.create_table('media_uploads',
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('length', sa.BigInteger(), nullable=False),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('storage_state', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('lease_until', sa.DateTime(), nullable=True),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('update_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('uuid')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('media_uploads')
+    op.drop_index(op.f('ix_media_sha256'), table_name='media')
+    op.drop_table('media')
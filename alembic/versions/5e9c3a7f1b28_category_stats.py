@@ -0,0 +1,57 @@
+"""category stats
+
+Revision ID: 5e9c3a7f1b28
+Revises: d41a7b9e2c63
+Create Date: 2026-10-18 18:03:27.551940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9c3a7f1b28'
+down_revision: Union[str, Sequence[str], None] = 'd41a7b9e2c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Агрегаты по всем категориям, пересчитываемые REFRESH; refreshed_at
+    # одинаков во всех строках и показывает возраст данных
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW category_stats AS
+        SELECT c.uuid AS category_id,
+               c.name,
+               count(p.uuid) AS post_count,
+               count(m.uuid) AS media_count,
+               min(p.create_at) AS first_post_at,
+               max(p.create_at) AS latest_post_at,
+               max(p.update_at) AS last_activity_at,
+               now() AS refreshed_at
+        FROM category c
+        LEFT JOIN posts p ON p.category_id = c.uuid
+        LEFT JOIN media m ON m.uuid = p.media_id
+        GROUP BY c.uuid, c.name
+        WITH DATA
+        """
+    )
+    # Уникальный индекс нужен для REFRESH ... CONCURRENTLY
+    op.create_index(
+        'ux_category_stats_category_id',
+        'category_stats',
+        ['category_id'],
+        unique=True,
+    )
+    op.create_index(
+        'ix_category_stats_name', 'category_stats', ['name'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW category_stats")
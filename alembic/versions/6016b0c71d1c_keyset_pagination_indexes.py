@@ -0,0 +1,54 @@
+"""keyset pagination indexes
+
+Revision ID: 6016b0c71d1c
+Revises: 89020d92b943
+Create Date: 2026-10-18 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6016b0c71d1c'
+down_revision: Union[str, Sequence[str], None] = '89020d92b943'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY не блокирует запись в большую таблицу posts,
+    # но не может выполняться внутри транзакции миграции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_create_at_uuid',
+            'posts',
+            ['create_at', 'uuid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_category_create_at_uuid',
+            'category',
+            ['create_at', 'uuid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_category_create_at_uuid',
+            table_name='category',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_posts_create_at_uuid',
+            table_name='posts',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,52 @@
+"""posts media and category indexes
+
+Revision ID: 6789cdd99e1d
+Revises: 85d990ba8268
+Create Date: 2026-10-18 13:41:56.802211
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6789cdd99e1d'
+down_revision: Union[str, Sequence[str], None] = '85d990ba8268'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Уникальный индекс не построится, если в posts уже есть повторяющиеся
+    # media_id - их нужно разобрать вручную до миграции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_media_id',
+            'posts',
+            ['media_id'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_posts_category_id_create_at_uuid',
+            'posts',
+            ['category_id', 'create_at', 'uuid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_posts_category_id_create_at_uuid',
+            table_name='posts',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_posts_media_id', table_name='posts', postgresql_concurrently=True
+        )
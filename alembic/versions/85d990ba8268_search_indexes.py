@@ -0,0 +1,82 @@
+"""search indexes
+
+Revision ID: 85d990ba8268
+Revises: f86968013dee
+Create Date: 2026-10-18 12:20:05.377164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '85d990ba8268'
+down_revision: Union[str, Sequence[str], None] = 'f86968013dee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # STORED-столбец заполняется для всех строк сразу: таблица
+    # переписывается под эксклюзивной блокировкой
+    op.add_column('posts', sa.Column(
+        'desc_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "to_tsvector('simple'::regconfig, coalesce(\"desc\", ''))",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_desc_trgm',
+            'posts',
+            ['desc'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'desc': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_posts_desc_tsv',
+            'posts',
+            ['desc_tsv'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_category_name_trgm',
+            'category',
+            ['name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_category_name_trgm',
+            table_name='category',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_posts_desc_tsv', table_name='posts', postgresql_concurrently=True
+        )
+        op.drop_index(
+            'ix_posts_desc_trgm', table_name='posts', postgresql_concurrently=True
+        )
+
+    op.drop_column('posts', 'desc_tsv')
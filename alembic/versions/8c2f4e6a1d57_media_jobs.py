@@ -0,0 +1,53 @@
+"""media jobs
+
+Revision ID: 8c2f4e6a1d57
+Revises: 3b7e5d1c9a40
+Create Date: 2026-10-18 16:05:12.418309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2f4e6a1d57'
+down_revision: Union[str, Sequence[str], None] = '3b7e5d1c9a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_jobs',
+    sa.Column('media_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('update_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('uuid')
+    )
+    op.create_index(
+        'ix_media_jobs_queue',
+        'media_jobs',
+        ['run_after'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'running')"),
+    )
+    op.create_index(
+        'ix_media_jobs_finished_at', 'media_jobs', ['finished_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_media_jobs_finished_at', table_name='media_jobs')
+    op.drop_index('ix_media_jobs_queue', table_name='media_jobs')
+    op.drop_table('media_jobs')
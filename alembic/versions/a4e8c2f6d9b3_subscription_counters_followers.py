@@ -0,0 +1,43 @@
+"""subscription counters followers index
+
+Revision ID: a4e8c2f6d9b3
+Revises: f1c7a3e5b2d8
+Create Date: 2026-10-20 16:03:51.774920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e8c2f6d9b3'
+down_revision: Union[str, Sequence[str], None] = 'f1c7a3e5b2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Чтение ленты ищет популярных авторов по followers > порога; без
+    # индекса это полный проход по счётчикам всех авторов. Порог задаётся
+    # настройкой, поэтому индекс не частичный
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_subscription_counters_followers',
+            'subscription_counters',
+            ['followers'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_subscription_counters_followers',
+            table_name='subscription_counters',
+            postgresql_concurrently=True,
+        )
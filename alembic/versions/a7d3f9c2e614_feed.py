@@ -0,0 +1,125 @@
+"""feed
+
+Revision ID: a7d3f9c2e614
+Revises: 5e9c3a7f1b28
+Create Date: 2026-10-18 19:12:40.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3f9c2e614'
+down_revision: Union[str, Sequence[str], None] = '5e9c3a7f1b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Счётчик подписчиков обновляется триггером уровня оператора, как
+# post_counters: пакетная подписка меняет каждую строку один раз
+APPLY_CHANGES = """
+    INSERT INTO subscription_counters (owner_id, followers)
+    SELECT owner_id, sum(delta)
+    FROM changes
+    GROUP BY owner_id
+    HAVING sum(delta) <> 0
+    ORDER BY owner_id
+    ON CONFLICT (owner_id)
+    DO UPDATE SET followers = subscription_counters.followers + EXCLUDED.followers;
+"""
+
+CHANGES = {
+    'insert': "SELECT owner_id, 1 AS delta FROM new_rows",
+    'delete': "SELECT owner_id, -1 AS delta FROM old_rows",
+}
+
+TRANSITION_TABLES = {
+    'insert': "NEW TABLE AS new_rows",
+    'delete': "OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('owner_id', sa.UUID(), nullable=True))
+
+    op.create_table('subscriptions',
+    sa.Column('subscriber_id', sa.UUID(), nullable=False),
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('subscriber_id', 'owner_id')
+    )
+    op.create_index('ix_subscriptions_owner_id_subscriber_id', 'subscriptions', ['owner_id', 'subscriber_id'], unique=False)
+
+    op.create_table('subscription_counters',
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.Column('followers', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('owner_id')
+    )
+
+    op.create_table('feed_items',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('post_id', sa.UUID(), nullable=False),
+    sa.Column('owner_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.uuid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'create_at', 'post_id')
+    )
+    op.create_index('ix_feed_items_post_id', 'feed_items', ['post_id'], unique=False)
+
+    for event, changes in CHANGES.items():
+        op.execute(
+            f"""
+            CREATE FUNCTION subscriptions_counters_on_{event}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                WITH changes AS ({changes})
+                {APPLY_CHANGES}
+                RETURN NULL;
+            END
+            $$;
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER subscriptions_counters_{event}
+            AFTER {event.upper()} ON subscriptions
+            REFERENCING {TRANSITION_TABLES[event]}
+            FOR EACH STATEMENT EXECUTE FUNCTION subscriptions_counters_on_{event}();
+            """
+        )
+
+    # autocommit_block фиксирует предыдущие шаги; индекс по posts
+    # строится без блокировки записи
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_owner_id_create_at_uuid',
+            'posts',
+            ['owner_id', 'create_at', 'uuid'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_posts_owner_id_create_at_uuid',
+            table_name='posts',
+            postgresql_concurrently=True,
+        )
+
+    for event in CHANGES:
+        op.execute(f"DROP TRIGGER subscriptions_counters_{event} ON subscriptions")
+        op.execute(f"DROP FUNCTION subscriptions_counters_on_{event}()")
+
+    op.drop_index('ix_feed_items_post_id', table_name='feed_items')
+    op.drop_table('feed_items')
+    op.drop_table('subscription_counters')
+    op.drop_index('ix_subscriptions_owner_id_subscriber_id', table_name='subscriptions')
+    op.drop_table('subscriptions')
+    op.drop_column('posts', 'owner_id')
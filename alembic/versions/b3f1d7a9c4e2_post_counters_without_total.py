@@ -0,0 +1,101 @@
+"""post counters without the 'all' row
+
+Revision ID: b3f1d7a9c4e2
+Revises: e2a6c4d8f173
+Create Date: 2026-10-19 10:14:52.306718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f1d7a9c4e2'
+down_revision: Union[str, Sequence[str], None] = 'e2a6c4d8f173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Строка 'all' менялась каждой вставкой и удалением поста, и все пишущие
+# транзакции выстраивались в очередь за её блокировкой до commit. Общее
+# число постов теперь - сумма счётчиков категорий и 'uncategorized', а
+# вставки в разные категории друг друга не ждут
+APPLY_CHANGES = """
+    INSERT INTO post_counters (scope, count)
+    SELECT scope, sum(delta)
+    FROM (
+        SELECT post_counters_scope(category_id) AS scope, delta FROM changes
+    ) AS deltas
+    GROUP BY scope
+    HAVING sum(delta) <> 0
+    ORDER BY scope
+    ON CONFLICT (scope)
+    DO UPDATE SET count = post_counters.count + EXCLUDED.count;
+"""
+
+APPLY_CHANGES_WITH_TOTAL = """
+    INSERT INTO post_counters (scope, count)
+    SELECT scope, sum(delta)
+    FROM (
+        SELECT 'all' AS scope, delta FROM changes
+        UNION ALL
+        SELECT post_counters_scope(category_id), delta FROM changes
+    ) AS deltas
+    GROUP BY scope
+    HAVING sum(delta) <> 0
+    ORDER BY scope
+    ON CONFLICT (scope)
+    DO UPDATE SET count = post_counters.count + EXCLUDED.count;
+"""
+
+CHANGES = {
+    'insert': "SELECT category_id, 1 AS delta FROM new_rows",
+    'delete': "SELECT category_id, -1 AS delta FROM old_rows",
+    'update': """
+        SELECT o.category_id, -1 AS delta
+        FROM old_rows o JOIN new_rows n USING (uuid)
+        WHERE o.category_id IS DISTINCT FROM n.category_id
+        UNION ALL
+        SELECT n.category_id, 1 AS delta
+        FROM old_rows o JOIN new_rows n USING (uuid)
+        WHERE o.category_id IS DISTINCT FROM n.category_id
+    """,
+}
+
+
+def _replace_functions(apply_changes: str) -> None:
+    for event, changes in CHANGES.items():
+        op.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION posts_counters_on_{event}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                WITH changes AS ({changes})
+                {apply_changes}
+                RETURN NULL;
+            END
+            $$;
+            """
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Иначе запись, начатая со старой функцией, вернула бы строку 'all'
+    op.execute("LOCK TABLE posts IN SHARE ROW EXCLUSIVE MODE")
+    _replace_functions(APPLY_CHANGES)
+    op.execute("DELETE FROM post_counters WHERE scope = 'all'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("LOCK TABLE posts IN SHARE ROW EXCLUSIVE MODE")
+    _replace_functions(APPLY_CHANGES_WITH_TOTAL)
+    op.execute(
+        """
+        INSERT INTO post_counters (scope, count)
+        SELECT 'all', count(*) FROM posts
+        """
+    )
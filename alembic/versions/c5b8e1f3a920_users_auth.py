@@ -0,0 +1,66 @@
+"""users and auth sessions
+
+Revision ID: c5b8e1f3a920
+Revises: a7d3f9c2e614
+Create Date: 2026-10-18 20:04:11.527390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5b8e1f3a920'
+down_revision: Union[str, Sequence[str], None] = 'a7d3f9c2e614'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('users',
+    sa.Column('login', sa.String(), nullable=False),
+    sa.Column('first_name', sa.String(), nullable=False),
+    sa.Column('last_name', sa.String(), nullable=False),
+    sa.Column('password_hash', sa.String(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('update_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('uuid'),
+    sa.UniqueConstraint('login')
+    )
+
+    op.create_table('auth_sessions',
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.uuid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('uuid')
+    )
+    op.create_index('ix_auth_sessions_user_id', 'auth_sessions', ['user_id'], unique=False)
+    op.create_index('ix_auth_sessions_revoked_at', 'auth_sessions', ['revoked_at'], unique=False, postgresql_where=sa.text('revoked_at IS NOT NULL'))
+
+    op.create_table('refresh_tokens',
+    sa.Column('token_hash', sa.String(), nullable=False),
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('used_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['auth_sessions.uuid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index('ix_refresh_tokens_session_id', 'refresh_tokens', ['session_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_refresh_tokens_session_id', table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
+    op.drop_index('ix_auth_sessions_revoked_at', table_name='auth_sessions', postgresql_where=sa.text('revoked_at IS NOT NULL'))
+    op.drop_index('ix_auth_sessions_user_id', table_name='auth_sessions')
+    op.drop_table('auth_sessions')
+    op.drop_table('users')
@@ -0,0 +1,69 @@
+"""media blobs
+
+Revision ID: d41a7b9e2c63
+Revises: 8c2f4e6a1d57
+Create Date: 2026-10-18 17:12:48.906114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7b9e2c63'
+down_revision: Union[str, Sequence[str], None] = '8c2f4e6a1d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('media_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('update_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index(
+        'ix_media_blobs_orphaned',
+        'media_blobs',
+        ['update_at'],
+        unique=False,
+        postgresql_where=sa.text('ref_count <= 0'),
+    )
+
+    # Уже загруженные файлы становятся блобами. Из одинаковых остаётся
+    # объект первого media, остальные объекты в хранилище больше не
+    # используются
+    op.execute(
+        """
+        INSERT INTO media_blobs (sha256, storage_key, size, ref_count, create_at, update_at)
+        SELECT DISTINCT ON (sha256) sha256, storage_key, size,
+               count(*) OVER (PARTITION BY sha256), create_at, now()
+        FROM media
+        ORDER BY sha256, create_at
+        """
+    )
+    op.execute(
+        """
+        UPDATE media SET storage_key = media_blobs.storage_key
+        FROM media_blobs
+        WHERE media.sha256 = media_blobs.sha256
+          AND media.storage_key <> media_blobs.storage_key
+        """
+    )
+    op.create_foreign_key(
+        'media_sha256_fkey', 'media', 'media_blobs', ['sha256'], ['sha256']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('media_sha256_fkey', 'media', type_='foreignkey')
+    op.drop_index('ix_media_blobs_orphaned', table_name='media_blobs')
+    op.drop_table('media_blobs')
@@ -0,0 +1,119 @@
+"""post counter slots
+
+Revision ID: d8a2c6f4b1e9
+Revises: b3f1d7a9c4e2
+Create Date: 2026-10-20 09:41:07.552184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a2c6f4b1e9'
+down_revision: Union[str, Sequence[str], None] = 'b3f1d7a9c4e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Без 'all' вставки в одну категорию (и все посты без категории) всё равно
+# ждали одну строку счётчика до commit. Теперь у каждого scope до SLOTS
+# строк: оператор прибавляет к случайной из них, а чтение суммирует.
+# Две параллельные транзакции ждут друг друга, только если выпал один слот
+SLOTS = 16
+
+APPLY_CHANGES = """
+    INSERT INTO post_counters (scope, slot, count)
+    SELECT scope, counter_slot, sum(delta)
+    FROM (
+        SELECT post_counters_scope(category_id) AS scope, delta FROM changes
+    ) AS deltas
+    GROUP BY scope
+    HAVING sum(delta) <> 0
+    ORDER BY scope
+    ON CONFLICT (scope, slot)
+    DO UPDATE SET count = post_counters.count + EXCLUDED.count;
+"""
+
+APPLY_CHANGES_WITHOUT_SLOTS = """
+    INSERT INTO post_counters (scope, count)
+    SELECT scope, sum(delta)
+    FROM (
+        SELECT post_counters_scope(category_id) AS scope, delta FROM changes
+    ) AS deltas
+    GROUP BY scope
+    HAVING sum(delta) <> 0
+    ORDER BY scope
+    ON CONFLICT (scope)
+    DO UPDATE SET count = post_counters.count + EXCLUDED.count;
+"""
+
+CHANGES = {
+    'insert': "SELECT category_id, 1 AS delta FROM new_rows",
+    'delete': "SELECT category_id, -1 AS delta FROM old_rows",
+    'update': """
+        SELECT o.category_id, -1 AS delta
+        FROM old_rows o JOIN new_rows n USING (uuid)
+        WHERE o.category_id IS DISTINCT FROM n.category_id
+        UNION ALL
+        SELECT n.category_id, 1 AS delta
+        FROM old_rows o JOIN new_rows n USING (uuid)
+        WHERE o.category_id IS DISTINCT FROM n.category_id
+    """,
+}
+
+
+def _replace_functions(apply_changes: str, declare: str = "") -> None:
+    for event, changes in CHANGES.items():
+        op.execute(
+            f"""
+            CREATE OR REPLACE FUNCTION posts_counters_on_{event}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            {declare}
+            BEGIN
+                WITH changes AS ({changes})
+                {apply_changes}
+                RETURN NULL;
+            END
+            $$;
+            """
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("LOCK TABLE posts IN SHARE ROW EXCLUSIVE MODE")
+    op.add_column(
+        'post_counters',
+        sa.Column('slot', sa.SmallInteger(), server_default='0', nullable=False),
+    )
+    op.drop_constraint('post_counters_pkey', 'post_counters', type_='primary')
+    op.create_primary_key('post_counters_pkey', 'post_counters', ['scope', 'slot'])
+    _replace_functions(
+        APPLY_CHANGES,
+        f"DECLARE counter_slot smallint := floor(random() * {SLOTS});",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("LOCK TABLE posts IN SHARE ROW EXCLUSIVE MODE")
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE post_counters_total ON COMMIT DROP AS
+        SELECT scope, sum(count) AS count FROM post_counters GROUP BY scope
+        """
+    )
+    op.execute("DELETE FROM post_counters")
+    op.drop_constraint('post_counters_pkey', 'post_counters', type_='primary')
+    op.drop_column('post_counters', 'slot')
+    op.create_primary_key('post_counters_pkey', 'post_counters', ['scope'])
+    op.execute(
+        """
+        INSERT INTO post_counters (scope, count)
+        SELECT scope, count FROM post_counters_total
+        """
+    )
+    _replace_functions(APPLY_CHANGES_WITHOUT_SLOTS)
@@ -0,0 +1,109 @@
+"""comments
+
+Revision ID: e2a6c4d8f173
+Revises: c5b8e1f3a920
+Create Date: 2026-10-18 20:51:36.804125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a6c4d8f173'
+down_revision: Union[str, Sequence[str], None] = 'c5b8e1f3a920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Триггеры уровня оператора, как у post_counters: каскадное удаление ветки
+# обновляет счётчик поста один раз. update_at сдвигается, чтобы ETag поста
+# (uuid, update_at) сменился вместе с числом комментариев. Посты
+# блокируются в порядке uuid, чтобы не ловить взаимоблокировки.
+# Строки удалённого поста уже нет, и каскад его комментариев ничего не
+# обновляет
+APPLY_CHANGES = """
+    UPDATE posts
+    SET comment_count = posts.comment_count + deltas.delta,
+        update_at = now() AT TIME ZONE 'utc'
+    FROM (
+        SELECT per_post.post_id, per_post.delta
+        FROM (
+            SELECT post_id, sum(delta) AS delta FROM changes GROUP BY post_id
+        ) AS per_post
+        JOIN posts ON posts.uuid = per_post.post_id
+        ORDER BY per_post.post_id
+        FOR UPDATE OF posts
+    ) AS deltas
+    WHERE posts.uuid = deltas.post_id;
+"""
+
+CHANGES = {
+    'insert': "SELECT post_id, 1 AS delta FROM new_rows",
+    'delete': "SELECT post_id, -1 AS delta FROM old_rows",
+}
+
+TRANSITION_TABLES = {
+    'insert': "NEW TABLE AS new_rows",
+    'delete': "OLD TABLE AS old_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Столбец с константным DEFAULT добавляется без перезаписи таблицы
+    op.add_column('posts', sa.Column('comment_count', sa.BigInteger(), server_default='0', nullable=False))
+
+    op.create_table('comments',
+    sa.Column('post_id', sa.UUID(), nullable=False),
+    sa.Column('parent_id', sa.UUID(), nullable=True),
+    sa.Column('author_id', sa.UUID(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('uuid', sa.UUID(), nullable=False),
+    sa.Column('create_at', sa.DateTime(), nullable=False),
+    sa.Column('update_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['users.uuid'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['parent_id'], ['comments.uuid'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.uuid'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('uuid')
+    )
+    op.create_index('ix_comments_post_id_create_at_uuid', 'comments', ['post_id', 'create_at', 'uuid'], unique=False, postgresql_where=sa.text('parent_id IS NULL'))
+    op.create_index('ix_comments_parent_id_create_at_uuid', 'comments', ['parent_id', 'create_at', 'uuid'], unique=False, postgresql_where=sa.text('parent_id IS NOT NULL'))
+    op.create_index('ix_comments_author_id', 'comments', ['author_id'], unique=False)
+
+    for event, changes in CHANGES.items():
+        op.execute(
+            f"""
+            CREATE FUNCTION comments_count_on_{event}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                WITH changes AS ({changes})
+                {APPLY_CHANGES}
+                RETURN NULL;
+            END
+            $$;
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER comments_count_{event}
+            AFTER {event.upper()} ON comments
+            REFERENCING {TRANSITION_TABLES[event]}
+            FOR EACH STATEMENT EXECUTE FUNCTION comments_count_on_{event}();
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in CHANGES:
+        op.execute(f"DROP TRIGGER comments_count_{event} ON comments")
+        op.execute(f"DROP FUNCTION comments_count_on_{event}()")
+
+    op.drop_index('ix_comments_author_id', table_name='comments')
+    op.drop_index('ix_comments_parent_id_create_at_uuid', table_name='comments', postgresql_where=sa.text('parent_id IS NOT NULL'))
+    op.drop_index('ix_comments_post_id_create_at_uuid', table_name='comments', postgresql_where=sa.text('parent_id IS NULL'))
+    op.drop_table('comments')
+    op.drop_column('posts', 'comment_count')
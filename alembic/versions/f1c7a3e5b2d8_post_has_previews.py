@@ -0,0 +1,67 @@
+"""post has_previews
+
+Revision ID: f1c7a3e5b2d8
+Revises: d8a2c6f4b1e9
+Create Date: 2026-10-20 14:12:38.205117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7a3e5b2d8'
+down_revision: Union[str, Sequence[str], None] = 'd8a2c6f4b1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Задача превью ставится при загрузке нового файла-изображения, повторный
+# файл делит превью с первым, поэтому превью есть ровно у постов, чей
+# media - изображение. media появляется в той же транзакции до поста и
+# не меняется, так что хватает проверки при вставке и смене media_id
+IS_IMAGE = """
+    EXISTS (
+        SELECT 1 FROM media
+        WHERE media.uuid = {media_id} AND media.content_type LIKE 'image/%'
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Столбец с константным DEFAULT добавляется без перезаписи таблицы
+    op.add_column('posts', sa.Column('has_previews', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.execute(
+        f"""
+        CREATE FUNCTION posts_set_has_previews() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            NEW.has_previews := {IS_IMAGE.format(media_id="NEW.media_id")};
+            RETURN NEW;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER posts_has_previews
+        BEFORE INSERT OR UPDATE OF media_id ON posts
+        FOR EACH ROW EXECUTE FUNCTION posts_set_has_previews();
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE posts SET has_previews = true
+        WHERE {IS_IMAGE.format(media_id="posts.media_id")}
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER posts_has_previews ON posts")
+    op.execute("DROP FUNCTION posts_set_has_previews()")
+    op.drop_column('posts', 'has_previews')
@@ -0,0 +1,123 @@
+"""post counters
+
+Revision ID: f86968013dee
+Revises: 6016b0c71d1c
+Create Date: 2026-10-18 11:02:47.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f86968013dee'
+down_revision: Union[str, Sequence[str], None] = '6016b0c71d1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Триггеры уровня оператора с transition-таблицами: пакетная вставка
+# обновляет каждый счётчик один раз, а не на каждую строку.
+# Счётчики обновляются в порядке scope, чтобы не ловить взаимоблокировки.
+APPLY_CHANGES = """
+    INSERT INTO post_counters (scope, count)
+    SELECT scope, sum(delta)
+    FROM (
+        SELECT 'all' AS scope, delta FROM changes
+        UNION ALL
+        SELECT post_counters_scope(category_id), delta FROM changes
+    ) AS deltas
+    GROUP BY scope
+    HAVING sum(delta) <> 0
+    ORDER BY scope
+    ON CONFLICT (scope)
+    DO UPDATE SET count = post_counters.count + EXCLUDED.count;
+"""
+
+CHANGES = {
+    'insert': "SELECT category_id, 1 AS delta FROM new_rows",
+    'delete': "SELECT category_id, -1 AS delta FROM old_rows",
+    'update': """
+        SELECT o.category_id, -1 AS delta
+        FROM old_rows o JOIN new_rows n USING (uuid)
+        WHERE o.category_id IS DISTINCT FROM n.category_id
+        UNION ALL
+        SELECT n.category_id, 1 AS delta
+        FROM old_rows o JOIN new_rows n USING (uuid)
+        WHERE o.category_id IS DISTINCT FROM n.category_id
+    """,
+}
+
+TRANSITION_TABLES = {
+    'insert': "NEW TABLE AS new_rows",
+    'delete': "OLD TABLE AS old_rows",
+    'update': "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('post_counters',
+    sa.Column('scope', sa.String(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+    op.execute(
+        """
+        CREATE FUNCTION post_counters_scope(category_id uuid) RETURNS text
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT CASE WHEN category_id IS NULL THEN 'uncategorized'
+                        ELSE 'category:' || category_id::text END
+        $$;
+        """
+    )
+
+    # Пока триггеры создаются и счётчики заполняются, запись в posts
+    # блокируется, иначе параллельные вставки потеряются между ними
+    op.execute("LOCK TABLE posts IN SHARE ROW EXCLUSIVE MODE")
+
+    for event, changes in CHANGES.items():
+        op.execute(
+            f"""
+            CREATE FUNCTION posts_counters_on_{event}() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                WITH changes AS ({changes})
+                {APPLY_CHANGES}
+                RETURN NULL;
+            END
+            $$;
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER posts_counters_{event}
+            AFTER {event.upper()} ON posts
+            REFERENCING {TRANSITION_TABLES[event]}
+            FOR EACH STATEMENT EXECUTE FUNCTION posts_counters_on_{event}();
+            """
+        )
+
+    op.execute(
+        """
+        INSERT INTO post_counters (scope, count)
+        SELECT 'all', count(*) FROM posts
+        UNION ALL
+        SELECT post_counters_scope(category_id), count(*)
+        FROM posts
+        GROUP BY category_id;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for event in CHANGES:
+        op.execute(f"DROP TRIGGER posts_counters_{event} ON posts")
+        op.execute(f"DROP FUNCTION posts_counters_on_{event}()")
+
+    op.execute("DROP FUNCTION post_counters_scope(uuid)")
+    op.drop_table('post_counters')
@@ -0,0 +1,141 @@
+"""Накладные расходы аутентификации на запрос и блокировка event loop.
+
+Без базы, в одном процессе:
+
+    verify       TokenCodec.decode и проверка отзыва - то, что делает
+                 get_current_user на каждый запрос
+    request      GET через ASGI к пустому эндпоинту без зависимости и с
+                 require_current_user; разница - цена аутентификации
+                 вместе с разбором заголовка
+    hash         argon2 в пуле PasswordHasher: время одного хэша и
+                 наибольшая задержка event loop, пока --concurrency
+                 хэшей считаются параллельно
+
+    python -m benchmarks.auth_bench --repeat 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from src.api.identity import require_current_user
+from src.auth import PasswordHasher, get_revocation_cache, get_token_codec
+from src.configs.app import settings
+
+
+def report(name: str, timings: list[float]) -> None:
+    print(
+        f"{name:<22}"
+        f"{statistics.median(timings) * 1e6:>10.1f}"
+        f"{statistics.quantiles(timings, n=100)[98] * 1e6:>10.1f}"
+    )
+
+
+def bench_verify(token: str, repeat: int) -> list[float]:
+    codec = get_token_codec()
+    revocations = get_revocation_cache()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        claims = codec.decode(token)
+        revocations.is_revoked(claims.session_id)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def bench_requests(token: str, repeat: int) -> dict[str, list[float]]:
+    app = FastAPI()
+
+    @app.get("/open")
+    async def open_endpoint():
+        return None
+
+    @app.get("/protected", dependencies=[Depends(require_current_user)])
+    async def protected_endpoint():
+        return None
+
+    timings: dict[str, list[float]] = {"request open": [], "request auth": []}
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        for _ in range(repeat):
+            for name, url in (
+                ("request open", "/open"),
+                ("request auth", "/protected"),
+            ):
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                timings[name].append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+    return timings
+
+
+async def bench_hash(concurrency: int) -> tuple[list[float], float]:
+    hasher = PasswordHasher(settings.auth.hash_workers)
+    timings: list[float] = []
+    max_lag = 0.0
+    running = True
+
+    async def ticker() -> None:
+        # Насколько позже срабатывает sleep(0.001) - столько event loop
+        # не мог обслуживать другие запросы
+        nonlocal max_lag
+        while running:
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_lag = max(max_lag, time.perf_counter() - started - 0.001)
+
+    async def one() -> None:
+        started = time.perf_counter()
+        await hasher.hash("benchmark password")
+        timings.append(time.perf_counter() - started)
+
+    await one()
+    timings.clear()
+    lag = asyncio.create_task(ticker())
+    await asyncio.gather(*(one() for _ in range(concurrency)))
+    running = False
+    await lag
+    hasher.shutdown()
+    return timings, max_lag
+
+
+async def main(args: argparse.Namespace) -> None:
+    token, _ = get_token_codec().issue(uuid.uuid4(), uuid.uuid4())
+    # Отзывы других сессий: проверка - поиск в словаре такого размера
+    for _ in range(args.revoked):
+        get_revocation_cache().add(uuid.uuid4())
+
+    print(f"algorithm {settings.auth.algorithm}, {args.revoked} revoked sessions")
+    print(f"{'path':<22}{'p50 us':>10}{'p99 us':>10}")
+    report("verify", bench_verify(token, args.repeat))
+
+    requests = await bench_requests(token, args.repeat // 10)
+    for name, timings in requests.items():
+        report(name, timings)
+    overhead = statistics.median(requests["request auth"]) - statistics.median(
+        requests["request open"]
+    )
+    print(f"{'auth overhead':<22}{overhead * 1e6:>10.1f}")
+
+    timings, max_lag = await bench_hash(args.concurrency)
+    print(
+        f"argon2 hash: p50 {statistics.median(timings) * 1000:.1f} ms, "
+        f"{args.concurrency} concurrent on {settings.auth.hash_workers} threads, "
+        f"max event loop lag {max_lag * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--revoked", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,164 @@
+"""Замер потоковой выгрузки GET /api/v1/posts/posts/export на большой таблице.
+
+Поднимает uvicorn в отдельном процессе, выкачивает выгрузку и следит за
+пиковым RSS сервера по /proc/<pid>/status, чтобы убедиться, что память не
+растёт вместе с объёмом. Для сравнения можно пролистать те же данные
+через GET /api/v1/posts/posts/ страницами по 1000.
+
+    python -m benchmarks.export_bench --seed 5000000
+    python -m benchmarks.export_bench --format csv --with-category --pages
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.configs.app import settings
+
+
+ROOT = Path(__file__).resolve().parent.parent
+SEED_BATCH = 500_000
+
+
+async def seed(rows: int) -> None:
+    engine = create_async_engine(settings.db.dsl)
+    async with engine.begin() as connection:
+        for start in range(0, rows, SEED_BATCH):
+            await connection.execute(
+                text(
+                    """
+                    INSERT INTO posts (uuid, media_id, "desc", create_at, update_at)
+                    SELECT gen_random_uuid(), gen_random_uuid(),
+                           'export benchmark post ' || i,
+                           now() - i * interval '1 second', now()
+                    FROM generate_series(:start, :stop) AS i
+                    """
+                ),
+                {"start": start + 1, "stop": min(start + SEED_BATCH, rows)},
+            )
+            print(f"seeded {min(start + SEED_BATCH, rows)} / {rows}")
+    await engine.dispose()
+
+
+def rss_kb(pid: int, field: str = "VmRSS") -> int:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1])
+    return 0
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=f"{ROOT}{os.pathsep}{ROOT / 'src'}")
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--app-dir",
+            "src",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/api/v1/misc/helth")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def watch_rss(pid: int, peak: list[int]) -> None:
+    while True:
+        peak[0] = max(peak[0], rss_kb(pid))
+        await asyncio.sleep(0.2)
+
+
+async def run_export(client: httpx.AsyncClient, params: dict) -> tuple[int, int]:
+    rows = size = 0
+    async with client.stream(
+        "GET", "/api/v1/posts/posts/export", params=params
+    ) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.aiter_bytes():
+            size += len(chunk)
+            rows += chunk.count(b"\n")
+    return rows, size
+
+
+async def run_pages(client: httpx.AsyncClient) -> tuple[int, int]:
+    rows = size = 0
+    params = {"limit": 1000, "total": "none"}
+    while True:
+        resp = await client.get("/api/v1/posts/posts/", params=params)
+        resp.raise_for_status()
+        size += len(resp.content)
+        page = resp.json()
+        rows += len(page["posts"])
+        if not page["next_cursor"]:
+            return rows, size
+        params["cursor"] = page["next_cursor"]
+
+
+async def measure(name: str, pid: int, job) -> None:
+    peak = [rss_kb(pid)]
+    baseline = peak[0]
+    watcher = asyncio.create_task(watch_rss(pid, peak))
+    started = time.perf_counter()
+    rows, size = await job
+    elapsed = time.perf_counter() - started
+    watcher.cancel()
+
+    print(
+        f"{name}: {rows} rows, {size / 2**20:.1f} MiB in {elapsed:.1f}s "
+        f"({rows / elapsed:,.0f} rows/s, {size / 2**20 / elapsed:.1f} MiB/s), "
+        f"server RSS {baseline / 1024:.0f} -> peak {peak[0] / 1024:.0f} MiB"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.seed:
+        await seed(args.seed)
+
+    server = start_server(args.port)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}", timeout=None
+        ) as client:
+            await wait_ready(client)
+            params = {"format": args.format, "with_category": args.with_category}
+            await measure("export", server.pid, run_export(client, params))
+            if args.pages:
+                await measure("pages", server.pid, run_pages(client))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seed", type=int, default=0, help="добавить N постов")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--with-category", action="store_true")
+    parser.add_argument("--pages", action="store_true", help="сравнить с /posts/")
+    parser.add_argument("--port", type=int, default=8765)
+
+    asyncio.run(main(parser.parse_args()))
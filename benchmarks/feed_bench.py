@@ -0,0 +1,261 @@
+"""Чтение ленты: материализованная feed_items против JOIN по подпискам.
+
+Заполняет базу пользователями-подписчиками, подписками с перекосом
+(немногие авторы собирают большую часть подписчиков и становятся
+популярными) и постами, раскладывает посты непопулярных авторов по
+feed_items так же, как FeedRepository.fan_out, и замеряет первую и
+вторую страницы ленты случайных пользователей двумя способами:
+
+- feed - FeedRepository.get_feed: feed_items плюс посты популярных
+  авторов при чтении;
+- naive join - посты всех подписок одним JOIN posts и subscriptions с
+  сортировкой.
+
+    python -m benchmarks.feed_bench --users 100000 --repeat 200
+    python -m benchmarks.feed_bench --keep
+    python -m benchmarks.feed_bench --clean
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.configs.app import settings
+from src.repositories.feed import FeedRepository
+from src.repositories.pagination import decode_cursor, next_cursor
+
+
+# Пользователи получают детерминированные uuid, чтобы --keep и --clean
+# находили их без отдельной таблицы; первые --owners из них - авторы
+USER_ID = "md5('feed-bench-' || {})::uuid"
+DESC_PREFIX = "feed benchmark post"
+
+NAIVE = """
+    SELECT p.uuid, p.media_id, p."desc", p.category_id, p.owner_id, p.create_at
+    FROM posts p
+    JOIN subscriptions s ON s.owner_id = p.owner_id
+    WHERE s.subscriber_id = :user_id {after}
+    ORDER BY p.create_at DESC, p.uuid DESC
+    LIMIT :limit
+"""
+NAIVE_FIRST = text(NAIVE.format(after=""))
+NAIVE_AFTER = text(
+    NAIVE.format(after="AND (p.create_at, p.uuid) < (:cursor_at, :cursor_uuid)")
+)
+
+
+def user_id(i: int) -> uuid.UUID:
+    """Тот же uuid, что USER_ID в SQL"""
+    return uuid.UUID(hashlib.md5(f"feed-bench-{i}".encode()).hexdigest())
+
+
+async def seed(
+    session: AsyncSession, users: int, follows: int, owners: int, posts: int
+) -> None:
+    steps = {
+        # random()^3 сдвигает выбор к первым авторам: распределение
+        # подписчиков получается с длинным хвостом. Ссылка на u заставляет
+        # пересчитывать LATERAL, и random() для каждого пользователя свой
+        "subscriptions": (
+            f"""
+            INSERT INTO subscriptions (subscriber_id, owner_id, create_at)
+            SELECT {USER_ID.format("u")}, {USER_ID.format("o")}, now()
+            FROM generate_series(1, :users) AS u,
+                 LATERAL (
+                     SELECT 1 + floor(CAST(:owners AS int) * random() ^ 3)::int + u * 0 AS o
+                     FROM generate_series(1, :follows)
+                 ) AS chosen
+            WHERE o <> u
+            ON CONFLICT DO NOTHING
+            """
+        ),
+        "posts": (
+            f"""
+            INSERT INTO posts (uuid, media_id, "desc", owner_id, create_at, update_at)
+            SELECT gen_random_uuid(), gen_random_uuid(),
+                   '{DESC_PREFIX} ' || i,
+                   {USER_ID.format("1 + i % :owners")},
+                   now() - i * interval '1 second', now()
+            FROM generate_series(1, :posts) AS i
+            """
+        ),
+        "feed_items": (
+            f"""
+            INSERT INTO feed_items (user_id, create_at, post_id, owner_id)
+            SELECT s.subscriber_id, p.create_at, p.uuid, p.owner_id
+            FROM posts p
+            JOIN subscription_counters c ON c.owner_id = p.owner_id
+            JOIN subscriptions s ON s.owner_id = p.owner_id
+            WHERE p."desc" LIKE '{DESC_PREFIX} %'
+              AND c.followers <= :threshold
+            ON CONFLICT DO NOTHING
+            """
+        ),
+    }
+    params = {
+        "users": users,
+        "follows": follows,
+        "owners": owners,
+        "posts": posts,
+        "threshold": settings.feed.celebrity_threshold,
+    }
+    for name, sql in steps.items():
+        started = time.perf_counter()
+        result = await session.execute(text(sql), params)
+        await session.commit()
+        print(f"{name}: {result.rowcount} rows in {time.perf_counter() - started:.1f}s")
+
+    for table in ("posts", "subscriptions", "subscription_counters", "feed_items"):
+        await session.execute(text(f"ANALYZE {table}"))
+    await session.commit()
+
+
+async def clean(session: AsyncSession, users: int) -> None:
+    # feed_items удаляются каскадом вместе с постами
+    await session.execute(
+        text(f"DELETE FROM posts WHERE \"desc\" LIKE '{DESC_PREFIX} %'")
+    )
+    await session.execute(
+        text(
+            f"""
+            DELETE FROM subscriptions
+            WHERE subscriber_id IN (
+                SELECT {USER_ID.format("u")} FROM generate_series(1, :users) AS u
+            )
+            """
+        ),
+        {"users": users},
+    )
+    await session.commit()
+
+
+async def celebrity_share(session: AsyncSession, owners: int) -> tuple[int, int]:
+    """Сколько авторов выше порога и сколько подписок приходится на них"""
+    row = (
+        await session.execute(
+            text(
+                f"""
+                SELECT count(*), coalesce(sum(followers), 0)
+                FROM subscription_counters
+                WHERE followers > :threshold
+                  AND owner_id IN (
+                      SELECT {USER_ID.format("o")} FROM generate_series(1, :owners) AS o
+                  )
+                """
+            ),
+            {"threshold": settings.feed.celebrity_threshold, "owners": owners},
+        )
+    ).one()
+    return row[0], row[1]
+
+
+async def measure(
+    session: AsyncSession, repo: FeedRepository, user_ids: list[uuid.UUID], limit: int
+) -> dict[str, list[float]]:
+    timings: dict[str, list[float]] = {}
+
+    async def timed(label: str, call) -> list:
+        started = time.perf_counter()
+        rows = await call()
+        timings.setdefault(label, []).append((time.perf_counter() - started) * 1000)
+        return rows
+
+    for subscriber_id in user_ids:
+        cursor = None
+        for page in ("page 1", "page 2"):
+            rows = await timed(
+                f"feed {page}", lambda: repo.get_feed(subscriber_id, limit, cursor)
+            )
+            await timed(
+                f"naive join {page}",
+                lambda: session.execute(
+                    NAIVE_FIRST if cursor is None else NAIVE_AFTER,
+                    {"user_id": subscriber_id, "limit": limit}
+                    if cursor is None
+                    else {
+                        "user_id": subscriber_id,
+                        "cursor_at": cursor.create_at,
+                        "cursor_uuid": cursor.uuid,
+                        "limit": limit,
+                    },
+                ),
+            )
+            token = next_cursor(rows, limit)
+            if token is None:
+                break
+            cursor = decode_cursor(token)
+    return timings
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.db.dsl)
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_maker() as session:
+        if args.clean:
+            await clean(session, args.users)
+            print("cleaned")
+            await engine.dispose()
+            return
+
+        if not args.keep:
+            await clean(session, args.users)
+            await seed(session, args.users, args.follows, args.owners, args.posts)
+
+        celebrities, followers = await celebrity_share(session, args.owners)
+        print(
+            f"celebrities: {celebrities} of {args.owners} authors, "
+            f"{followers} subscriptions read on demand"
+        )
+
+        user_ids = [
+            user_id(i) for i in random.sample(range(1, args.users + 1), args.repeat)
+        ]
+        repo = FeedRepository(session, settings.feed)
+        # Прогрев: первые запросы платят за план и холодный кэш страниц
+        await measure(session, repo, user_ids[:10], args.limit)
+        timings = await measure(session, repo, user_ids, args.limit)
+
+    print(f"{'query':<22}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for label, values in timings.items():
+        print(
+            f"{label:<22}"
+            f"{statistics.median(values):>10.2f}"
+            f"{percentile(values, 0.95):>10.2f}"
+            f"{max(values):>10.2f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument(
+        "--follows", type=int, default=20, help="подписок на пользователя"
+    )
+    parser.add_argument("--owners", type=int, default=5_000, help="авторов среди них")
+    parser.add_argument("--posts", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument(
+        "--repeat", type=int, default=200, help="пользователей в замере"
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="использовать уже заполненные данные"
+    )
+    parser.add_argument("--clean", action="store_true", help="удалить данные замера")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,325 @@
+"""Нагрузочный прогон API по сценарию из JSONL.
+
+Каждая строка сценария - шаблон запроса:
+
+    {"name": "posts.get", "method": "GET", "path": "/api/v1/posts/posts/{post_id}",
+     "params": {...}, "json": {...}, "status": 200, "weight": 25}
+
+Подстановки {post_id}, {media_id}, {cursor}, {category_id}, {category_name}
+берутся из случайной выборки данных в базе, {word} и {desc} - случайный
+текст, {new_uuid} - новый UUID. Каждое вхождение заменяется заново.
+Запросы выбираются с вероятностью, пропорциональной weight, и выполняются
+--concurrency корутинами: через httpx.ASGITransport в этом же процессе или
+против запущенного сервера (--url).
+
+Для каждого эндпоинта печатаются p50/p95/p99 и пропускная способность.
+--save сохраняет результат в JSON, --compare сравнивает с сохранённым и
+завершается с кодом 1, если p95 вырос больше чем на --threshold процентов.
+
+    PYTHONPATH=src python -m benchmarks.load --duration 60 --save base.json
+    PYTHONPATH=src python -m benchmarks.load --duration 60 --compare base.json
+
+Выгрузка и удаление в сценарий по умолчанию не входят: первая замеряется
+benchmarks.export_bench, второе истощало бы выборку данных.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+from sqlalchemy import text
+
+from src.database import async_sesion_maker, engine
+from src.repositories.category import CategoryRepository
+from src.repositories.pagination import encode_cursor
+from benchmarks.seed import WORDS
+
+
+SCENARIO = Path(__file__).parent / "scenarios" / "default.jsonl"
+SAMPLE_SIZE = 2000
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    params: Optional[dict] = None
+    json: Any = None
+    status: int = 200
+    weight: float = 1.0
+
+
+@dataclass
+class Fixtures:
+    posts: list[tuple[uuid.UUID, uuid.UUID, datetime]]
+    categories: list[tuple[uuid.UUID, str]]
+
+    def value(self, name: str) -> str:
+        if name == "new_uuid":
+            return str(uuid.uuid4())
+        if name == "word":
+            return random.choice(WORDS)
+        if name == "desc":
+            return " ".join(random.choices(WORDS, k=random.randint(3, 12)))
+        if name in ("post_id", "media_id", "cursor"):
+            post_id, media_id, create_at = random.choice(self.posts)
+            if name == "cursor":
+                return encode_cursor(create_at, post_id)
+            return str(post_id if name == "post_id" else media_id)
+        if name in ("category_id", "category_name"):
+            category_id, category_name = random.choice(self.categories)
+            return str(category_id if name == "category_id" else category_name)
+        raise KeyError(f"Unknown placeholder {{{name}}}")
+
+    def render(self, template: Any) -> Any:
+        if isinstance(template, str):
+            return _PLACEHOLDER_RE.sub(lambda m: self.value(m.group(1)), template)
+        if isinstance(template, list):
+            return [self.render(item) for item in template]
+        if isinstance(template, dict):
+            return {key: self.render(value) for key, value in template.items()}
+        return template
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "count": len(ordered),
+            "errors": self.errors,
+            "rps": len(ordered) / elapsed,
+            "mean_ms": statistics.fmean(ordered) if ordered else 0.0,
+            "p50_ms": percentile(ordered, 0.50),
+            "p95_ms": percentile(ordered, 0.95),
+            "p99_ms": percentile(ordered, 0.99),
+        }
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def load_scenarios(path: Path) -> list[Scenario]:
+    with path.open() as file:
+        return [Scenario(**json.loads(line)) for line in file if line.strip()]
+
+
+async def load_fixtures(sample_size: int) -> Fixtures:
+    """Случайная выборка постов и категорий для подстановок"""
+    async with async_sesion_maker() as session:
+        total = await session.scalar(text("SELECT sum(count) FROM post_counters"))
+        percent = min(100.0, 200.0 * sample_size / max(total or 0, 1))
+        result = await session.execute(
+            text(
+                "SELECT uuid, media_id, create_at FROM posts "
+                "TABLESAMPLE SYSTEM (:percent) LIMIT :limit"
+            ),
+            {"percent": percent, "limit": sample_size},
+        )
+        posts = [tuple(row) for row in result]
+        categories = [
+            (category.uuid, category.name)
+            for category in await CategoryRepository(session).get_all(limit=1000)
+        ]
+
+    if not posts or not categories:
+        raise SystemExit("Database is empty, run python -m benchmarks.seed first")
+
+    return Fixtures(posts, categories)
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    scenarios: list[Scenario],
+    fixtures: Fixtures,
+    stats: dict[str, EndpointStats],
+    deadline: float,
+    measure_from: float,
+) -> None:
+    weights = [scenario.weight for scenario in scenarios]
+    while time.perf_counter() < deadline:
+        scenario = random.choices(scenarios, weights)[0]
+        request = client.build_request(
+            scenario.method,
+            fixtures.render(scenario.path),
+            params=fixtures.render(scenario.params),
+            json=fixtures.render(scenario.json),
+        )
+
+        started = time.perf_counter()
+        try:
+            response = await client.send(request)
+            await response.aread()
+            ok = response.status_code == scenario.status
+        except httpx.HTTPError:
+            ok = False
+        finished = time.perf_counter()
+
+        # Запросы прогрева не учитываются
+        if started < measure_from:
+            continue
+        endpoint = stats.setdefault(scenario.name, EndpointStats())
+        if ok:
+            endpoint.latencies.append((finished - started) * 1000)
+        else:
+            endpoint.errors += 1
+
+
+async def run(args: argparse.Namespace) -> dict:
+    scenarios = load_scenarios(args.scenario)
+    fixtures = await load_fixtures(args.sample)
+
+    if args.url:
+        transport = None
+        base_url = args.url
+    else:
+        from main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    stats: dict[str, EndpointStats] = {}
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, limits=limits, timeout=30.0
+    ) as client:
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        deadline = measure_from + args.duration
+        await asyncio.gather(
+            *(
+                worker(client, scenarios, fixtures, stats, deadline, measure_from)
+                for _ in range(args.concurrency)
+            )
+        )
+
+    await engine.dispose()
+
+    endpoints = {name: stats[name].summary(args.duration) for name in sorted(stats)}
+    total = EndpointStats(
+        [latency for item in stats.values() for latency in item.latencies],
+        sum(item.errors for item in stats.values()),
+    )
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": args.url or "asgi",
+            "scenario": str(args.scenario),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "total": total.summary(args.duration),
+        "endpoints": endpoints,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: dict) -> None:
+    print(
+        f"{'endpoint':<36}{'count':>8}{'err':>6}{'rps':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    rows = list(result["endpoints"].items()) + [("TOTAL", result["total"])]
+    for name, item in rows:
+        print(
+            f"{name:<36}{item['count']:>8}{item['errors']:>6}{item['rps']:>9.1f}"
+            f"{item['p50_ms']:>9.2f}{item['p95_ms']:>9.2f}{item['p99_ms']:>9.2f}"
+        )
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> bool:
+    """Напечатать изменения относительно baseline; False при регрессии"""
+    print(
+        f"\ncompared with {baseline['meta'].get('commit')} ({baseline['meta']['date']})"
+    )
+    print(
+        f"{'endpoint':<36}{'p95 base':>10}{'p95 now':>10}{'delta':>9}{'rps delta':>11}"
+    )
+
+    regressed = False
+    rows = list(result["endpoints"].items()) + [("TOTAL", result["total"])]
+    for name, item in rows:
+        base = baseline["total"] if name == "TOTAL" else baseline["endpoints"].get(name)
+        if not base or not base["p95_ms"]:
+            continue
+        delta = (item["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        rps_delta = (
+            (item["rps"] - base["rps"]) / base["rps"] * 100 if base["rps"] else 0.0
+        )
+        bad = delta > threshold
+        regressed = regressed or bad
+        print(
+            f"{name:<36}{base['p95_ms']:>10.2f}{item['p95_ms']:>10.2f}"
+            f"{delta:>8.1f}%{rps_delta:>10.1f}%{'  REGRESSION' if bad else ''}"
+        )
+
+    return not regressed
+
+
+async def main(args: argparse.Namespace) -> int:
+    result = await run(args)
+    print_report(result)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"\nsaved to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if not compare(result, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scenario", type=Path, default=SCENARIO)
+    parser.add_argument("--url", help="адрес запущенного сервера вместо ASGI")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--sample", type=int, default=SAMPLE_SIZE)
+    parser.add_argument("--seed", type=int, help="зафиксировать выбор запросов")
+    parser.add_argument("--save", type=Path, help="сохранить результат в JSON")
+    parser.add_argument("--compare", type=Path, help="сравнить с сохранённым JSON")
+    parser.add_argument(
+        "--threshold", type=float, default=20.0, help="допустимый рост p95, %%"
+    )
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    sys.exit(asyncio.run(main(args)))
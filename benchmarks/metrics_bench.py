@@ -0,0 +1,147 @@
+"""Накладные расходы MetricsMiddleware на запрос.
+
+Без базы, в одном процессе:
+
+    direct       вызов ASGI-приложения, которое сразу отвечает, напрямую
+                 и через MetricsMiddleware; разница медиан - цена метрик
+                 на запрос, бюджет - 50 мкс
+    request      GET через httpx к эндпоинту FastAPI с шаблоном пути без
+                 middleware и с ним, плюс два SQL-оператора в том виде, как
+                 их учитывает install_db_metrics. Шум клиента здесь больше
+                 самих метрик, проверяется метка route в выдаче
+
+    python -m benchmarks.metrics_bench --repeat 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from starlette.types import Message, Receive, Scope, Send
+
+from src.instrumentation.metrics import REGISTRY
+from src.instrumentation.request_metrics import (
+    MetricsMiddleware,
+    current_request_stats,
+)
+
+
+BUDGET_SECONDS = 50e-6
+
+
+def build_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/posts/{post_id}")
+    async def get_post(post_id: str):
+        # То, что делают обработчики событий движка на каждый оператор
+        stats = current_request_stats()
+        if stats is not None:
+            for _ in range(2):
+                started = time.perf_counter()
+                stats.statements += 1
+                stats.db_seconds += time.perf_counter() - started
+        return {"uuid": post_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+class _Route:
+    path = "/direct/{post_id}"
+
+
+async def direct_app(scope: Scope, receive: Receive, send: Send) -> None:
+    scope["route"] = _Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def bench_direct(app, repeat: int) -> list[float]:
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        pass
+
+    timings = []
+    for _ in range(repeat):
+        scope = {"type": "http", "method": "GET", "path": "/direct/1"}
+        started = time.perf_counter()
+        await app(scope, receive, send)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def bench(app: FastAPI, repeat: int) -> list[float]:
+    timings = []
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        for number in range(repeat):
+            started = time.perf_counter()
+            response = await client.get(f"/posts/{number}")
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    print(
+        f"{name:<22}"
+        f"{statistics.median(timings) * 1e6:>10.1f}"
+        f"{statistics.quantiles(timings, n=100)[98] * 1e6:>10.1f}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{'path':<22}{'p50 us':>10}{'p99 us':>10}")
+    wrapped = MetricsMiddleware(direct_app)
+    await bench_direct(wrapped, 100)
+    direct = {"direct plain": [], "direct metrics": []}
+    for _ in range(args.rounds):
+        direct["direct plain"] += await bench_direct(direct_app, args.repeat)
+        direct["direct metrics"] += await bench_direct(wrapped, args.repeat)
+    for name, timings in direct.items():
+        report(name, timings)
+    overhead = statistics.median(direct["direct metrics"]) - statistics.median(
+        direct["direct plain"]
+    )
+    print(f"{'metrics overhead':<22}{overhead * 1e6:>10.1f}")
+    if overhead > BUDGET_SECONDS:
+        raise SystemExit(f"overhead above {BUDGET_SECONDS * 1e6:.0f} us")
+
+    plain, instrumented = build_app(False), build_app(True)
+    # Прогрев: первые запросы платят за создание рядов меток
+    await bench(plain, 100)
+    await bench(instrumented, 100)
+
+    results: dict[str, list[float]] = {"plain": [], "instrumented": []}
+    # Чередование сглаживает дрейф частоты процессора
+    for _ in range(args.rounds):
+        results["plain"] += await bench(plain, args.repeat // args.rounds)
+        results["instrumented"] += await bench(instrumented, args.repeat // args.rounds)
+
+    for name, timings in results.items():
+        report(f"request {name}", timings)
+
+    started = time.perf_counter()
+    exposition = REGISTRY.render()
+    print(
+        f"render: {(time.perf_counter() - started) * 1e3:.2f} ms, "
+        f"{len(exposition.splitlines())} lines"
+    )
+    assert 'route="/posts/{post_id}"' in exposition
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=10)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,178 @@
+"""Сравнение поиска по posts.desc: ILIKE без индекса против trigram и tsvector.
+
+Создаёт отдельную таблицу bench_search_posts с той же схемой поиска, что у
+posts (desc + сгенерированный desc_tsv), заполняет её случайным текстом и
+замеряет первую страницу результатов и точный подсчёт для каждого режима.
+
+    python -m benchmarks.search_bench --rows 1000000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from src.configs.app import settings
+
+
+TABLE = "bench_search_posts"
+
+VOCABULARY = [
+    "кот",
+    "котёнок",
+    "собака",
+    "закат",
+    "море",
+    "горы",
+    "город",
+    "ночь",
+    "дорога",
+    "лес",
+    "река",
+    "снег",
+    "лето",
+    "осень",
+    "портрет",
+    "концерт",
+    "sunset",
+    "mountain",
+    "travel",
+    "street",
+    "coffee",
+    "family",
+    "holiday",
+    "birthday",
+    "video",
+    "photo",
+    "drone",
+    "winter",
+    "beach",
+    "forest",
+]
+
+TERMS = ["кот", "закат море", "mountain", "holid", "drone beach", "ноч"]
+
+QUERIES = {
+    "ilike (seq scan)": (
+        "\"desc\" ILIKE '%' || :q || '%'",
+        None,
+    ),
+    "substring (trgm)": (
+        "\"desc\" ILIKE '%' || :q || '%'",
+        'word_similarity(:q, "desc")',
+    ),
+    "fulltext (tsvector)": (
+        "desc_tsv @@ websearch_to_tsquery('simple'::regconfig, :q)",
+        "ts_rank_cd(desc_tsv, websearch_to_tsquery('simple'::regconfig, :q))",
+    ),
+    "prefix (tsvector)": (
+        "desc_tsv @@ to_tsquery('simple'::regconfig, :prefix)",
+        "ts_rank_cd(desc_tsv, to_tsquery('simple'::regconfig, :prefix))",
+    ),
+}
+
+
+async def seed(connection: AsyncConnection, rows: int) -> None:
+    await connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    await connection.execute(
+        text(
+            f"""
+            CREATE TABLE {TABLE} (
+                uuid uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+                "desc" text,
+                desc_tsv tsvector GENERATED ALWAYS AS
+                    (to_tsvector('simple'::regconfig, coalesce("desc", ''))) STORED
+            )
+            """
+        )
+    )
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO {TABLE} ("desc")
+            SELECT array_to_string(ARRAY(
+                SELECT (CAST(:vocabulary AS text[]))[1 + floor(random() * :size)::int]
+                FROM generate_series(1, 6 + i % 10)
+            ), ' ')
+            FROM generate_series(1, :rows) AS i
+            """
+        ),
+        {"vocabulary": VOCABULARY, "size": len(VOCABULARY), "rows": rows},
+    )
+    await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    await connection.execute(
+        text(f'CREATE INDEX ON {TABLE} USING gin ("desc" gin_trgm_ops)')
+    )
+    await connection.execute(text(f"CREATE INDEX ON {TABLE} USING gin (desc_tsv)"))
+    await connection.execute(text(f"ANALYZE {TABLE}"))
+
+
+async def measure(
+    connection: AsyncConnection, sql: str, params: dict, repeat: int
+) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await connection.execute(text(sql), params)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main(rows: int, repeat: int, keep: bool) -> None:
+    engine = create_async_engine(settings.db.dsl)
+
+    async with engine.connect() as connection:
+        if not keep:
+            started = time.perf_counter()
+            await seed(connection, rows)
+            await connection.commit()
+            print(f"seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'mode':<22}{'query':<8}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, (condition, rank) in QUERIES.items():
+            if rank is None:
+                # Так выполнялся поиск до индексов: без сортировки и индекса
+                await connection.execute(text("SET LOCAL enable_bitmapscan = off"))
+                await connection.execute(text("SET LOCAL enable_indexscan = off"))
+            order = f"ORDER BY {rank} DESC " if rank else ""
+            page = (
+                f'SELECT uuid, "desc" FROM {TABLE} WHERE {condition} {order}LIMIT 100'
+            )
+            count = f"SELECT count(*) FROM {TABLE} WHERE {condition}"
+
+            for label, sql in (("page", page), ("count", count)):
+                timings = []
+                for term in TERMS:
+                    params = {
+                        "q": term,
+                        "prefix": " & ".join(f"{w}:*" for w in term.split()),
+                    }
+                    timings += await measure(connection, sql, params, repeat)
+                print(
+                    f"{name:<22}{label:<8}"
+                    f"{statistics.median(timings):>10.2f}"
+                    f"{percentile(timings, 0.95):>10.2f}"
+                )
+            await connection.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--keep", action="store_true", help="использовать уже заполненную таблицу"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.repeat, args.keep))
@@ -0,0 +1,107 @@
+"""Наполнение базы для нагрузочных замеров.
+
+Категории и посты создаются через CategoryRepository и
+PostRepository.create_many, то есть тем же путём, что и через API:
+срабатывают триггеры счётчиков и уникальные индексы. Генератор
+детерминирован (--seed), поэтому повторный прогон на чистой базе даёт те
+же данные.
+
+    python -m benchmarks.seed --categories 50 --posts 200000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from src.database import async_sesion_maker, engine
+from src.repositories.category import CategoryRepository
+from src.repositories.posts import BULK_CHUNK_SIZE, PostRepository
+from src.schemas.post_schema import BulkConflict
+
+
+WORDS = [
+    "кот",
+    "собака",
+    "закат",
+    "море",
+    "горы",
+    "город",
+    "ночь",
+    "лес",
+    "снег",
+    "концерт",
+    "sunset",
+    "mountain",
+    "travel",
+    "street",
+    "coffee",
+    "family",
+    "holiday",
+    "drone",
+    "beach",
+    "forest",
+]
+
+# Доля постов без категории
+UNCATEGORIZED_SHARE = 0.1
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _desc(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+
+
+async def seed(categories: int, posts: int, rng: random.Random) -> None:
+    async with async_sesion_maker() as session:
+        category_repo = CategoryRepository(session)
+        # Имя с префиксом прогона, чтобы повторный сид не упёрся в уникальность
+        run = _uuid(rng).hex[:8]
+        category_ids = []
+        for number in range(categories):
+            category = await category_repo.create(
+                {"name": f"bench-{run}-{number}", "desc": _desc(rng)}
+            )
+            category_ids.append(category.uuid)
+        print(f"categories: {categories}")
+
+    created = 0
+    while created < posts:
+        batch = min(BULK_CHUNK_SIZE * 10, posts - created)
+        rows = [
+            {
+                "media_id": _uuid(rng),
+                "desc": _desc(rng),
+                "category_id": (
+                    None
+                    if not category_ids or rng.random() < UNCATEGORIZED_SHARE
+                    else rng.choice(category_ids)
+                ),
+            }
+            for _ in range(batch)
+        ]
+        # Новая сессия на пакет, чтобы identity map не рос вместе с объёмом
+        async with async_sesion_maker() as session:
+            await PostRepository(session).create_many(rows, BulkConflict.skip)
+        created += batch
+        print(f"posts: {created} / {posts}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    await seed(args.categories, args.posts, random.Random(args.seed))
+    await engine.dispose()
+    print(f"seeded in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--posts", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,145 @@
+"""Стоимость сериализации страницы постов: ORM + pydantic против строк + orjson.
+
+Сравниваются три пути для страницы из --items постов:
+
+    orm+pydantic+json    ORM-объекты -> PostListResponse (from_attributes)
+                         -> json.dumps, как до перехода на orjson
+    orm+pydantic+orjson  то же, но кодирование через orjson
+    rows+orjson          строки POST_ROW_FIELDS -> dict -> orjson, как сейчас
+                         отдают списки /posts
+
+Без --db объекты и строки строятся в памяти (без identity map), с --db
+страница читается из базы через PostRepository, и в замер входит запрос.
+
+    python -m benchmarks.serialization_bench --items 1000
+    python -m benchmarks.serialization_bench --items 1000 --db
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+import orjson
+from sqlalchemy import Row
+
+from src.models.post import Posts
+from src.repositories.posts import POST_ROW_FIELDS, PostRepository
+from src.schemas.post_schema import PostListResponse
+
+
+def _page(posts: list) -> dict:
+    return {"posts": posts, "total": None, "skip": 0, "limit": len(posts)}
+
+
+def orm_pydantic_json(posts: list[Posts]) -> bytes:
+    response = PostListResponse(**_page(posts))
+    return json.dumps(response.model_dump(mode="json")).encode()
+
+
+def orm_pydantic_orjson(posts: list[Posts]) -> bytes:
+    return orjson.dumps(PostListResponse(**_page(posts)).model_dump(mode="json"))
+
+
+def rows_orjson(rows: list[Row]) -> bytes:
+    return orjson.dumps(_page([dict(zip(POST_ROW_FIELDS, row)) for row in rows]))
+
+
+def synthetic(items: int) -> tuple[list[Posts], list[tuple]]:
+    values = [
+        (
+            uuid.uuid4(),
+            uuid.uuid4(),
+            f"post {number} " * 5,
+            uuid.uuid4(),
+            datetime.now(),
+        )
+        for number in range(items)
+    ]
+    posts = [
+        Posts(
+            uuid=post_id,
+            media_id=media_id,
+            desc=desc,
+            category_id=category_id,
+            create_at=create_at,
+        )
+        for post_id, media_id, desc, category_id, create_at in values
+    ]
+    return posts, values
+
+
+def timed(function: Callable[[], Any], repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def timed_async(
+    function: Callable[[], Awaitable[Any]], repeat: int
+) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(name: str, timings: list[float], items: int) -> None:
+    median = statistics.median(timings)
+    print(f"{name:<22}{median * 1000:>10.2f}{median / items * 1e6:>12.2f}")
+
+
+async def from_db(items: int, repeat: int) -> None:
+    from src.database import async_sesion_maker, engine
+
+    async def orm(encode):
+        async with async_sesion_maker() as session:
+            encode(list(await PostRepository(session).get_all(limit=items)))
+
+    async def rows():
+        async with async_sesion_maker() as session:
+            rows_orjson(
+                list(await PostRepository(session).get_all(limit=items, rows=True))
+            )
+
+    for name, function in (
+        ("orm+pydantic+json", lambda: orm(orm_pydantic_json)),
+        ("orm+pydantic+orjson", lambda: orm(orm_pydantic_orjson)),
+        ("rows+orjson", rows),
+    ):
+        report(name, await timed_async(function, repeat), items)
+
+    await engine.dispose()
+
+
+def main(args: argparse.Namespace) -> None:
+    print(f"{'path':<22}{'page ms':>10}{'us / item':>12}")
+    if args.db:
+        asyncio.run(from_db(args.items, args.repeat))
+        return
+
+    posts, rows = synthetic(args.items)
+    for name, function in (
+        ("orm+pydantic+json", lambda: orm_pydantic_json(posts)),
+        ("orm+pydantic+orjson", lambda: orm_pydantic_orjson(posts)),
+        ("rows+orjson", lambda: rows_orjson(rows)),
+    ):
+        report(name, timed(function, args.repeat), args.items)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--db", action="store_true", help="читать страницу из базы")
+
+    main(parser.parse_args())
@@ -0,0 +1,181 @@
+"""HTTP-кэширование ответов: ETag, Cache-Control, Vary и 304.
+
+Эндпоинт объявляет политику зависимостью cache_policy(...). Если он
+может посчитать ETag до сериализации (по update_at или времени
+пересчёта), то вызывает revalidate() и при совпадении If-None-Match
+сразу отвечает 304. Для объектов, читаемых через кэш, версия при
+проверке берётся из базы (revalidate_version): запись в кэше может быть
+старее базы. Иначе HTTPCacheMiddleware считает слабый ETag по телу
+ответа: клиент всё равно получает 304 и не скачивает тело заново, хотя
+сервер его построил.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from fastapi import Request, Response, status
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Тело больше этого не буферизуется ради ETag и уходит как есть
+MAX_HASHED_BODY = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    cache_control: str
+    vary: str = "Accept-Encoding"
+    # Считать ETag по телу, если эндпоинт не выставил свой
+    hash_body: bool = True
+
+
+def cache_policy(
+    cache_control: str, vary: str = "Accept-Encoding", hash_body: bool = True
+) -> Callable[[Request], None]:
+    """Зависимость, задающая политику кэширования ответа эндпоинта"""
+    policy = CachePolicy(cache_control, vary, hash_body)
+
+    def dependency(request: Request) -> None:
+        request.state.cache_policy = policy
+
+    return dependency
+
+
+def weak_etag(*parts: Any) -> str:
+    """Слабый ETag из версии ресурса: uuid, update_at и т.п."""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        if isinstance(part, datetime):
+            part = part.isoformat()
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    # Для If-None-Match сравнение слабое
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag == "*" or tag.removeprefix("W/") == opaque
+        for tag in (item.strip() for item in if_none_match.split(","))
+    )
+
+
+def revalidate(request: Request, etag: str) -> Optional[Response]:
+    """Запомнить ETag ответа и вернуть 304, если он есть у клиента.
+
+    Вызывается до сериализации, поэтому неизменившийся ресурс не
+    превращается в JSON
+    """
+    request.state.etag = etag
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    return None
+
+
+async def revalidate_version(
+    request: Request, version: Callable[[], Awaitable[Optional[Sequence[Any]]]]
+) -> Optional[Response]:
+    """304, если ETag клиента совпадает с версией ресурса в базе.
+
+    version - лёгкий запрос вида SELECT uuid, update_at, части которого
+    идут в weak_etag в том же порядке, что и у ETag ответа. Без
+    If-None-Match запрос не выполняется. None, если ресурса нет или ETag
+    не совпал: тогда эндпоинт строит ответ как обычно
+    """
+    if request.headers.get("if-none-match") is None:
+        return None
+
+    parts = await version()
+    if parts is None:
+        return None
+    return revalidate(request, weak_etag(*parts))
+
+
+class HTTPCacheMiddleware:
+    """Дописывает ETag, Cache-Control и Vary к ответам GET/HEAD с политикой
+    и превращает их в 304 по If-None-Match"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        # Начало ответа; тело всегда приходит после него
+        start: Message = {}
+        body: list[bytes] = []
+        size = 0
+        passthrough = False
+
+        async def send_with_validators(message: Message) -> None:
+            nonlocal start, size, passthrough
+
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                state = scope.get("state", {})
+                policy: Optional[CachePolicy] = state.get("cache_policy")
+                status_code = message["status"]
+                if policy is None or status_code not in (200, 304):
+                    passthrough = True
+                    await send(message)
+                    return
+
+                headers = MutableHeaders(scope=message)
+                headers.setdefault("cache-control", policy.cache_control)
+                if policy.vary:
+                    headers.add_vary_header(policy.vary)
+                etag = state.get("etag") or headers.get("etag")
+                if etag is not None or status_code == 304 or not policy.hash_body:
+                    if etag is not None:
+                        headers["etag"] = etag
+                    passthrough = True
+                    await send(message)
+                    return
+
+                # ETag по телу: ответ придерживается, пока тело не собрано
+                start = message
+                return
+
+            body.append(message.get("body", b""))
+            size += len(body[-1])
+            if message.get("more_body", False):
+                if size <= MAX_HASHED_BODY:
+                    return
+                # Слишком большое тело отдаётся без ETag
+                passthrough = True
+                await send(start)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": b"".join(body),
+                        "more_body": True,
+                    }
+                )
+                return
+
+            payload = b"".join(body)
+            etag = f'W/"{hashlib.blake2b(payload, digest_size=12).hexdigest()}"'
+            headers = MutableHeaders(scope=start)
+            headers["etag"] = etag
+            if _matches(if_none_match, etag):
+                start["status"] = status.HTTP_304_NOT_MODIFIED
+                del headers["content-length"]
+                if "content-type" in headers:
+                    del headers["content-type"]
+                payload = b""
+            await send(start)
+            await send({"type": "http.response.body", "body": payload})
+
+        await self.app(scope, receive, send_with_validators)
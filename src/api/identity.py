@@ -0,0 +1,65 @@
+"""Текущий пользователь по access-токену из заголовка Authorization.
+
+Проверка не обращается к базе: подпись и срок проверяет TokenCodec, отзыв
+сессии - RevocationCache в памяти процесса. Пользователь из базы не
+загружается; кому нужны его данные, читает их сам по user_id
+"""
+
+from typing import Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from src.auth import AccessClaims, TokenError, get_revocation_cache, get_token_codec
+
+
+bearer = HTTPBearer(auto_error=False)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer),
+) -> Optional[AccessClaims]:
+    """Данные токена или None для анонимного запроса; 401, если токен
+    передан, но недействителен"""
+    if credentials is None:
+        return None
+
+    try:
+        claims = get_token_codec().decode(credentials.credentials)
+    except TokenError:
+        raise _unauthorized("Invalid or expired token")
+    if get_revocation_cache().is_revoked(claims.session_id):
+        raise _unauthorized("Session revoked")
+    return claims
+
+
+async def require_current_user(
+    claims: Optional[AccessClaims] = Depends(get_current_user),
+) -> AccessClaims:
+    """Данные токена; 401 для анонимного запроса"""
+    if claims is None:
+        raise _unauthorized("Not authenticated")
+    return claims
+
+
+async def get_user_id(
+    claims: Optional[AccessClaims] = Depends(get_current_user),
+) -> Optional[UUID]:
+    """uuid пользователя или None для анонимного запроса"""
+    return claims.user_id if claims is not None else None
+
+
+async def require_user_id(
+    claims: AccessClaims = Depends(require_current_user),
+) -> UUID:
+    """uuid пользователя; 401 для анонимного запроса"""
+    return claims.user_id
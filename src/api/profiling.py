@@ -0,0 +1,174 @@
+"""Профилирование работающего воркера для администраторов.
+
+Доступ - по X-Admin-Token, равному profiling.admin_token. При
+выключенном профилировании эндпоинты отвечают 404, как будто их нет.
+
+Запрос с заголовками X-Profile и X-Admin-Token выполняется под
+RequestProfiler; в ответ добавляется X-Profile-Id, по которому профиль
+забирается из /api/v1/misc/profile/requests/{profile_id}. Без верного
+токена X-Profile молча игнорируется. Профиль сохраняется в каталог,
+общий для воркеров, до последней части тела ответа, так что его можно
+забрать сразу и через любой воркер.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import sys
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Optional
+
+from fastapi import Header, HTTPException, Response, status
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.configs.app import settings
+from src.instrumentation.profiler import Profile, RequestProfiler
+
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+
+PROFILE_FORMATS = ("speedscope", "collapsed")
+
+
+def _token_valid(token: Optional[str]) -> bool:
+    config = settings.profiling
+    if not config.enabled or not config.admin_token or token is None:
+        return False
+    return hmac.compare_digest(token.encode(), config.admin_token.encode())
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """404 при выключенном профилировании, 403 при неверном токене"""
+    if not settings.profiling.enabled or not settings.profiling.admin_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if not _token_valid(x_admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token"
+        )
+
+
+def _collapsed_response(collapsed: str) -> Response:
+    return Response(collapsed, media_type="text/plain; charset=utf-8")
+
+
+def _speedscope_response(speedscope: dict[str, Any]) -> Response:
+    return ORJSONResponse(
+        speedscope,
+        headers={
+            "Content-Disposition": 'attachment; filename="profile.speedscope.json"'
+        },
+    )
+
+
+def profile_response(profile: Profile, format: str) -> Response:
+    if format == "collapsed":
+        return _collapsed_response(profile.collapsed())
+    return _speedscope_response(profile.speedscope())
+
+
+class RequestProfileStore:
+    """Последние профили запросов в каталоге {profile_id}.json.
+
+    Запрос с X-Profile выполняет один воркер, а запрос профиля может
+    попасть в другой, поэтому профили лежат в файлах, а не в памяти
+    процесса. В файле оба формата: объекты кода в JSON не сохраняются
+    """
+
+    def __init__(self, directory: str, limit: int):
+        self.directory = Path(directory)
+        self.limit = limit
+
+    def add(self, profile_id: str, profile: Profile) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{profile_id}.json"
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(
+            json.dumps(
+                {"speedscope": profile.speedscope(), "collapsed": profile.collapsed()}
+            )
+        )
+        os.replace(tmp, path)
+        self._prune()
+
+    def _prune(self) -> None:
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            try:
+                profiles.append((path.stat().st_mtime, path))
+            except OSError:
+                # Удалён другим воркером
+                continue
+        profiles.sort(reverse=True)
+        for _, path in profiles[self.limit :]:
+            path.unlink(missing_ok=True)
+
+    def get(self, profile_id: str, format: str) -> Optional[Response]:
+        try:
+            data = json.loads((self.directory / f"{profile_id}.json").read_text())
+        except (OSError, ValueError):
+            return None
+        if format == "collapsed":
+            return _collapsed_response(data["collapsed"])
+        return _speedscope_response(data["speedscope"])
+
+
+request_profiles = RequestProfileStore(
+    settings.profiling.request_profiles_dir, settings.profiling.kept_request_profiles
+)
+
+
+class ProfilingMiddleware:
+    """Профилирует запрос с X-Profile и верным X-Admin-Token"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if PROFILE_HEADER not in headers or not _token_valid(
+            headers.get("x-admin-token")
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        name = f"{scope['method']} {scope['path']}"
+        # Кадр этой корутины - граница стеков запроса
+        profiler = RequestProfiler(
+            name, settings.profiling.request_interval, sys._getframe()
+        )
+        stored = False
+
+        async def store() -> None:
+            nonlocal stored
+            if stored:
+                return
+            stored = True
+            await profiler.stop()
+            await asyncio.to_thread(request_profiles.add, profile_id, profiler.profile)
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[PROFILE_ID_HEADER] = profile_id
+            elif message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                # Клиент, получивший ответ целиком, уже может забрать профиль
+                await store()
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await store()
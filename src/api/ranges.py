@@ -0,0 +1,158 @@
+"""Range и условные запросы (RFC 9110) для отдачи неизменяемых объектов."""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+
+# Больше диапазонов в одном запросе не обслуживается: отдаётся весь объект
+MAX_RANGES = 16
+
+# (start, length)
+ByteRange = tuple[int, int]
+
+
+def http_date(value: datetime) -> str:
+    """datetime из базы (UTC без зоны) в формате Last-Modified"""
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _parse_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _etags(header: str) -> list[str]:
+    # Слабое сравнение: W/"x" и "x" совпадают
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def not_modified(headers, etag: str, last_modified: datetime) -> bool:
+    """Можно ли ответить 304 на GET/HEAD.
+
+    If-None-Match важнее If-Modified-Since: если он есть, дата не смотрится
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = _etags(if_none_match)
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_date(if_modified_since)
+        modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0)
+        return since is not None and modified <= since
+
+    return False
+
+
+def _range_applies(headers, etag: str, last_modified: datetime) -> bool:
+    """If-Range: диапазон отдаётся, только если объект не менялся"""
+    if_range = headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        # Здесь сравнение строгое
+        return if_range == etag
+    since = _parse_date(if_range)
+    return since is not None and since == last_modified.replace(
+        tzinfo=timezone.utc, microsecond=0
+    )
+
+
+def _parse_spec(spec: str, size: int) -> Optional[ByteRange]:
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first or last):
+        raise ValueError(spec)
+    if not first:
+        # bytes=-N: последние N байт
+        suffix = int(last)
+        if suffix <= 0:
+            return None
+        return max(size - suffix, 0), min(suffix, size)
+    start = int(first)
+    end = int(last) if last else None
+    if end is not None and start > end:
+        raise ValueError(spec)
+    if start >= size:
+        return None
+    end = size - 1 if end is None else min(end, size - 1)
+    return start, end - start + 1
+
+
+def parse_range(
+    headers, size: int, etag: str, last_modified: datetime
+) -> Optional[list[ByteRange]]:
+    """Диапазоны из заголовка Range, упорядоченные и склеенные.
+
+    None - отдать объект целиком: заголовка нет, он не разобран, не прошёл
+    If-Range или диапазонов слишком много. Если ни один диапазон не попадает
+    в объект - 416
+    """
+    header = headers.get("range")
+    if header is None or not _range_applies(headers, etag, last_modified):
+        return None
+
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    try:
+        ranges = [_parse_spec(spec, size) for spec in specs.split(",")]
+    except ValueError:
+        # Синтаксически неверный Range игнорируется
+        return None
+
+    satisfiable = sorted(item for item in ranges if item is not None)
+    if not satisfiable:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    # Перекрывающиеся и соседние диапазоны отдаются одним куском
+    merged = [satisfiable[0]]
+    for start, length in satisfiable[1:]:
+        last_start, last_length = merged[-1]
+        if start <= last_start + last_length:
+            end = max(last_start + last_length, start + length)
+            merged[-1] = (last_start, end - last_start)
+        else:
+            merged.append((start, length))
+
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+def content_range(item: ByteRange, size: int) -> str:
+    start, length = item
+    return f"bytes {start}-{start + length - 1}/{size}"
+
+
+def multipart_headers(
+    ranges: list[ByteRange], size: int, content_type: str, boundary: str
+) -> tuple[list[bytes], bytes, int]:
+    """Заголовки частей multipart/byteranges, завершающая граница и полная
+    длина тела, чтобы ответ ушёл с Content-Length"""
+    heads = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: {content_range(item, size)}\r\n\r\n"
+        ).encode()
+        for item in ranges
+    ]
+    # Каждая часть, кроме первой, отделяется переводом строки
+    heads = [heads[0]] + [b"\r\n" + head for head in heads[1:]]
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    length = sum(map(len, heads)) + sum(length for _, length in ranges) + len(tail)
+    return heads, tail, length
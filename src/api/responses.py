@@ -0,0 +1,26 @@
+"""JSON-ответы, собранные из строк базы без pydantic."""
+
+import uuid
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+
+
+def _default(value: Any) -> Any:
+    # asyncpg отдаёт uuid как asyncpg.pgproto.pgproto.UUID - подкласс
+    # uuid.UUID, который orjson сам не сериализует
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """ORJSONResponse, который принимает значения прямо из строк asyncpg"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import ORJSONResponse
+
+from src.api.identity import require_current_user
+from src.auth import AccessClaims
+from src.schemas.auth_schema import (
+    LoginRequest,
+    PasswordChange,
+    RefreshRequest,
+    TokenResponse,
+    UserCreate,
+    UserResponse,
+)
+from src.services.auth_service import AuthService, get_auth_service
+
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Регистрация",
+)
+async def register(
+    user_data: UserCreate,
+    service: AuthService = Depends(get_auth_service),
+):
+    """Зарегистрировать пользователя; 409, если логин занят"""
+    return await service.register(user_data)
+
+
+@router.post("/login", response_model=TokenResponse, summary="Вход")
+async def login(
+    credentials: LoginRequest,
+    service: AuthService = Depends(get_auth_service),
+):
+    """Обменять логин и пароль на access- и refresh-токен"""
+    return await service.login(credentials)
+
+
+@router.post("/refresh", response_model=TokenResponse, summary="Обновление токена")
+async def refresh(
+    request: RefreshRequest,
+    service: AuthService = Depends(get_auth_service),
+):
+    """Обменять refresh-токен на новую пару; старый больше не действует"""
+    return await service.refresh(request.refresh_token)
+
+
+@router.post(
+    "/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Выход из сессии"
+)
+async def logout(
+    claims: AccessClaims = Depends(require_current_user),
+    service: AuthService = Depends(get_auth_service),
+):
+    """Отозвать текущую сессию"""
+    await service.logout(claims)
+
+
+@router.put("/password", response_model=TokenResponse, summary="Смена пароля")
+async def change_password(
+    change: PasswordChange,
+    claims: AccessClaims = Depends(require_current_user),
+    service: AuthService = Depends(get_auth_service),
+):
+    """Сменить пароль; все сессии пользователя закрываются, взамен
+    текущей выдаётся новая пара токенов"""
+    return await service.change_password(claims, change)
+
+
+@router.get("/me", response_model=UserResponse, summary="Текущий пользователь")
+async def me(
+    claims: AccessClaims = Depends(require_current_user),
+    service: AuthService = Depends(get_auth_service),
+):
+    return await service.get_user(claims)
@@ -1,16 +1,42 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, Request, status, Query
 
+from src.api.http_cache import (
+    cache_policy,
+    revalidate,
+    revalidate_version,
+    weak_etag,
+)
+from src.api.responses import ORJSONResponse
+from src.configs.app import settings
 
 from src.schemas.category_schema import (
     CategoryResponse,
     CategoryCreate,
     CategoryUpdate,
+    CategoryStatsListResponse,
 )
+from src.repositories.category import CATEGORY_ROW_FIELDS
+from src.repositories.category_stats import CATEGORY_STATS_FIELDS
+from src.repositories.pagination import next_cursor
 from src.services.category_service import get_category_service, CategoryService
+from src.services.category_stats_service import (
+    CategoryStatsService,
+    get_category_stats_service,
+)
+
 
+router = APIRouter(default_response_class=ORJSONResponse)
 
-router = APIRouter()
+LIST_CACHE = Depends(cache_policy("public, max-age=30, stale-while-revalidate=60"))
+DETAIL_CACHE = Depends(cache_policy("public, no-cache"))
+# Статистика не меняется между пересчётами представления
+STATS_CACHE = Depends(
+    cache_policy(
+        f"public, max-age={int(settings.category_stats.interval_seconds)}",
+        hash_body=False,
+    )
+)
 
 
 # Эндпоинты
@@ -46,33 +72,83 @@ async def create_category(
     "/",
     response_model=List[CategoryResponse],
     summary="Получить все категории",
+    dependencies=[LIST_CACHE],
 )
 async def get_all_categories(
     skip: int = Query(0, ge=0, description="Количество записей для пропуска"),
     limit: int = Query(100, ge=1, le=1000, description="Лимит записей"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
     service: CategoryService = Depends(get_category_service),
 ):
     """
-    Получить список всех категорий с пагинацией
+    Получить список всех категорий с пагинацией.
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor
     """
-    categories = await service.get_all(skip=skip, limit=limit)
-    return categories
+    categories = await service.get_all(skip=skip, limit=limit, cursor=cursor)
+
+    # Строки сериализуются напрямую, без ORM-объектов и валидации pydantic
+    response = ORJSONResponse(
+        [dict(zip(CATEGORY_ROW_FIELDS, row)) for row in categories]
+    )
+    cursor_token = next_cursor(categories, limit)
+    if cursor_token:
+        response.headers["X-Next-Cursor"] = cursor_token
+
+    return response
+
+
+@router.get(
+    "/stats",
+    response_model=CategoryStatsListResponse,
+    summary="Статистика всех категорий",
+    dependencies=[STATS_CACHE],
+)
+async def get_category_stats(
+    request: Request,
+    service: CategoryStatsService = Depends(get_category_stats_service),
+):
+    """
+    Число постов, время первого и последнего поста и другие агрегаты по
+    всем категориям одним запросом.
+    Данные пересчитываются периодически, время пересчёта - в refreshed_at
+    """
+    rows, refreshed_at = await service.get_stats()
+    not_modified = revalidate(request, weak_etag(refreshed_at))
+    if not_modified:
+        return not_modified
+
+    return ORJSONResponse(
+        {
+            "categories": [dict(zip(CATEGORY_STATS_FIELDS, row)) for row in rows],
+            "refreshed_at": refreshed_at,
+        }
+    )
 
 
 @router.get(
     "/{category_id}",
     response_model=CategoryResponse,
     summary="Получить категорию по ID",
+    dependencies=[DETAIL_CACHE],
 )
 async def get_category(
-    category_id: str, service: CategoryService = Depends(get_category_service)
+    category_id: str,
+    request: Request,
+    service: CategoryService = Depends(get_category_service),
 ):
     """
     Получить категорию по идентификатору
     """
+    not_modified = await revalidate_version(
+        request, lambda: service.get_version(category_id)
+    )
+    if not_modified:
+        return not_modified
+
     category = await service.get_by_id(category_id)
 
-    return category
+    etag = weak_etag(category.uuid, category.update_at)
+    return revalidate(request, etag) or category
 
 
 @router.put(
@@ -112,6 +188,7 @@ async def delete_category(
     "/search/",
     response_model=List[CategoryResponse],
     summary="Поиск категорий по имени",
+    dependencies=[LIST_CACHE],
 )
 async def search_categories(
     name: str = Query(..., description="Шаблон для поиска по имени"),
@@ -126,7 +203,11 @@ async def search_categories(
     return categories
 
 
-@router.get("/check/{name}", summary="Проверить существование категории по имени")
+@router.get(
+    "/check/{name}",
+    summary="Проверить существование категории по имени",
+    dependencies=[LIST_CACHE],
+)
 async def check_category_exists(
     name: str, service: CategoryService = Depends(get_category_service)
 ):
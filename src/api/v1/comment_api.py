@@ -0,0 +1,159 @@
+from typing import Any, Optional, Sequence
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import Row
+
+from src.api.http_cache import cache_policy
+from src.api.identity import require_user_id
+from src.api.responses import ORJSONResponse
+from src.repositories.comments import COMMENT_ROW_FIELDS
+from src.repositories.pagination import next_cursor
+from src.schemas.comment_schema import (
+    CommentBatchResponse,
+    CommentCreate,
+    CommentListResponse,
+    CommentResponse,
+    CommentUpdate,
+)
+from src.services.comment_service import CommentService, get_comment_service
+
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+LIST_CACHE = Depends(cache_policy("public, max-age=5, stale-while-revalidate=30"))
+
+# Больше постов за раз батч не принимает
+MAX_BATCH_POSTS = 100
+
+
+def _comment(row: Row) -> dict[str, Any]:
+    # По именам, а не по позиции: у строк батча впереди ещё requested_id
+    # и comment_count
+    return {name: getattr(row, name) for name in COMMENT_ROW_FIELDS}
+
+
+def _comments_page(rows: Sequence[Row], limit: int) -> ORJSONResponse:
+    """Страница CommentListResponse из строк репозитория без валидации
+    pydantic"""
+    return ORJSONResponse(
+        {
+            "comments": [_comment(row) for row in rows],
+            "limit": limit,
+            "next_cursor": next_cursor(rows, limit),
+        }
+    )
+
+
+@router.get(
+    "/batch",
+    dependencies=[LIST_CACHE],
+    response_model=CommentBatchResponse,
+    summary="Первые комментарии нескольких постов",
+)
+async def get_first_comments(
+    post_id: list[UUID] = Query(..., max_length=MAX_BATCH_POSTS),
+    limit: int = Query(3, ge=1, le=50),
+    service: CommentService = Depends(get_comment_service),
+):
+    """Первые limit комментариев каждого поста одним запросом - для
+    страницы ленты вместо запроса на каждый пост"""
+    previews = await service.get_first_comments(post_id, limit)
+    return ORJSONResponse(
+        {
+            "posts": [
+                {
+                    **preview,
+                    "comments": [_comment(row) for row in preview["comments"]],
+                }
+                for preview in previews
+            ]
+        }
+    )
+
+
+@router.get(
+    "/posts/{post_id}",
+    dependencies=[LIST_CACHE],
+    response_model=CommentListResponse,
+    summary="Комментарии поста",
+)
+async def get_thread(
+    post_id: UUID,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    service: CommentService = Depends(get_comment_service),
+):
+    """Комментарии верхнего уровня, от старых к новым"""
+    return _comments_page(await service.get_thread(post_id, limit, cursor), limit)
+
+
+@router.post(
+    "/posts/{post_id}",
+    response_model=CommentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Прокомментировать пост",
+)
+async def create_comment(
+    post_id: UUID,
+    comment: CommentCreate,
+    user_id: UUID = Depends(require_user_id),
+    service: CommentService = Depends(get_comment_service),
+):
+    return _comment(await service.create(post_id, user_id, comment.body))
+
+
+@router.get(
+    "/{comment_id}/replies",
+    dependencies=[LIST_CACHE],
+    response_model=CommentListResponse,
+    summary="Ответы на комментарий",
+)
+async def get_replies(
+    comment_id: UUID,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    service: CommentService = Depends(get_comment_service),
+):
+    return _comments_page(await service.get_replies(comment_id, limit, cursor), limit)
+
+
+@router.post(
+    "/{comment_id}/replies",
+    response_model=CommentResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Ответить на комментарий",
+)
+async def reply(
+    comment_id: UUID,
+    comment: CommentCreate,
+    user_id: UUID = Depends(require_user_id),
+    service: CommentService = Depends(get_comment_service),
+):
+    return _comment(await service.reply(comment_id, user_id, comment.body))
+
+
+@router.put(
+    "/{comment_id}", response_model=CommentResponse, summary="Изменить комментарий"
+)
+async def update_comment(
+    comment_id: UUID,
+    comment: CommentUpdate,
+    user_id: UUID = Depends(require_user_id),
+    service: CommentService = Depends(get_comment_service),
+):
+    return _comment(await service.update(comment_id, user_id, comment.body))
+
+
+@router.delete(
+    "/{comment_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Удалить комментарий",
+)
+async def delete_comment(
+    comment_id: UUID,
+    user_id: UUID = Depends(require_user_id),
+    service: CommentService = Depends(get_comment_service),
+):
+    """Удалить свой комментарий вместе с ответами"""
+    await service.delete(comment_id, user_id)
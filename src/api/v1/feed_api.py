@@ -0,0 +1,81 @@
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.http_cache import cache_policy
+from src.api.responses import ORJSONResponse
+from src.api.identity import require_user_id
+from src.previews import preview_urls
+from src.repositories.pagination import next_cursor
+from src.repositories.posts import POST_ROW_FIELDS
+from src.schemas.feed_schema import FeedResponse
+from src.services.feed_service import FeedService, get_feed_service
+
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Лента своя у каждого пользователя: только в его кэше и с проверкой по ETag
+FEED_CACHE = Depends(
+    cache_policy("private, no-cache", vary="Accept-Encoding, Authorization")
+)
+
+
+@router.get(
+    "/",
+    dependencies=[FEED_CACHE],
+    response_model=FeedResponse,
+    summary="Лента постов из подписок",
+)
+async def get_feed(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    user_id: UUID = Depends(require_user_id),
+    service: FeedService = Depends(get_feed_service),
+):
+    """Посты авторов, на которых подписан пользователь, от новых к старым"""
+    rows = await service.get_feed(user_id, limit, cursor)
+    return ORJSONResponse(
+        {
+            "posts": [
+                {
+                    **dict(zip(POST_ROW_FIELDS, row)),
+                    "previews": preview_urls(row.media_id, row.has_previews),
+                }
+                for row in rows
+            ],
+            "limit": limit,
+            "next_cursor": next_cursor(rows, limit),
+        }
+    )
+
+
+@router.put(
+    "/subscriptions/{owner_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Подписаться на автора",
+)
+async def subscribe(
+    owner_id: UUID,
+    user_id: UUID = Depends(require_user_id),
+    service: FeedService = Depends(get_feed_service),
+):
+    """Подписаться; повторная подписка ничего не меняет"""
+    await service.subscribe(user_id, owner_id)
+
+
+@router.delete(
+    "/subscriptions/{owner_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Отписаться от автора",
+)
+async def unsubscribe(
+    owner_id: UUID,
+    user_id: UUID = Depends(require_user_id),
+    service: FeedService = Depends(get_feed_service),
+):
+    """Отписаться и убрать посты автора из ленты"""
+    if not await service.unsubscribe(user_id, owner_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found"
+        )
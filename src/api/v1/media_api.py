@@ -0,0 +1,230 @@
+import secrets
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, Request, Response, status
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+
+from src.api.ranges import (
+    content_range,
+    http_date,
+    multipart_headers,
+    not_modified,
+    parse_range,
+)
+
+from src.schemas.media_schema import (
+    MediaResponse,
+    UploadComplete,
+    UploadCreate,
+    UploadResponse,
+)
+from src.schemas.post_schema import PostResponse
+from src.services.media_service import MediaService, get_media_service
+
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+@router.post(
+    "/uploads",
+    response_model=UploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Начать загрузку файла",
+)
+async def create_upload(
+    upload_data: UploadCreate,
+    service: MediaService = Depends(get_media_service),
+):
+    """
+    Начать возобновляемую загрузку файла размером length байт.
+    Данные отправляются PATCH-запросами на /uploads/{upload_id}
+    """
+    return await service.create_upload(upload_data)
+
+
+@router.get(
+    "/uploads/{upload_id}",
+    response_model=UploadResponse,
+    summary="Состояние загрузки",
+)
+async def get_upload(
+    upload_id: UUID,
+    response: Response,
+    service: MediaService = Depends(get_media_service),
+):
+    """
+    Сколько байт уже сохранено: после обрыва загрузка продолжается с offset
+    """
+    upload = await service.get_upload(upload_id)
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return upload
+
+
+@router.patch(
+    "/uploads/{upload_id}",
+    response_model=UploadResponse,
+    summary="Дописать данные в загрузку",
+)
+async def write_upload(
+    upload_id: UUID,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    content_length: Optional[int] = Header(None, alias="Content-Length"),
+    service: MediaService = Depends(get_media_service),
+):
+    """
+    Тело запроса - следующие байты файла начиная с Upload-Offset.
+    Ответ содержит новую позицию; если она меньше ожидаемой (обрыв или
+    неполная часть S3), клиент продолжает с неё.
+    Если Upload-Offset не совпадает с сохранённой позицией - 409
+    """
+    upload = await service.write(
+        upload_id, upload_offset, request.stream(), content_length
+    )
+    response.headers["Upload-Offset"] = str(upload.offset)
+    return upload
+
+
+@router.post(
+    "/uploads/{upload_id}/complete",
+    response_model=PostResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Завершить загрузку и создать пост",
+)
+async def complete_upload(
+    upload_id: UUID,
+    post_data: UploadComplete,
+    service: MediaService = Depends(get_media_service),
+):
+    """
+    Собрать загруженный файл и создать пост, у которого media_id - id файла
+    """
+    return await service.complete(upload_id, post_data)
+
+
+@router.delete(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Отменить загрузку",
+)
+async def abort_upload(
+    upload_id: UUID, service: MediaService = Depends(get_media_service)
+):
+    """
+    Отменить загрузку и удалить уже сохранённые данные
+    """
+    await service.abort(upload_id)
+
+
+@router.get(
+    "/{media_id}/info",
+    response_model=MediaResponse,
+    summary="Получить сведения о файле",
+)
+async def get_media_info(
+    media_id: UUID, service: MediaService = Depends(get_media_service)
+):
+    """
+    Получить размер, тип и sha256 загруженного файла
+    """
+    return await service.get_media(media_id)
+
+
+@router.get(
+    "/{media_id}/preview/{size}",
+    response_class=FileResponse,
+    summary="Получить превью изображения",
+    responses={
+        304: {"description": "Превью не изменилось"},
+        404: {"description": "Превью ещё не построено"},
+    },
+)
+async def get_preview(
+    media_id: UUID,
+    size: int,
+    request: Request,
+    service: MediaService = Depends(get_media_service),
+):
+    """
+    Превью длинной стороной size px. Строится в фоне после загрузки,
+    до этого - 404
+    """
+    media, path = await service.get_preview(media_id, size)
+    etag = f'"{media.sha256}-{size}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(media.create_at),
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if not_modified(request.headers, etag, media.create_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileResponse(path, headers=headers, media_type=f"image/{path.suffix[1:]}")
+
+
+@router.get(
+    "/{media_id}",
+    response_class=StreamingResponse,
+    summary="Скачать файл",
+    responses={
+        206: {"description": "Часть файла (Range)"},
+        304: {"description": "Файл не изменился"},
+        416: {"description": "Диапазон вне файла"},
+    },
+)
+@router.head("/{media_id}", response_class=StreamingResponse, include_in_schema=False)
+async def download_media(
+    media_id: UUID,
+    request: Request,
+    service: MediaService = Depends(get_media_service),
+):
+    """
+    Скачать файл поста по media_id.
+    Поддерживаются Range (в том числе несколько диапазонов), If-Range,
+    If-None-Match и If-Modified-Since
+    """
+    media = await service.get_media(media_id)
+    # Файл не меняется после загрузки, поэтому sha256 - строгий ETag
+    etag = f'"{media.sha256}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(media.create_at),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+
+    if not_modified(request.headers, etag, media.create_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    ranges = parse_range(request.headers, media.size, etag, media.create_at)
+    heads, tail = None, b""
+    if ranges is None:
+        status_code = status.HTTP_200_OK
+        ranges = [(0, media.size)]
+        media_type = media.content_type
+        headers["Content-Length"] = str(media.size)
+    elif len(ranges) == 1:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        media_type = media.content_type
+        headers["Content-Range"] = content_range(ranges[0], media.size)
+        headers["Content-Length"] = str(ranges[0][1])
+    else:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        boundary = secrets.token_hex(16)
+        media_type = f"multipart/byteranges; boundary={boundary}"
+        heads, tail, length = multipart_headers(
+            ranges, media.size, media.content_type, boundary
+        )
+        headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        # Заголовки те же, что у GET, но файл не читается
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    return StreamingResponse(
+        service.read(media, ranges, heads, tail),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
@@ -1,12 +1,97 @@
-from fastapi import APIRouter
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 
 from configs.app import settings
-from schemas.misc_schema import HelthCheckSchema
+from schemas.misc_schema import (
+    HelthCheckSchema,
+    PoolStatsSchema,
+    PreviewQueueStatsSchema,
+)
+from src.api.profiling import (
+    PROFILE_FORMATS,
+    profile_response,
+    request_profiles,
+    require_admin,
+)
+from src.database import async_sesion_maker, engine, shared_metrics
+from src.instrumentation.metrics import REGISTRY
+from src.instrumentation.profiler import profile_process
+from src.repositories.jobs import JobRepository
 
 
 router = APIRouter()
 
+# Профили процесса не снимаются параллельно: два сэмплера искажали бы
+# друг друга и удваивали накладные расходы
+_process_profile_lock = asyncio.Lock()
+
+PROFILE_FORMAT = Query("speedscope", pattern="^(" + "|".join(PROFILE_FORMATS) + ")$")
+
 
 @router.get("/helth", response_model=HelthCheckSchema)
 def helth():
     return HelthCheckSchema(status="ok", version=settings.app.app_version)
+
+
+@router.get("/pool", response_model=PoolStatsSchema)
+def pool_stats():
+    """Состояние пула соединений текущего воркера"""
+    return PoolStatsSchema(**engine.pool.stats())
+
+
+@router.get("/previews", response_model=PreviewQueueStatsSchema)
+async def preview_queue_stats(window: float = Query(300.0, gt=0, le=86400)):
+    """Глубина очереди превью и задержки задач, завершённых за window секунд.
+
+    Считается по таблице очереди, поэтому учитывает все обработчики
+    """
+    async with async_sesion_maker() as session:
+        return PreviewQueueStatsSchema(**await JobRepository(session).stats(window))
+
+
+@router.get("/metrics", response_class=Response)
+def metrics():
+    """Метрики в текстовом формате Prometheus, при нескольких воркерах -
+    сумма по всем"""
+    exposition = (
+        REGISTRY.render() if shared_metrics is None else shared_metrics.render()
+    )
+    return Response(exposition, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    format: str = PROFILE_FORMAT,
+    all_threads: bool = False,
+):
+    """Сэмплирующий профиль текущего воркера за seconds секунд"""
+    if seconds > settings.profiling.max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"seconds must be at most {settings.profiling.max_seconds}",
+        )
+    if _process_profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Profiling in progress"
+        )
+    async with _process_profile_lock:
+        result = await profile_process(
+            seconds, settings.profiling.interval, all_threads
+        )
+    return profile_response(result, format)
+
+
+@router.get("/profile/requests/{profile_id}", dependencies=[Depends(require_admin)])
+def request_profile(
+    profile_id: str = Path(..., pattern="^[0-9a-f]{32}$"),
+    format: str = PROFILE_FORMAT,
+):
+    """Профиль запроса, выполненного с заголовком X-Profile"""
+    response = request_profiles.get(profile_id, format)
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    return response
@@ -1,6 +1,22 @@
-from typing import List, Optional, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
-
+from datetime import datetime
+from typing import List, Optional, Any, Sequence
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query, Body
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+
+from src.api.http_cache import (
+    cache_policy,
+    revalidate,
+    revalidate_version,
+    weak_etag,
+)
+from src.api.responses import ORJSONResponse
+from src.api.identity import get_user_id
+from src.previews import preview_urls
+from src.repositories.pagination import next_cursor
+from src.repositories.posts import POST_ROW_FIELDS
 from src.services.post_service import PostService, get_post_service
 from src.schemas.post_schema import (
     PostCreate,
@@ -13,54 +29,154 @@ from src.schemas.post_schema import (
     PostsCountByCategoryResponse,
     PostSearchParams,
     BulkAssignCategory,
+    BulkConflict,
+    ExportFormat,
+    TotalMode,
+)
+from src.schemas.search_schema import SearchOrder
+
+router = APIRouter(
+    prefix="/posts", tags=["posts"], default_response_class=ORJSONResponse
 )
 
-router = APIRouter(prefix="/posts", tags=["posts"])
+# Списки меняются часто: короткий срок и ETag по телу ответа
+LIST_CACHE = Depends(cache_policy("public, max-age=5, stale-while-revalidate=30"))
+# Пост проверяется при каждом обращении, но по update_at из базы, без
+# чтения и сериализации самого поста
+DETAIL_CACHE = Depends(cache_policy("public, no-cache"))
+
+
+def _posts_page(
+    rows: Sequence[Row],
+    total: Optional[int],
+    skip: int,
+    limit: int,
+    cursor_token: Optional[str],
+) -> ORJSONResponse:
+    """Страница PostListResponse из строк репозитория.
+
+    Строки сериализуются напрямую, без ORM-объектов и валидации pydantic;
+    response_model у эндпоинта остаётся для схемы OpenAPI
+    """
+    return ORJSONResponse(
+        {
+            "posts": [
+                {
+                    **dict(zip(POST_ROW_FIELDS, row)),
+                    "previews": preview_urls(row.media_id, row.has_previews),
+                }
+                for row in rows
+            ],
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": cursor_token,
+        }
+    )
 
 
-@router.get("/", response_model=PostListResponse, summary="Получить посты")
+@router.get(
+    "/",
+    response_model=PostListResponse,
+    summary="Получить посты",
+    dependencies=[LIST_CACHE],
+)
 async def get_all_posts(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    total_mode: TotalMode = Query(
+        TotalMode.exact, alias="total", description="Способ подсчёта total"
+    ),
     service: PostService = Depends(get_post_service),
 ):
-    posts = await service.get_all_posts(skip, limit)
-    total = await service.get_posts_count()
+    posts = await service.get_all_posts(skip, limit, cursor)
+    total = await service.get_posts_total(total_mode)
 
-    return PostListResponse(posts=posts, total=total, skip=skip, limit=limit)
+    return _posts_page(posts, total, skip, limit, next_cursor(posts, limit))
 
 
 @router.get(
     "/with-category",
+    dependencies=[LIST_CACHE],
     response_model=PostWithCategoryListResponse,
     summary="Получить пост с указанием подрбностей о категории",
 )
 async def get_all_posts_with_category(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    total_mode: TotalMode = Query(
+        TotalMode.exact, alias="total", description="Способ подсчёта total"
+    ),
     service: PostService = Depends(get_post_service),
 ):
     """Получить все посты с категориями"""
 
-    posts = await service.get_all_posts_with_category(skip, limit)
-    total = await service.get_posts_count()
+    posts = await service.get_all_posts_with_category(skip, limit, cursor)
+    total = await service.get_posts_total(total_mode)
 
     return PostWithCategoryListResponse(
-        posts=posts, total=total, skip=skip, limit=limit
+        posts=posts,
+        total=total,
+        skip=skip,
+        limit=limit,
+        next_cursor=next_cursor(posts, limit),
+    )
+
+
+@router.get(
+    "/export",
+    summary="Выгрузить посты потоком в NDJSON или CSV",
+    response_class=StreamingResponse,
+)
+async def export_posts(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    with_category: bool = Query(False),
+    category_id: Optional[UUID] = Query(None),
+    created_from: Optional[datetime] = Query(None, description="create_at >="),
+    created_to: Optional[datetime] = Query(None, description="create_at <"),
+    service: PostService = Depends(get_post_service),
+):
+    """Выгрузить посты целиком через серверный курсор.
+
+    Объём памяти не зависит от размера выгрузки: строки читаются и
+    отправляются клиенту пачками
+    """
+
+    media_type = (
+        "text/csv" if export_format == ExportFormat.csv else "application/x-ndjson"
+    )
+    return StreamingResponse(
+        service.export_posts(
+            export_format, with_category, category_id, created_from, created_to
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="posts.{export_format.value}"'
+        },
     )
 
 
 @router.get(
     "/{post_id}",
+    dependencies=[DETAIL_CACHE],
     response_model=PostResponse,
     summary="Получить пост по id",
 )
 async def get_post_by_id(
     post_id: Any,
+    request: Request,
     service: PostService = Depends(get_post_service),
 ):
     """Получить пост по id"""
 
+    not_modified = await revalidate_version(
+        request, lambda: service.get_post_version(post_id)
+    )
+    if not_modified:
+        return not_modified
+
     post = await service.get_post_by_id(post_id)
 
     if not post:
@@ -68,20 +184,28 @@ async def get_post_by_id(
             status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
-    return post
+    return revalidate(request, weak_etag(post.uuid, post.update_at)) or post
 
 
 @router.get(
     "/{post_id}/with-category",
+    dependencies=[DETAIL_CACHE],
     response_model=PostWithCategoryResponse,
     summary="Получить пост по id c указанием подрбностей о категории",
 )
 async def get_post_by_id_with_category(
     post_id: Any,
+    request: Request,
     service: PostService = Depends(get_post_service),
 ):
     """Получить пост по id с категорией"""
 
+    not_modified = await revalidate_version(
+        request, lambda: service.get_post_version_with_category(post_id)
+    )
+    if not_modified:
+        return not_modified
+
     post = await service.get_post_by_id_with_category(post_id)
 
     if not post:
@@ -89,17 +213,33 @@ async def get_post_by_id_with_category(
             status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
-    return post
+    category = post.category
+    etag = weak_etag(
+        post.uuid,
+        post.update_at,
+        category.uuid if category else None,
+        category.update_at if category else None,
+    )
+    return revalidate(request, etag) or post
 
 
-@router.get("/media/{media_id}", response_model=PostResponse)
+@router.get(
+    "/media/{media_id}", response_model=PostResponse, dependencies=[DETAIL_CACHE]
+)
 async def get_post_by_media_id(
     media_id: str,
+    request: Request,
     service: PostService = Depends(get_post_service),
     summary="Получить пост по media_id",
 ):
     """Получить пост по media_id"""
 
+    not_modified = await revalidate_version(
+        request, lambda: service.get_post_version_by_media_id(media_id)
+    )
+    if not_modified:
+        return not_modified
+
     post = await service.get_post_by_media_id(media_id)
 
     if not post:
@@ -107,7 +247,7 @@ async def get_post_by_media_id(
             status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
-    return post
+    return revalidate(request, weak_etag(post.uuid, post.update_at)) or post
 
 
 @router.post(
@@ -118,18 +258,14 @@ async def get_post_by_media_id(
 )
 async def create_post(
     post_data: PostCreate,
+    user_id: Optional[UUID] = Depends(get_user_id),
     service: PostService = Depends(get_post_service),
 ):
-    """Создать новый пост"""
+    """Создать новый пост; пост вошедшего пользователя попадает в ленты
+    его подписчиков"""
 
-    # Проверка на существование media_id
-    if await service.media_exists(post_data.media_id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Post with this media_id already exists",
-        )
-
-    return await service.create_post(post_data)
+    # Повтор media_id отлавливается уникальным индексом при вставке
+    return await service.create_post(post_data, owner_id=user_id)
 
 
 @router.put("/{post_id}", response_model=PostResponse, summary="обновить пост")
@@ -140,17 +276,11 @@ async def update_post(
 ):
     """Обновить пост"""
 
-    # Проверка существования поста
-    if not await service.post_exists(post_id):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
-        )
-
     updated_post = await service.update_post(post_id, update_data)
 
     if not updated_post:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="No data to update"
+            status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
     return updated_post
@@ -174,25 +304,42 @@ async def delete_post(
         )
 
 
-@router.post(
-    "/search", response_model=PostListResponse, summary="Поиск постов по desc"
-)
+@router.post("/search", response_model=PostListResponse, summary="Поиск постов по desc")
 async def search_posts_by_description(
     search_params: PostSearchParams,
     service: PostService = Depends(get_post_service),
 ):
-    """Поиск постов по описанию"""
+    """Поиск постов по описанию.
+
+    mode: substring - подстрока, fulltext - полнотекстовый запрос,
+    prefix - слова по началу. По умолчанию результаты упорядочены по
+    релевантности, курсор доступен только при order=recent
+    """
 
     posts = await service.search_posts_by_description(
-        search_params.desc_pattern, search_params.skip, search_params.limit
+        search_params.desc_pattern,
+        search_params.skip,
+        search_params.limit,
+        search_params.cursor,
+        mode=search_params.mode,
+        order=search_params.order,
+    )
+    total = await service.get_posts_total(
+        search_params.total,
+        desc_pattern=search_params.desc_pattern,
+        search_mode=search_params.mode,
     )
-    total = await service.get_posts_count()
 
-    return PostListResponse(
-        posts=posts,
-        total=total,
-        skip=search_params.skip,
-        limit=search_params.limit,
+    return _posts_page(
+        posts,
+        total,
+        search_params.skip,
+        search_params.limit,
+        (
+            next_cursor(posts, search_params.limit)
+            if search_params.order == SearchOrder.recent
+            else None
+        ),
     )
 
 
@@ -208,21 +355,36 @@ async def search_posts_by_description_with_category(
     """Поиск постов по описанию с категориями"""
 
     posts = await service.search_posts_by_description_with_category(
-        search_params.desc_pattern, search_params.skip, search_params.limit
+        search_params.desc_pattern,
+        search_params.skip,
+        search_params.limit,
+        search_params.cursor,
+        mode=search_params.mode,
+        order=search_params.order,
+    )
+    total = await service.get_posts_total(
+        search_params.total,
+        desc_pattern=search_params.desc_pattern,
+        search_mode=search_params.mode,
     )
-    total = await service.get_posts_count()
 
     return PostWithCategoryListResponse(
         posts=posts,
         total=total,
         skip=search_params.skip,
         limit=search_params.limit,
+        next_cursor=(
+            next_cursor(posts, search_params.limit)
+            if search_params.order == SearchOrder.recent
+            else None
+        ),
     )
 
 
 # Эндпоинты для работы с категориями
 @router.get(
     "/category/{category_id}",
+    dependencies=[LIST_CACHE],
     response_model=PostListResponse,
     summary="Поиск постов по id категории",
 )
@@ -230,17 +392,22 @@ async def get_posts_by_category_id(
     category_id: Any,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    total_mode: TotalMode = Query(
+        TotalMode.exact, alias="total", description="Способ подсчёта total"
+    ),
     service: PostService = Depends(get_post_service),
 ):
     """Получить посты по категории"""
-    posts = await service.get_posts_by_category_id(category_id, skip, limit)
-    total = await service.get_posts_count_by_category(category_id)
+    posts = await service.get_posts_by_category_id(category_id, skip, limit, cursor)
+    total = await service.get_posts_total(total_mode, category_id=category_id)
 
-    return PostListResponse(posts=posts, total=total, skip=skip, limit=limit)
+    return _posts_page(posts, total, skip, limit, next_cursor(posts, limit))
 
 
 @router.get(
     "/category/{category_id}/with-category",
+    dependencies=[LIST_CACHE],
     response_model=PostWithCategoryListResponse,
     summary="Поиск постов по id категории с описанием категории",
 )
@@ -248,36 +415,49 @@ async def get_posts_by_category_id_with_category(
     category_id: Any,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    total_mode: TotalMode = Query(
+        TotalMode.exact, alias="total", description="Способ подсчёта total"
+    ),
     service: PostService = Depends(get_post_service),
 ):
     """Получить посты по категории с информацией о категории"""
 
     posts = await service.get_posts_by_category_id_with_category(
-        category_id, skip, limit
+        category_id, skip, limit, cursor
     )
-    total = await service.get_posts_count_by_category(category_id)
+    total = await service.get_posts_total(total_mode, category_id=category_id)
 
     return PostWithCategoryListResponse(
-        posts=posts, total=total, skip=skip, limit=limit
+        posts=posts,
+        total=total,
+        skip=skip,
+        limit=limit,
+        next_cursor=next_cursor(posts, limit),
     )
 
 
 @router.get(
     "/without-category/",
+    dependencies=[LIST_CACHE],
     response_model=PostListResponse,
     summary="Получить посты не принадлежащие ни одной категории",
 )
 async def get_posts_without_category(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    total_mode: TotalMode = Query(
+        TotalMode.exact, alias="total", description="Способ подсчёта total"
+    ),
     service: PostService = Depends(get_post_service),
 ):
     """Получить посты без категории"""
 
-    posts = await service.get_posts_without_category(skip, limit)
-    total = await service.get_posts_count()
+    posts = await service.get_posts_without_category(skip, limit, cursor)
+    total = await service.get_posts_total(total_mode, without_category=True)
 
-    return PostListResponse(posts=posts, total=total, skip=skip, limit=limit)
+    return _posts_page(posts, total, skip, limit, next_cursor(posts, limit))
 
 
 @router.patch(
@@ -323,6 +503,7 @@ async def remove_category_from_post(
 # Эндпоинты для статистики
 @router.get(
     "/stats/count",
+    dependencies=[LIST_CACHE],
     response_model=PostsCountResponse,
     summary="счётчик постов",
 )
@@ -334,11 +515,12 @@ async def get_posts_count(service: PostService = Depends(get_post_service)):
 
 @router.get(
     "/stats/count/category/{category_id}",
+    dependencies=[LIST_CACHE],
     response_model=PostsCountByCategoryResponse,
-    summary="счётчик постов по категории"
+    summary="счётчик постов по категории",
 )
 async def get_posts_count_by_category(
-    category_id: Any, service: PostService = Depends(get_post_service)
+    category_id: UUID, service: PostService = Depends(get_post_service)
 ):
     """Получить количество постов в категории"""
 
@@ -351,23 +533,22 @@ async def get_posts_count_by_category(
     "/bulk",
     response_model=List[PostResponse],
     status_code=status.HTTP_201_CREATED,
-    summary="создать несколько постов"
+    summary="создать несколько постов",
 )
 async def create_multiple_posts(
     posts_data: List[PostCreate],
+    on_conflict: BulkConflict = Query(
+        BulkConflict.error, description="Поведение при занятом media_id"
+    ),
     service: PostService = Depends(get_post_service),
 ):
-    """Создать несколько постов"""
+    """Создать несколько постов.
 
-    # Проверка на существование media_id
-    for post_data in posts_data:
-        if await service.media_exists(post_data.media_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Post with media_id '{post_data.media_id}' already exists",
-            )
+    error - 400, если любой media_id занят; skip - занятые пропускаются
+    и не возвращаются; update - у существующих обновляются desc и category_id
+    """
 
-    return await service.create_multiple_posts(posts_data)
+    return await service.create_multiple_posts(posts_data, on_conflict)
 
 
 @router.post("/bulk/assign-category", summary="обновить категорию постов")
@@ -0,0 +1,46 @@
+from typing import Optional
+
+from src.auth.passwords import PasswordHasher
+from src.auth.revocation import RevocationCache
+from src.auth.tokens import AccessClaims, TokenCodec, TokenError
+from src.configs.app import settings
+
+
+_codec: Optional[TokenCodec] = None
+_hasher: Optional[PasswordHasher] = None
+_revocations: Optional[RevocationCache] = None
+
+
+def get_token_codec() -> TokenCodec:
+    global _codec
+    if _codec is None:
+        _codec = TokenCodec(
+            settings.auth, allow_weak_secret=settings.app.profile == "dev"
+        )
+    return _codec
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher(settings.auth.hash_workers)
+    return _hasher
+
+
+def get_revocation_cache() -> RevocationCache:
+    global _revocations
+    if _revocations is None:
+        _revocations = RevocationCache(settings.auth)
+    return _revocations
+
+
+__all__ = [
+    "AccessClaims",
+    "PasswordHasher",
+    "RevocationCache",
+    "TokenCodec",
+    "TokenError",
+    "get_password_hasher",
+    "get_revocation_cache",
+    "get_token_codec",
+]
@@ -0,0 +1,53 @@
+"""Хэширование паролей argon2 в отдельном пуле потоков.
+
+argon2 намеренно медленный (десятки миллисекунд и мегабайты памяти на
+хэш). В event loop он останавливал бы все запросы процесса, а в общем
+пуле asyncio.to_thread - конкурировал бы с чтением файлов. Свой пул из
+hash_workers потоков ограничивает и нагрузку: лишние входы ждут очереди
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from argon2 import PasswordHasher as Argon2Hasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+
+class PasswordHasher:
+    def __init__(self, workers: int):
+        self._argon2 = Argon2Hasher()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="password")
+        self._dummy_hash: Optional[str] = None
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._argon2.hash, password)
+
+    async def _verify(self, password_hash: str, password: str) -> bool:
+        try:
+            return await self._run(self._argon2.verify, password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    async def verify(self, password_hash: Optional[str], password: str) -> bool:
+        """Проверить пароль. Для несуществующего пользователя (None)
+        проверяется заглушка, чтобы ответ не выдавал по времени, есть ли
+        такой логин"""
+        if password_hash is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = await self.hash("dummy password")
+            await self._verify(self._dummy_hash, password)
+            return False
+        return await self._verify(password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Хэш посчитан со старыми параметрами argon2"""
+        return self._argon2.check_needs_rehash(password_hash)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
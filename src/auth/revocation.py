@@ -0,0 +1,94 @@
+"""Отозванные сессии в памяти процесса.
+
+Access-токен проверяется без базы, поэтому выход, смена пароля или
+повторное использование refresh-токена должны доходить до всех процессов
+иначе. Каждый процесс раз в revocation_poll_interval забирает сессии,
+отозванные с прошлого опроса (частичный индекс по revoked_at), и держит
+их uuid, пока не истекут все выданные по ним access-токены. Отзыв в
+своём процессе виден сразу, в остальных - не позже чем через интервал
+опроса
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from src.configs.app import AuthConfig
+from src.database import async_sesion_maker
+from src.repositories.auth_sessions import AuthSessionRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationCache:
+    def __init__(self, config: AuthConfig):
+        self.config = config
+        # uuid сессии -> момент (time.time()), после которого её access-
+        # токены истекли бы сами
+        self._revoked: dict[Any, float] = {}
+        # Наибольший revoked_at из уже загруженных; None до первого опроса
+        self._high_water: Optional[datetime] = None
+        self._last_prune = 0.0
+
+    @property
+    def _ttl(self) -> float:
+        return self.config.access_ttl_seconds + self.config.leeway_seconds
+
+    def is_revoked(self, session_id: Any) -> bool:
+        return session_id in self._revoked
+
+    def add(self, session_id: Any, revoked_at: Optional[datetime] = None) -> None:
+        """Запомнить отзыв; revoked_at - время UTC из auth_sessions"""
+        expires = time.time() + self._ttl
+        if revoked_at is not None:
+            expires = (revoked_at - datetime.utcnow()).total_seconds() + expires
+        self._revoked[session_id] = max(expires, self._revoked.get(session_id, 0.0))
+
+    def _prune(self) -> None:
+        now = time.time()
+        self._revoked = {
+            session_id: expires
+            for session_id, expires in self._revoked.items()
+            if expires > now
+        }
+        self._last_prune = now
+
+    async def load(self) -> int:
+        """Подтянуть сессии, отозванные с прошлого опроса; при первом вызове -
+        за время жизни access-токена"""
+        if self._high_water is None:
+            self._high_water = datetime.utcnow() - timedelta(seconds=self._ttl)
+            since = self._high_water
+        else:
+            # Перекрытие на случай транзакций, зафиксированных позже своего
+            # revoked_at: повторное добавление ничего не меняет. Считается
+            # от наибольшего revoked_at, а не от прошлой границы, иначе
+            # граница сдвигалась бы назад с каждым опросом
+            since = self._high_water - timedelta(
+                seconds=2 * self.config.revocation_poll_interval
+            )
+        async with async_sesion_maker() as session:
+            revoked = await AuthSessionRepository(session).revoked_since(since)
+        for session_id, revoked_at in revoked:
+            self.add(session_id, revoked_at)
+            self._high_water = max(self._high_water, revoked_at)
+        if time.time() - self._last_prune > self.config.revocation_poll_interval:
+            self._prune()
+        return len(revoked)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Опрашивать отзывы раз в revocation_poll_interval до stop"""
+        while not stop.is_set():
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("revocation cache refresh failed")
+            try:
+                await asyncio.wait_for(
+                    stop.wait(), self.config.revocation_poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
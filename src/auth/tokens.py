@@ -0,0 +1,100 @@
+"""Access-токены: короткоживущие JWT, проверяемые без обращения к базе.
+
+Токен несёт uuid пользователя (sub) и сессии (sid). Проверка - подпись,
+exp и iss; отозванные сессии отсекает RevocationCache
+"""
+
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import jwt
+
+from src.configs.app import AuthConfig
+
+
+# Секрет из settings.toml, которым подписывать токены в проде нельзя
+DEFAULT_SECRET = "change-me"
+# Для HS256 секрет не короче выхода хэш-функции (RFC 7518, 3.2)
+MIN_SECRET_BYTES = 32
+
+
+class TokenError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AccessClaims:
+    user_id: uuid.UUID
+    session_id: uuid.UUID
+    expires_at: int
+
+
+class TokenCodec:
+    """Выпуск и проверка access-токенов.
+
+    Ключи разбираются один раз при создании: для RS*/ES*/EdDSA разбор PEM
+    на каждый запрос стоил бы дороже самой проверки подписи. Секрет HS* по
+    умолчанию или короче MIN_SECRET_BYTES допускается только при
+    allow_weak_secret (профиль dev)
+    """
+
+    def __init__(self, config: AuthConfig, allow_weak_secret: bool = False):
+        self.config = config
+        algorithm = jwt.get_algorithm_by_name(config.algorithm)
+        if config.algorithm.startswith("HS"):
+            signing: Any = config.secret.encode()
+            if not allow_weak_secret and (
+                config.secret == DEFAULT_SECRET or len(signing) < MIN_SECRET_BYTES
+            ):
+                raise ValueError(
+                    f"{config.algorithm} requires a secret of at least "
+                    f"{MIN_SECRET_BYTES} bytes other than the default"
+                )
+            verifying: Any = signing
+        else:
+            if not config.private_key_file or not config.public_key_file:
+                raise ValueError(
+                    f"{config.algorithm} requires private_key_file and public_key_file"
+                )
+            signing = Path(config.private_key_file).read_bytes()
+            verifying = Path(config.public_key_file).read_bytes()
+        self._signing_key = algorithm.prepare_key(signing)
+        self._verifying_key = algorithm.prepare_key(verifying)
+        self._algorithms = [config.algorithm]
+
+    def issue(self, user_id: uuid.UUID, session_id: uuid.UUID) -> tuple[str, int]:
+        """Выпустить токен; возвращает его и время жизни в секундах"""
+        now = int(time.time())
+        ttl = self.config.access_ttl_seconds
+        token = jwt.encode(
+            {
+                "sub": str(user_id),
+                "sid": str(session_id),
+                "iss": self.config.issuer,
+                "iat": now,
+                "exp": now + ttl,
+            },
+            self._signing_key,
+            algorithm=self.config.algorithm,
+        )
+        return token, ttl
+
+    def decode(self, token: str) -> AccessClaims:
+        """Проверить токен. TokenError, если он поддельный или истёк"""
+        try:
+            payload = jwt.decode(
+                token,
+                self._verifying_key,
+                algorithms=self._algorithms,
+                issuer=self.config.issuer,
+                leeway=self.config.leeway_seconds,
+                options={"require": ["sub", "sid", "exp"]},
+            )
+            return AccessClaims(
+                uuid.UUID(payload["sub"]), uuid.UUID(payload["sid"]), payload["exp"]
+            )
+        except (jwt.InvalidTokenError, ValueError, TypeError) as exc:
+            raise TokenError(str(exc)) from exc
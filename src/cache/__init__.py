@@ -0,0 +1,61 @@
+import logging
+from typing import Optional
+
+from src.cache.base import CacheBackend, NullCache
+from src.cache.memory import MemoryCache
+from src.cache.redis import RedisCache
+from src.configs.app import CacheConfig, settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_cache(config: CacheConfig, workers: int = 1) -> CacheBackend:
+    if config.backend == "memory":
+        if workers > 1:
+            # Сброс ключа дошёл бы только до воркера, выполнившего запись,
+            # остальные отдавали бы старые данные до истечения TTL
+            logger.warning(
+                "memory cache is per-process and %d workers are configured; "
+                'caching is disabled, use backend = "redis"',
+                workers,
+            )
+            return NullCache()
+        return MemoryCache(
+            max_entries=config.max_entries,
+            ttl=config.ttl_seconds,
+            invalidation_ttl=config.invalidation_seconds,
+        )
+
+    if config.backend == "redis":
+        # redis - необязательная зависимость, нужна только этому бэкенду
+        from redis.asyncio import Redis
+
+        return RedisCache(
+            Redis.from_url(config.redis_url),
+            ttl=config.ttl_seconds,
+            key_prefix=config.key_prefix,
+            invalidation_ttl=config.invalidation_seconds,
+        )
+
+    return NullCache()
+
+
+_cache: Optional[CacheBackend] = None
+
+
+def get_cache() -> CacheBackend:
+    global _cache
+    if _cache is None:
+        _cache = build_cache(settings.cache, settings.app.worker_count)
+    return _cache
+
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCache",
+    "NullCache",
+    "RedisCache",
+    "build_cache",
+    "get_cache",
+]
@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class CacheBackend(ABC):
+    """Хранилище строковых значений с TTL.
+
+    Читатель кэша загружает строку из базы и кладёт её через add, а
+    изменяющий код после commit вызывает delete. Если чтение из базы
+    началось до commit, а add выполняется после delete, в кэш попала бы
+    старая строка до истечения TTL. Поэтому delete оставляет на месте
+    ключа метку на invalidation_ttl секунд, и add, пока она есть, ничего
+    не записывает.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None: ...
+
+    @abstractmethod
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Записать значение, если ключа нет и он не сброшен недавно"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None: ...
+
+
+class NullCache(CacheBackend):
+    """Кэш, который ничего не хранит"""
+
+    async def get(self, key: str) -> Optional[str]:
+        return None
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        pass
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return False
+
+    async def delete(self, *keys: str) -> None:
+        pass
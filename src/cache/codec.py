@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+from typing import Any, Optional, TypeVar, overload
+from uuid import UUID
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import class_mapper
+
+
+T = TypeVar("T")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def entity_to_dict(entity: Any) -> Optional[dict[str, Any]]:
+    """Значения загружаемых столбцов ORM-объекта (deferred пропускаются)"""
+    if entity is None:
+        return None
+
+    mapper = inspect(type(entity))
+    return {
+        attr.key: getattr(entity, attr.key)
+        for attr in mapper.column_attrs
+        if not attr.deferred
+    }
+
+
+@overload
+def entity_from_dict(model: type[T], data: None) -> None: ...
+
+
+@overload
+def entity_from_dict(model: type[T], data: dict[str, Any]) -> T: ...
+
+
+def entity_from_dict(model: type[T], data: Optional[dict[str, Any]]) -> Optional[T]:
+    """Собрать transient-объект модели из entity_to_dict после JSON"""
+    if data is None:
+        return None
+
+    values = {}
+    for attr in class_mapper(model).column_attrs:
+        if attr.key not in data:
+            continue
+
+        value = data[attr.key]
+        if value is not None:
+            python_type = attr.columns[0].type.python_type
+            if python_type is UUID:
+                value = UUID(value)
+            elif python_type is datetime:
+                value = datetime.fromisoformat(value)
+        values[attr.key] = value
+
+    return model(**values)
+
+
+def dumps(data: Any) -> str:
+    return json.dumps(data, default=_default, separators=(",", ":"))
+
+
+def loads(raw: str) -> Any:
+    return json.loads(raw)
@@ -0,0 +1,35 @@
+from typing import Any, Optional
+from uuid import UUID
+
+
+POSTS_PREFIX = "post:"
+
+
+def _normalize(value: Any) -> Optional[str]:
+    try:
+        return str(value if isinstance(value, UUID) else UUID(str(value)))
+    except ValueError:
+        return None
+
+
+def _key(template: str, value: Any) -> Optional[str]:
+    normalized = _normalize(value)
+    return None if normalized is None else template.format(normalized)
+
+
+def post_key(post_id: Any) -> Optional[str]:
+    return _key(POSTS_PREFIX + "{}", post_id)
+
+
+def post_media_key(media_id: Any) -> Optional[str]:
+    return _key(POSTS_PREFIX + "media:{}", media_id)
+
+
+def category_key(category_id: Any) -> Optional[str]:
+    return _key("category:{}", category_id)
+
+
+def post_keys(post_id: Any, media_id: Any) -> list[str]:
+    """Все ключи, под которыми может лежать пост"""
+    keys = [post_key(post_id), post_media_key(media_id)]
+    return [key for key in keys if key is not None]
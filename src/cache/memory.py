@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.cache.base import CacheBackend
+
+
+class MemoryCache(CacheBackend):
+    """TTL + LRU кэш в памяти процесса.
+
+    У каждого воркера uvicorn свой экземпляр, и инвалидация не видна другим
+    воркерам, поэтому build_cache не выбирает его при нескольких воркерах.
+    Сброшенный ключ хранится как значение None до истечения
+    invalidation_ttl.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 60.0,
+        invalidation_ttl: float = 5.0,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.invalidation_ttl = invalidation_ttl
+        self._data: OrderedDict[str, tuple[float, Optional[str]]] = OrderedDict()
+
+    def _entry(self, key: str) -> Optional[tuple[float, Optional[str]]]:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def _store(self, key: str, value: Optional[str], ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entry(key)
+        if entry is None or entry[1] is None:
+            return None
+
+        self._data.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._store(key, value, self.ttl if ttl is None else ttl)
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        if self._entry(key) is not None:
+            return False
+
+        self._store(key, value, self.ttl if ttl is None else ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._store(key, None, self.invalidation_ttl)
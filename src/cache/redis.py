@@ -0,0 +1,59 @@
+from typing import Any, Optional
+
+from src.cache.base import CacheBackend
+
+
+# Значение сброшенного ключа; get отдаёт вместо него None
+TOMBSTONE = "\x00invalidated"
+
+# Ключей в одном конвейере delete
+DELETE_BATCH_SIZE = 500
+
+
+class RedisCache(CacheBackend):
+    """Кэш поверх асинхронного клиента с API redis.asyncio.Redis.
+
+    Клиент передаётся снаружи, поэтому вместо настоящего Redis можно
+    подставить совместимую реализацию, например fakeredis.aioredis.
+
+    delete записывает на место ключа метку TOMBSTONE с TTL invalidation_ttl,
+    а add пишет через SET NX и потому метку не перезапишет.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        ttl: float = 60.0,
+        key_prefix: str = "",
+        invalidation_ttl: float = 5.0,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self.invalidation_ttl = invalidation_ttl
+
+    @property
+    def _invalidation_ms(self) -> int:
+        return int(self.invalidation_ttl * 1000)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.key_prefix + key)
+        if isinstance(value, bytes):
+            value = value.decode()
+        return None if value == TOMBSTONE else value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl_ms = int((self.ttl if ttl is None else ttl) * 1000)
+        await self.client.set(self.key_prefix + key, value, px=ttl_ms)
+
+    async def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        ttl_ms = int((self.ttl if ttl is None else ttl) * 1000)
+        stored = await self.client.set(self.key_prefix + key, value, px=ttl_ms, nx=True)
+        return bool(stored)
+
+    async def delete(self, *keys: str) -> None:
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            pipeline = self.client.pipeline(transaction=False)
+            for key in keys[start : start + DELETE_BATCH_SIZE]:
+                pipeline.set(self.key_prefix + key, TOMBSTONE, px=self._invalidation_ms)
+            await pipeline.execute()
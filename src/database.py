@@ -1,12 +1,42 @@
-from typing import AsyncGenerator
+import asyncio
+from typing import AsyncGenerator, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from configs import settings
+from src.configs import settings
+from src.instrumentation.metrics import REGISTRY
+from src.instrumentation.pool import InstrumentedAsyncPool
+from src.instrumentation.request_metrics import install_db_metrics, install_pool_metrics
+from src.instrumentation.shared_metrics import build_shared_metrics, metrics_enabled
+from src.instrumentation.sql_logging import install_query_logging
 
 
-engine = create_async_engine(settings.db.dsl, echo=True)
+engine = create_async_engine(
+    settings.db.dsl,
+    echo=settings.sql_log.echo,
+    poolclass=InstrumentedAsyncPool,
+    pool_size=settings.db.pool_size,
+    max_overflow=settings.db.max_overflow,
+    pool_timeout=settings.db.pool_timeout,
+    pool_recycle=settings.db.pool_recycle,
+    pool_pre_ping=settings.db.pool_pre_ping,
+    # 0 отключает кэши подготовленных запросов (нужно за pgbouncer)
+    connect_args={
+        "statement_cache_size": settings.db.statement_cache_size,
+        "prepared_statement_cache_size": settings.db.statement_cache_size,
+    },
+)
+install_query_logging(engine, settings.sql_log)
+
+metrics_on = metrics_enabled(settings.metrics, settings.app.worker_count)
+# При нескольких воркерах /metrics складывает их снимки
+shared_metrics = build_shared_metrics(
+    settings.metrics, REGISTRY, settings.app.worker_count
+)
+if metrics_on:
+    install_db_metrics(engine)
+    install_pool_metrics(engine.pool)
 
 async_sesion_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -17,3 +47,19 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+async def warm_up_pool(connections: Optional[int] = None) -> None:
+    """Открыть соединения пула заранее, чтобы первые запросы их не ждали"""
+    # Сверх pool_size соединения закрылись бы сразу после возврата в пул
+    connections = min(
+        settings.db.pool_size if connections is None else connections,
+        settings.db.pool_size,
+    )
+
+    async def checkout() -> None:
+        async with engine.connect() as connection:
+            await connection.exec_driver_sql("SELECT 1")
+
+    # Соединения удерживаются одновременно, иначе пул отдавал бы одно и то же
+    await asyncio.gather(*(checkout() for _ in range(connections)))
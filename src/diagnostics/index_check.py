@@ -0,0 +1,188 @@
+"""Проверка планов горячих запросов репозиториев.
+
+Каждый запрос выполняется через настоящий репозиторий внутри транзакции,
+которая затем откатывается; перехваченный SQL прогоняется через
+EXPLAIN (FORMAT JSON). Seq Scan по таблице, в которой больше
+settings.diagnostics.seq_scan_max_rows строк, считается ошибкой.
+
+    python -m src.diagnostics.index_check
+"""
+
+import asyncio
+import json
+import sys
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from src.configs.app import settings
+from src.repositories.category import CategoryRepository
+from src.repositories.pagination import Cursor
+from src.repositories.posts import PostRepository
+from src.schemas.search_schema import SearchMode
+
+
+Probe = Callable[[PostRepository, CategoryRepository], Awaitable[Any]]
+
+_ID = uuid.uuid4()
+_CURSOR = Cursor(datetime(2000, 1, 1), _ID)
+
+HOT_QUERIES: dict[str, Probe] = {
+    "posts.get_by_id": lambda posts, _: posts.get_by_id(_ID),
+    "posts.get_by_id_with_category": lambda posts, _: (
+        posts.get_by_id_with_category(_ID)
+    ),
+    "posts.get_by_media_id": lambda posts, _: posts.get_by_media_id(_ID),
+    "posts.exists_by_id": lambda posts, _: posts.exists_by_id(_ID),
+    "posts.exists_by_media_id": lambda posts, _: posts.exists_by_media_id(_ID),
+    "posts.get_all": lambda posts, _: posts.get_all(limit=100),
+    "posts.get_all[cursor]": lambda posts, _: posts.get_all(limit=100, cursor=_CURSOR),
+    "posts.get_by_category_id": lambda posts, _: posts.get_by_category_id(
+        _ID, limit=100
+    ),
+    "posts.get_by_category_id[cursor]": lambda posts, _: posts.get_by_category_id(
+        _ID, limit=100, cursor=_CURSOR
+    ),
+    "posts.get_posts_without_category": lambda posts, _: (
+        posts.get_posts_without_category(limit=100)
+    ),
+    "posts.search_by_description[substring]": lambda posts, _: (
+        posts.search_by_description("sample", limit=100)
+    ),
+    "posts.search_by_description[fulltext]": lambda posts, _: (
+        posts.search_by_description("sample", limit=100, mode=SearchMode.fulltext)
+    ),
+    "posts.search_by_description[prefix]": lambda posts, _: (
+        posts.search_by_description("sam", limit=100, mode=SearchMode.prefix)
+    ),
+    "posts.get_count": lambda posts, _: posts.get_count(),
+    "posts.get_count_by_category": lambda posts, _: posts.get_count_by_category(_ID),
+    "category.get_by_id": lambda _, categories: categories.get_by_id(_ID),
+    "category.get_by_name": lambda _, categories: categories.get_by_name("sample"),
+    "category.get_all": lambda _, categories: categories.get_all(limit=100),
+    "category.search_by_name": lambda _, categories: categories.search_by_name(
+        "sample"
+    ),
+}
+
+
+class IndexCheckError(RuntimeError):
+    pass
+
+
+@dataclass
+class QueryPlan:
+    name: str
+    statement: str
+    seq_scans: list[tuple[str, int]] = field(default_factory=list)
+
+
+def _seq_scans(node: dict) -> list[str]:
+    found = []
+    if node.get("Node Type") == "Seq Scan":
+        found.append(node["Relation Name"])
+    for child in node.get("Plans", ()):
+        found.extend(_seq_scans(child))
+    return found
+
+
+async def _capture(connection: AsyncConnection, probe: Probe) -> list[tuple]:
+    statements: list[tuple] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append((statement, parameters))
+
+    event.listen(
+        connection.sync_connection, "before_cursor_execute", before_cursor_execute
+    )
+    session = AsyncSession(bind=connection)
+    try:
+        await probe(PostRepository(session), CategoryRepository(session))
+    finally:
+        await session.close()
+        await connection.rollback()
+        event.remove(
+            connection.sync_connection, "before_cursor_execute", before_cursor_execute
+        )
+
+    return statements
+
+
+async def _table_rows(connection: AsyncConnection) -> dict[str, int]:
+    result = await connection.execute(
+        text(
+            "SELECT relname, reltuples::bigint FROM pg_class "
+            "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        )
+    )
+    return {name: rows for name, rows in result}
+
+
+async def explain_hot_queries(engine: AsyncEngine) -> list[QueryPlan]:
+    """Построить планы горячих запросов и найти в них Seq Scan"""
+    plans = []
+
+    async with engine.connect() as connection:
+        table_rows = await _table_rows(connection)
+        await connection.rollback()
+
+        for name, probe in HOT_QUERIES.items():
+            for statement, parameters in await _capture(connection, probe):
+                result = await connection.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                explained: Any = result.scalar()
+                await connection.rollback()
+                if isinstance(explained, str):
+                    explained = json.loads(explained)
+
+                plan = QueryPlan(name, statement)
+                for relation in _seq_scans(explained[0]["Plan"]):
+                    plan.seq_scans.append((relation, table_rows.get(relation, 0)))
+                plans.append(plan)
+
+    return plans
+
+
+async def check_indexes(engine: AsyncEngine, max_rows: int | None = None) -> None:
+    """Упасть, если горячий запрос читает большую таблицу целиком"""
+    if max_rows is None:
+        max_rows = settings.diagnostics.seq_scan_max_rows
+
+    violations = [
+        f"{plan.name}: Seq Scan on {relation} (~{rows} rows)\n    {plan.statement}"
+        for plan in await explain_hot_queries(engine)
+        for relation, rows in plan.seq_scans
+        if rows > max_rows
+    ]
+
+    if violations:
+        raise IndexCheckError(
+            "Hot queries plan as Seq Scan on large tables:\n" + "\n".join(violations)
+        )
+
+
+async def main() -> int:
+    from src.database import engine
+
+    plans = await explain_hot_queries(engine)
+    await engine.dispose()
+
+    max_rows = settings.diagnostics.seq_scan_max_rows
+    failed = False
+    for plan in plans:
+        bad = [(rel, rows) for rel, rows in plan.seq_scans if rows > max_rows]
+        failed = failed or bool(bad)
+        status = "FAIL" if bad else "ok"
+        details = ", ".join(f"Seq Scan on {rel} (~{rows} rows)" for rel, rows in bad)
+        print(f"[{status}] {plan.name} {details}".rstrip())
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,278 @@
+"""Метрики в текстовом формате Prometheus без сторонних библиотек.
+
+Значения хранятся в памяти процесса и обновляются только из потока event
+loop (middleware, события SQLAlchemy, выдача соединения из пула), поэтому
+обходятся без блокировок. При нескольких воркерах uvicorn значения
+складываются через снимки в общем каталоге (shared_metrics).
+
+Набор меток должен быть конечным: шаблон маршрута, метод, код ответа, но
+не путь запроса и не идентификаторы.
+"""
+
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+
+# Секунды: от быстрых ответов из кэша до упора в pool_timeout
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        # _Value или _HistogramValue, в зависимости от типа метрики
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str):
+        """Значение для набора меток; создаётся при первом обращении"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def clone(self) -> "_Metric":
+        """Такая же метрика без значений"""
+        return type(self)(self.name, self.documentation, self.label_names)
+
+    def dump(self) -> list:
+        """Значения для JSON: [[значения меток, состояние], ...]"""
+        raise NotImplementedError
+
+    def load(self, items: list) -> None:
+        """Прибавить значения из dump()"""
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dump(self) -> list:
+        return [[list(values), child.value] for values, child in self._children.items()]
+
+    def load(self, items: list) -> None:
+        for values, value in items:
+            self.labels(*values).inc(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_total{labels} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _samples(self) -> Iterator[str]:
+        for values, child in self._children.items():
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        # Последняя ячейка - +Inf; счётчики не накопительные, сумма
+        # по корзинам считается при выводе
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def clone(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, self.label_names, self.buckets)
+
+    def dump(self) -> list:
+        return [
+            [list(values), [child.counts, child.sum]]
+            for values, child in self._children.items()
+        ]
+
+    def load(self, items: list) -> None:
+        for values, (counts, total) in items:
+            child = self.labels(*values)
+            # Снимок воркера с другими корзинами не складывается
+            if len(counts) != len(child.counts):
+                continue
+            child.counts = [a + b for a, b in zip(child.counts, counts)]
+            child.sum += total
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[str]:
+        names = (*self.label_names, "le")
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), child.counts):
+                cumulative += count
+                labels = _format_labels(names, (*values, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        """Вызывать collector перед каждым render, например чтобы снять
+        состояние пула в gauge"""
+        self._collectors.append(collector)
+
+    def _collect(self) -> None:
+        for collector in self._collectors:
+            collector()
+
+    def snapshot(self) -> dict[str, list]:
+        """Текущие значения всех метрик для JSON"""
+        self._collect()
+        return {name: metric.dump() for name, metric in self._metrics.items()}
+
+    def cumulative(self, snapshot: dict[str, list]) -> dict[str, list]:
+        """Из снимка только известные счётчики и гистограммы: их значения
+        копятся, а gauge остановленного воркера уже ничего не значит"""
+        return {
+            name: items
+            for name, items in snapshot.items()
+            if name in self._metrics and self._metrics[name].kind != "gauge"
+        }
+
+    def merged(self, snapshots: Iterable[dict[str, list]]) -> "Registry":
+        """Новый реестр с теми же метриками и суммой значений снимков"""
+        registry = Registry()
+        for metric in self._metrics.values():
+            registry.register(metric.clone())
+        for snapshot in snapshots:
+            for name, items in snapshot.items():
+                if name in registry._metrics:
+                    registry._metrics[name].load(items)
+        return registry
+
+    def render(self) -> str:
+        self._collect()
+        lines = [line for metric in self._metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,318 @@
+"""Сэмплирующий профайлер на стандартной библиотеке.
+
+Отдельный поток раз в interval секунд снимает стеки через
+sys._current_frames и считает одинаковые стеки. Процесс при этом не
+останавливается и не трассируется, так что цена - один обход стека за
+такт, а не каждый вызов функции.
+
+Два режима:
+
+    profile_process   все такты за время окна: поток event loop (или все
+                      потоки) целиком, в том числе простой в select
+    RequestProfiler   такты одного запроса: стек, если запрос сейчас
+                      выполняется, иначе цепочка await его задачи до
+                      места ожидания - сервис, репозиторий, SQLAlchemy и
+                      драйвер
+
+SQLAlchemy выполняет синхронную часть в greenlet, а у такого стека нет
+f_back к вызвавшей корутине. Стек склеивается через кадр основного
+greenlet потока event loop, который приостановлен, пока работает
+дочерний.
+
+Результат - Profile: свёрнутые стеки (flamegraph.pl, speedscope) или
+JSON в формате speedscope.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from types import CodeType, FrameType
+from typing import Any, Callable, Iterator, Optional, Union
+
+import greenlet  # type: ignore[import-untyped]
+from sqlalchemy.util.concurrency import greenlet_spawn
+
+
+# Элемент стека: код функции или метка вроде "[await Future]"
+StackEntry = Union[CodeType, str]
+
+_GREENLET_SPAWN_CODE = greenlet_spawn.__code__
+
+# Длинные пути к site-packages и проекту сокращаются до пути модуля
+_PATH_PREFIXES = sorted(
+    {os.path.join(path, "") for path in sys.path if path and os.path.isdir(path)},
+    key=len,
+    reverse=True,
+)
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix) :]
+    return filename
+
+
+def _describe(entry: StackEntry) -> tuple[str, str, int]:
+    """Имя, файл и строка начала функции"""
+    if isinstance(entry, str):
+        return entry, "", 0
+    return entry.co_qualname, _short_path(entry.co_filename), entry.co_firstlineno
+
+
+@dataclass
+class Profile:
+    name: str
+    interval: float
+    started_at: float = field(default_factory=time.time)
+    duration: float = 0.0
+    samples: int = 0
+    # Стек -> секунды
+    stacks: defaultdict[tuple[StackEntry, ...], float] = field(
+        default_factory=lambda: defaultdict(float)
+    )
+
+    def add(self, stack: tuple[StackEntry, ...], seconds: float) -> None:
+        self.stacks[stack] += seconds
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Строка на стек: кадры от корня через ';' и время в микросекундах"""
+        names: dict[StackEntry, str] = {}
+
+        def name(entry: StackEntry) -> str:
+            if entry not in names:
+                qualname, filename, line = _describe(entry)
+                label = f"{qualname} ({filename}:{line})" if filename else qualname
+                # ';' и пробел - разделители формата
+                names[entry] = label.replace(";", ":").replace(" ", "_")
+            return names[entry]
+
+        lines = [
+            f"{';'.join(name(entry) for entry in stack)} {round(seconds * 1e6)}"
+            for stack, seconds in sorted(
+                self.stacks.items(), key=lambda item: item[1], reverse=True
+            )
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict[str, Any]:
+        """Профиль типа sampled с весами в секундах"""
+        index: dict[StackEntry, int] = {}
+        frames: list[dict[str, Any]] = []
+        samples: list[list[int]] = []
+        weights: list[float] = []
+
+        for stack, seconds in self.stacks.items():
+            sample = []
+            for entry in stack:
+                if entry not in index:
+                    qualname, filename, line = _describe(entry)
+                    frame: dict[str, Any] = {"name": qualname}
+                    if filename:
+                        frame.update(file=filename, line=line)
+                    index[entry] = len(frames)
+                    frames.append(frame)
+                sample.append(index[entry])
+            samples.append(sample)
+            weights.append(seconds)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "exporter": "media-cloud sampling profiler",
+            "name": self.name,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": self.name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+class _Sampler:
+    """Поток, вызывающий sample раз в interval секунд до stop().
+
+    Пока поток event loop занят вычислениями, сэмплер получает GIL не чаще
+    sys.getswitchinterval() (5 мс), а не каждые interval. Поэтому вес такта -
+    фактическое время с предыдущего такта: иначе вычисления выглядели бы
+    дешевле ожидания
+    """
+
+    def __init__(self, interval: float, sample: Callable[[float], None]):
+        self.interval = interval
+        self._sample = sample
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profiler-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Остановить поток и дождаться его вне event loop: текущий такт
+        может ждать GIL до sys.getswitchinterval()"""
+        self._stop.set()
+        await asyncio.to_thread(self._thread.join)
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            try:
+                self._sample(elapsed)
+            except Exception:
+                # Стек изменился во время обхода; такт пропускается
+                continue
+
+
+def _loop_frames(
+    frame: Optional[FrameType], main: greenlet.greenlet
+) -> Iterator[FrameType]:
+    """Кадры потока event loop от листа к корню, через границу greenlet"""
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # У основного greenlet кадр есть только пока он приостановлен, то есть
+    # пока выполняется дочерний greenlet SQLAlchemy
+    frame = main.gr_frame
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def _await_chain(awaitable: Any) -> list[StackEntry]:
+    """Цепочка await приостановленной задачи от корня к месту ожидания"""
+    chain: list[StackEntry] = []
+    while awaitable is not None:
+        if isinstance(awaitable, asyncio.Task):
+            awaitable = awaitable.get_coro()
+            continue
+        frame = getattr(awaitable, "cr_frame", None) or getattr(
+            awaitable, "gi_frame", None
+        )
+        if frame is None:
+            chain.append(f"[await {type(awaitable).__name__}]")
+            break
+        chain.append(frame.f_code)
+
+        if frame.f_code is _GREENLET_SPAWN_CODE:
+            # Синхронная часть SQLAlchemy, ждущая ответа драйвера
+            child = frame.f_locals.get("context")
+            inner = []
+            child_frame = getattr(child, "gr_frame", None)
+            while child_frame is not None:
+                inner.append(child_frame.f_code)
+                child_frame = child_frame.f_back
+            chain.extend(reversed(inner))
+
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(
+            awaitable, "gi_yieldfrom", None
+        )
+    else:
+        chain.append("[scheduled]")
+    return chain
+
+
+async def profile_process(
+    seconds: float, interval: float, all_threads: bool = False
+) -> Profile:
+    """Профиль процесса за seconds секунд.
+
+    Без all_threads снимается только поток event loop, где выполняются
+    обработчики запросов; с ним - ещё пул потоков синхронных эндпоинтов,
+    argon2 и т.п., каждый поток под своим корнем
+    """
+    loop_thread = threading.get_ident()
+    main = greenlet.getcurrent()
+    profile = Profile(name=f"process {os.getpid()}", interval=interval)
+
+    def sample(elapsed: float) -> None:
+        frames = sys._current_frames()
+        # Сам поток профайлера в профиль не попадает
+        frames.pop(threading.get_ident(), None)
+        if all_threads:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in frames.items():
+            if ident == loop_thread:
+                stack = [f.f_code for f in _loop_frames(frame, main)]
+            elif all_threads:
+                stack = []
+                current: Optional[FrameType] = frame
+                while current is not None:
+                    stack.append(current.f_code)
+                    current = current.f_back
+            else:
+                continue
+            root = f"thread {names.get(ident, ident)}" if all_threads else None
+            stack.reverse()
+            profile.add(tuple([root, *stack]) if root else tuple(stack), elapsed)
+
+    sampler = _Sampler(interval, sample)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await sampler.stop()
+        profile.duration = time.perf_counter() - started
+    return profile
+
+
+class RequestProfiler:
+    """Такты одного запроса.
+
+    anchor - кадр корутины, внутри которой обрабатывается запрос
+    (middleware); стеки обрезаются по нему. Такт, на котором запрос не
+    выполняется, записывается как цепочка await его задачи. Профиль
+    готов после stop(); повторный stop() ничего не делает
+    """
+
+    def __init__(self, name: str, interval: float, anchor: FrameType):
+        self.profile = Profile(name=name, interval=interval)
+        self._anchor = anchor
+        self._task = asyncio.current_task()
+        self._loop_thread = threading.get_ident()
+        self._main = greenlet.getcurrent()
+        self._sampler = _Sampler(interval, self._sample)
+        self._started = 0.0
+        self._stopped = False
+
+    def _sample(self, elapsed: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        stack: list[StackEntry] = []
+        for current in _loop_frames(frame, self._main):
+            stack.append(current.f_code)
+            if current is self._anchor:
+                stack.reverse()
+                self.profile.add(tuple(stack), elapsed)
+                return
+
+        chain = _await_chain(self._task)
+        anchor_code = self._anchor.f_code
+        if anchor_code in chain:
+            chain = chain[chain.index(anchor_code) :]
+        self.profile.add(tuple(chain), elapsed)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    async def stop(self) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        self.profile.duration = time.perf_counter() - self._started
+        await self._sampler.stop()
@@ -0,0 +1,149 @@
+"""Метрики запросов: задержка по шаблону маршрута, запросы в обработке,
+число SQL-операторов и время в базе на запрос, ожидание пула.
+
+MetricsMiddleware кладёт в contextvar счётчики текущего запроса, события
+движка (install_db_metrics) дописывают в них операторы и время. Сессия
+выполняет SQL в greenlet, который наследует контекст вызывающей задачи,
+так что операторы попадают в свой запрос и при конкурентных запросах.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.instrumentation.metrics import REGISTRY
+
+
+# Запросы, не попавшие ни в один маршрут (404 сканеров и т.п.), сводятся
+# в одно значение, иначе путь запроса раздувал бы число рядов
+UNMATCHED_ROUTE = "unmatched"
+
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Запросы в обработке")
+REQUEST_DB_STATEMENTS = REGISTRY.histogram(
+    "http_request_db_statements",
+    "Число SQL-операторов за запрос",
+    ("method", "route"),
+    buckets=STATEMENT_BUCKETS,
+)
+REQUEST_DB_SECONDS = REGISTRY.histogram(
+    "http_request_db_seconds",
+    "Время выполнения SQL-операторов за запрос",
+    ("method", "route"),
+)
+POOL_WAIT = REGISTRY.histogram(
+    "db_pool_wait_seconds", "Время получения соединения из пула"
+)
+POOL_TIMEOUTS = REGISTRY.counter(
+    "db_pool_timeouts", "Соединение не получено за pool_timeout"
+)
+POOL_CONNECTIONS = REGISTRY.gauge(
+    "db_pool_connections", "Соединения пула по состоянию", ("state",)
+)
+
+
+class RequestStats:
+    """SQL текущего запроса"""
+
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def observe_pool_wait(seconds: float, timed_out: bool = False) -> None:
+    if timed_out:
+        POOL_TIMEOUTS.inc()
+    else:
+        POOL_WAIT.observe(seconds)
+
+
+def install_db_metrics(engine: AsyncEngine) -> None:
+    """Считать операторы и время в базе для запроса, в котором они
+    выполняются. Вне запроса (фоновые задачи) операторы не учитываются"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if context is not None and _current.get() is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        stats = _current.get()
+        started = getattr(context, "_metrics_started", None)
+        if stats is None or started is None:
+            return
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def install_pool_metrics(pool: Any) -> None:
+    """Снимать состояние пула InstrumentedAsyncPool в момент выдачи метрик"""
+
+    def collect() -> None:
+        stats = pool.stats()
+        POOL_CONNECTIONS.labels("checked_in").set(stats["checked_in"])
+        POOL_CONNECTIONS.labels("checked_out").set(stats["checked_out"])
+        POOL_CONNECTIONS.labels("overflow").set(stats["overflow"])
+
+    REGISTRY.on_collect(collect)
+
+
+class MetricsMiddleware:
+    """Замеряет HTTP-запросы и SQL, выполненный при их обработке.
+
+    Метка route - шаблон маршрута (/api/v1/posts/{post_id}), который
+    роутер записывает в scope после сопоставления
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            _current.reset(token)
+
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            REQUEST_DURATION.labels(method, route, str(status_code)).observe(elapsed)
+            REQUEST_DB_STATEMENTS.labels(method, route).observe(stats.statements)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.db_seconds)
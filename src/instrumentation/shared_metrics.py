@@ -0,0 +1,207 @@
+"""Метрики нескольких воркеров uvicorn.
+
+REGISTRY у каждого воркера свой, а запрос /metrics попадает в случайный
+воркер, так что без сложения значения скакали бы от опроса к опросу.
+Каждый воркер раз в interval секунд записывает снимок своих значений в
+общий каталог ({pid}.json), а /metrics складывает снимки всех воркеров:
+счётчики и гистограммы, а также gauge - запросы в обработке и соединения
+пулов всех воркеров вместе.
+
+Счётчики остановленного воркера не пропадают, как и в multiprocess-режиме
+prometheus_client: его последний снимок прибавляется к accumulated.json,
+а gauge отбрасываются. Воркер делает это со своим снимком при остановке;
+снимок, не обновлявшийся дольше STALE_INTERVALS интервалов, если процесса
+с таким pid уже нет, переносит любой воркер при чтении. Перенос и чтение
+каталога идут под блокировкой файла: сумма не видит снимок ни дважды, ни
+ни разу.
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.configs.app import MetricsConfig
+from src.instrumentation.metrics import Registry
+
+
+logger = logging.getLogger(__name__)
+
+STALE_INTERVALS = 3
+
+ACCUMULATED = "accumulated.json"
+
+
+def _alive(path: Path) -> bool:
+    """Жив ли процесс, чей pid в имени снимка"""
+    try:
+        pid = int(path.stem)
+    except ValueError:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но чужой
+        return True
+    return True
+
+
+class SharedMetrics:
+    def __init__(self, registry: Registry, directory: str, interval: float = 5.0):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval = interval
+        self._path = self.directory / f"{os.getpid()}.json"
+        self._accumulated = self.directory / ACCUMULATED
+        # write из /metrics (пул потоков) не должен вернуть снимок,
+        # уже перенесённый close
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
+        """flock на каталог: LOCK_EX для переноса, LOCK_SH для чтения"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / f"{ACCUMULATED}.lock", "a") as lock:
+            fcntl.flock(lock, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _replace(self, path: Path, data: dict) -> None:
+        # Пишут и фоновая задача, и /metrics из пула потоков
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data))
+        # Читатель видит либо прежний файл, либо новый целиком
+        os.replace(tmp, path)
+
+    def write(self) -> None:
+        """Записать снимок этого воркера"""
+        with self._write_lock:
+            if self._closed:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._replace(self._path, self.registry.snapshot())
+
+    def _read(self, path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            # Файл удалён или заменён между stat и чтением
+            return None
+
+    def _fold(self, path: Path) -> None:
+        """Прибавить счётчики и гистограммы снимка к accumulated.json и
+        удалить снимок. Вызывается под LOCK_EX"""
+        snapshot = self._read(path)
+        if snapshot is None:
+            return
+        accumulated = self._read(self._accumulated) or {}
+        merged = self.registry.merged([accumulated, self.registry.cumulative(snapshot)])
+        self._replace(self._accumulated, self.registry.cumulative(merged.snapshot()))
+        path.unlink(missing_ok=True)
+
+    def _stale(self) -> list[Path]:
+        oldest = time.time() - STALE_INTERVALS * self.interval
+        stale = []
+        for path in self.directory.glob("*.json"):
+            if path == self._accumulated:
+                continue
+            try:
+                if path.stat().st_mtime < oldest and not _alive(path):
+                    stale.append(path)
+            except OSError:
+                continue
+        return stale
+
+    def _fold_stale(self) -> None:
+        if not self._stale():
+            return
+        with self._locked(fcntl.LOCK_EX):
+            # Под блокировкой заново: другой воркер мог уже перенести
+            for path in self._stale():
+                self._fold(path)
+
+    def _snapshots(self) -> list[dict]:
+        """Снимки живых воркеров и accumulated.json"""
+        self._fold_stale()
+        oldest = time.time() - STALE_INTERVALS * self.interval
+        snapshots = []
+        with self._locked(fcntl.LOCK_SH):
+            for path in self.directory.glob("*.json"):
+                try:
+                    # Снимок зависшего, но живого воркера пропускается,
+                    # пока тот снова его не обновит
+                    if path != self._accumulated and path.stat().st_mtime < oldest:
+                        continue
+                except OSError:
+                    continue
+                snapshot = self._read(path)
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        return snapshots
+
+    def render(self) -> str:
+        """Сумма значений живых воркеров и накопленных счётчиков
+        остановленных в формате Prometheus"""
+        self.write()
+        return self.registry.merged(self._snapshots()).render()
+
+    def close(self) -> None:
+        """Перенести последний снимок этого воркера в accumulated.json"""
+        with self._write_lock:
+            self._closed = True
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._replace(self._path, self.registry.snapshot())
+            with self._locked(fcntl.LOCK_EX):
+                self._fold(self._path)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Записывать снимок раз в interval до stop, затем перенести его
+        в accumulated.json"""
+        while not stop.is_set():
+            try:
+                self.write()
+            except OSError:
+                logger.exception("metrics snapshot write failed")
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+        try:
+            self.close()
+        except OSError:
+            logger.exception("metrics snapshot fold failed")
+
+
+def metrics_enabled(config: MetricsConfig, workers: int = 1) -> bool:
+    if not config.enabled:
+        return False
+    if workers > 1 and not config.multiprocess_dir:
+        logger.warning(
+            "metrics are per-process and %d workers are configured; "
+            "metrics are disabled, set multiprocess_dir",
+            workers,
+        )
+        return False
+    return True
+
+
+def build_shared_metrics(
+    config: MetricsConfig, registry: Registry, workers: int = 1
+) -> Optional[SharedMetrics]:
+    """SharedMetrics, если воркеров несколько; с одним реестр отдаётся как есть"""
+    if not config.enabled or workers <= 1 or not config.multiprocess_dir:
+        return None
+    return SharedMetrics(
+        registry, config.multiprocess_dir, config.multiprocess_interval
+    )
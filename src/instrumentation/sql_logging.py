@@ -0,0 +1,83 @@
+import json
+import logging
+import random
+import time
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.configs.app import SQLLogConfig
+
+
+logger = logging.getLogger("app.sql")
+
+
+def install_query_logging(engine: AsyncEngine, config: SQLLogConfig) -> None:
+    """Подключить выборочное логирование запросов к движку.
+
+    Медленные запросы (slow_query_ms и дольше) логируются всегда с уровнем
+    WARNING, остальные - с вероятностью sample_rate на уровне INFO.
+    Завершившиеся ошибкой отбираются так же, но пишутся с WARNING и полем
+    error.
+    При enabled = false обработчики событий не ставятся вовсе.
+    """
+    if not config.enabled:
+        return
+
+    sync_engine = engine.sync_engine
+
+    def log(
+        statement: str,
+        parameters: Any,
+        many: bool,
+        duration_ms: float,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        slow = duration_ms >= config.slow_query_ms
+
+        if not slow and random.random() >= config.sample_rate:
+            return
+
+        fields = {
+            "duration_ms": round(duration_ms, 3),
+            "slow": slow,
+            "executemany": many,
+            "statement": " ".join(statement.split()),
+        }
+        if error is not None:
+            fields["error"] = type(error).__name__
+        if config.log_parameters:
+            fields["parameters"] = parameters
+
+        logger.log(
+            logging.WARNING if slow or error is not None else logging.INFO,
+            json.dumps(fields, ensure_ascii=False, default=str),
+            extra={"sql": fields},
+        )
+
+    # Время начала хранится в контексте выполнения оператора, а не в стеке
+    # на соединении: при ошибке after_cursor_execute не вызывается, и
+    # стек на соединении из пула рос бы и сдвигал пары начало-конец
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context._log_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        duration_ms = (time.perf_counter() - context._log_started) * 1000
+        log(statement, parameters, many, duration_ms)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        context = exception_context.execution_context
+        started = getattr(context, "_log_started", None)
+        if started is None:
+            return
+        log(
+            exception_context.statement or "",
+            exception_context.parameters,
+            context.executemany,
+            (time.perf_counter() - started) * 1000,
+            error=exception_context.original_exception,
+        )
@@ -1,26 +1,103 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
 from configs.app import settings
+from src.api.http_cache import HTTPCacheMiddleware
+from src.api.profiling import ProfilingMiddleware
+from src.api.v1.auth_api import router as auth_router
 from src.api.v1.misc import router as misc_router
 from src.api.v1.caegory_api import router as category_router
+from src.api.v1.comment_api import router as comment_router
+from src.api.v1.feed_api import router as feed_router
 from src.api.v1.post_api import router as post_router
+from src.api.v1.media_api import router as media_router
+from src.auth import get_password_hasher, get_revocation_cache, get_token_codec
+from src.database import engine, metrics_on, shared_metrics, warm_up_pool
+from src.diagnostics.index_check import check_indexes
+from src.instrumentation.request_metrics import MetricsMiddleware
+from src.previews.worker import PreviewWorker
+from src.services.category_stats_service import refresh_periodically
+from src.storage import get_storage
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # uvicorn начинает принимать запросы только после этого блока
+    await warm_up_pool(settings.app.warmup_connections)
+    if settings.diagnostics.check_indexes_on_startup:
+        await check_indexes(engine, settings.diagnostics.seq_scan_max_rows)
+
+    # Ключи и секрет проверяются при запуске, а не на первом входе
+    get_token_codec()
+    # Отзывы сессий нужны до первого запроса с токеном
+    revocations = get_revocation_cache()
+    await revocations.load()
+
+    stop = asyncio.Event()
+    background = [revocations.run(stop)]
+    if settings.previews.embedded:
+        background.append(PreviewWorker(settings.previews, get_storage()).run(stop))
+    if settings.category_stats.refresh == "interval":
+        background.append(refresh_periodically(settings.category_stats, stop))
+    if shared_metrics is not None:
+        background.append(shared_metrics.run(stop))
+    tasks = [asyncio.create_task(job) for job in background]
+
+    yield
+
+    # Сюда попадаем после того, как запросы в обработке завершились
+    # (или истёк graceful_shutdown)
+    stop.set()
+    await asyncio.gather(*tasks)
+    get_password_hasher().shutdown()
+    await engine.dispose()
 
 
 app = FastAPI(
     title=settings.app.app_name,
     docs_url="/api/docs",
     openapi_url="/api/openapi.json",
+    lifespan=lifespan,
 )
 
+app.add_middleware(HTTPCacheMiddleware)
+# Последним, то есть снаружи: в задержку входит и работа остальных middleware
+if metrics_on:
+    app.add_middleware(MetricsMiddleware)
+if settings.profiling.enabled:
+    app.add_middleware(ProfilingMiddleware)
+
 
+app.include_router(auth_router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(misc_router, prefix="/api/v1/misc", tags=["misc"])
 app.include_router(category_router, prefix="/api/v1/category", tags=["category"])
 app.include_router(post_router, prefix="/api/v1/posts", tags=["posts"])
-if __name__ == "__main__":
+app.include_router(media_router, prefix="/api/v1/media", tags=["media"])
+app.include_router(feed_router, prefix="/api/v1/feed", tags=["feed"])
+app.include_router(comment_router, prefix="/api/v1/comments", tags=["comments"])
+
+
+def serve() -> None:
+    config = settings.app
+    dev = config.profile == "dev"
+
     uvicorn.run(
         "main:app",
-        host=settings.app.app_host,
-        port=settings.app.app_port,
-        reload=True,
+        host=config.app_host,
+        port=config.app_port,
+        reload=dev,
+        workers=config.worker_count,
+        loop=config.loop,
+        http=config.http,
+        backlog=config.backlog,
+        timeout_keep_alive=config.keep_alive,
+        timeout_graceful_shutdown=config.graceful_shutdown,
+        log_level="debug" if dev else "info",
     )
+
+
+if __name__ == "__main__":
+    serve()
@@ -3,10 +3,32 @@
 from .base import Base, BaseModelMixin
 
 from .category import Category
+from .comment import Comment
+from .counter import PostCounter
+from .feed import FeedItem, Subscription, SubscriptionCounter
+from .media import Media, MediaBlob, MediaJob, MediaUpload
 from .post import Posts
+from .user import AuthSession, RefreshToken, User
 
 # Posts.category = relationship("Categories", back_populates="posts")
 # Category.posts = relationship("Posts", back_populates="category")
 
 
-__all__ = ["Base", "BaseModelMixin", "Category", "Posts"]
+__all__ = [
+    "AuthSession",
+    "Base",
+    "BaseModelMixin",
+    "Category",
+    "Comment",
+    "FeedItem",
+    "Media",
+    "MediaBlob",
+    "MediaJob",
+    "MediaUpload",
+    "PostCounter",
+    "Posts",
+    "RefreshToken",
+    "Subscription",
+    "SubscriptionCounter",
+    "User",
+]
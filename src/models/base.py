@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
+from uuid import UUID
 
-from sqlalchemy import Column, DateTime
-from sqlalchemy.orm import DeclarativeBase, declarative_mixin
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DateTime
+from sqlalchemy.orm import DeclarativeBase, Mapped, declarative_mixin, mapped_column
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 
 
 class Base(DeclarativeBase):
@@ -12,8 +13,12 @@ class Base(DeclarativeBase):
 
 @declarative_mixin
 class BaseModelMixin:
-    uuid = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    create_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    update_at = Column(
+    uuid: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    create_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    update_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
     )
@@ -2,7 +2,7 @@ import uuid
 import asyncio
 from typing import Any
 
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, String, Text, Index
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -13,6 +13,15 @@ from src.configs.app import settings
 
 class Category(Base, BaseModelMixin):
     __tablename__ = "category"
+    __table_args__ = (
+        Index("ix_category_create_at_uuid", "create_at", "uuid"),
+        Index(
+            "ix_category_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     name = Column(String, nullable=False, unique=True)
     desc = Column(Text)
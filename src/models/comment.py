@@ -0,0 +1,61 @@
+from typing import Any
+
+from sqlalchemy import Column, ForeignKey, Index, Text, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.models.base import Base, BaseModelMixin
+
+
+class Comment(Base, BaseModelMixin):
+    """Комментарий к посту; ответ на другой комментарий ссылается на него
+    через parent_id"""
+
+    __tablename__ = "comments"
+    __table_args__ = (
+        # Ветка верхнего уровня поста в порядке keyset-пагинации
+        Index(
+            "ix_comments_post_id_create_at_uuid",
+            "post_id",
+            "create_at",
+            "uuid",
+            postgresql_where=text("parent_id IS NULL"),
+        ),
+        Index(
+            "ix_comments_parent_id_create_at_uuid",
+            "parent_id",
+            "create_at",
+            "uuid",
+            postgresql_where=text("parent_id IS NOT NULL"),
+        ),
+        # Для каскадного удаления вместе с пользователем
+        Index("ix_comments_author_id", "author_id"),
+    )
+
+    post_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("posts.uuid", ondelete="CASCADE"),
+        nullable=False,
+    )
+    parent_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("comments.uuid", ondelete="CASCADE"),
+        nullable=True,
+    )
+    author_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.uuid", ondelete="CASCADE"),
+        nullable=False,
+    )
+    body = Column(Text, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"uuid - {self.uuid}, post_id - {self.post_id}"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "uuid": self.uuid,
+            "post_id": self.post_id,
+            "parent_id": self.parent_id,
+            "author_id": self.author_id,
+            "body": self.body,
+        }
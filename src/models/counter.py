@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, SmallInteger, String
+
+from src.models.base import Base
+
+
+class PostCounter(Base):
+    """Счётчики постов, поддерживаемые триггерами на таблице posts.
+
+    scope - "uncategorized" или "category:<uuid>". У scope несколько строк
+    (slot), чтобы параллельные вставки в одну категорию не ждали одну
+    строку; значение счётчика - сумма по его строкам, общее число постов -
+    сумма по всем
+    """
+
+    __tablename__ = "post_counters"
+
+    scope = Column(String, primary_key=True)
+    slot = Column(SmallInteger, primary_key=True, default=0, server_default="0")
+    count = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"scope - {self.scope}, count - {self.count}"
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from src.models.base import Base
+
+
+class Subscription(Base):
+    """Подписка subscriber_id на хранилище (посты) owner_id"""
+
+    __tablename__ = "subscriptions"
+    __table_args__ = (
+        # Раздача поста подписчикам идёт от владельца
+        Index("ix_subscriptions_owner_id_subscriber_id", "owner_id", "subscriber_id"),
+    )
+
+    subscriber_id = Column(UUID(as_uuid=True), primary_key=True)
+    owner_id = Column(UUID(as_uuid=True), primary_key=True)
+    create_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"subscriber_id - {self.subscriber_id}, owner_id - {self.owner_id}"
+
+
+class SubscriptionCounter(Base):
+    """Число подписчиков владельца, поддерживаемое триггерами на subscriptions"""
+
+    __tablename__ = "subscription_counters"
+    __table_args__ = (
+        # Популярные авторы для чтения ленты: followers > celebrity_threshold
+        Index("ix_subscription_counters_followers", "followers"),
+    )
+
+    owner_id = Column(UUID(as_uuid=True), primary_key=True)
+    followers = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"owner_id - {self.owner_id}, followers - {self.followers}"
+
+
+class FeedItem(Base):
+    """Пост в ленте пользователя, записанный при создании поста.
+
+    create_at копируется из поста, чтобы лента читалась по первичному
+    ключу без обращения к posts
+    """
+
+    __tablename__ = "feed_items"
+    __table_args__ = (
+        # Для каскадного удаления при удалении поста
+        Index("ix_feed_items_post_id", "post_id"),
+    )
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    create_at = Column(DateTime, primary_key=True)
+    post_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("posts.uuid", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    owner_id = Column(UUID(as_uuid=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"user_id - {self.user_id}, post_id - {self.post_id}"
@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base, BaseModelMixin
+
+
+class MediaBlob(Base):
+    """Содержимое файла в хранилище, одно на sha256.
+
+    ref_count - сколько записей media на него ссылается; блоб с нулём
+    удаляет сборщик мусора
+    """
+
+    __tablename__ = "media_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    storage_key: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    create_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    update_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    __table_args__ = (
+        Index("ix_media_blobs_orphaned", "update_at", postgresql_where=ref_count <= 0),
+    )
+
+    def __repr__(self) -> str:
+        return f"sha256 - {self.sha256}, ref_count - {self.ref_count}"
+
+
+class Media(Base, BaseModelMixin):
+    """Загруженный медиафайл; uuid - это media_id поста.
+
+    Одинаковые файлы разных постов - разные media с общим блобом
+    """
+
+    __tablename__ = "media"
+
+    filename: Mapped[Optional[str]] = mapped_column(String)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sha256: Mapped[str] = mapped_column(
+        String(64), ForeignKey("media_blobs.sha256"), nullable=False, index=True
+    )
+    # Ключ блоба, скопированный сюда, чтобы отдача файла не делала JOIN
+    storage_key: Mapped[str] = mapped_column(String, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"uuid - {self.uuid}, filename - {self.filename}, size - {self.size}"
+
+
+class MediaUpload(Base, BaseModelMixin):
+    """Незавершённая загрузка. offset - сколько байт уже сохранено.
+
+    lease_until - пока не истёк, загрузку пишет один запрос, остальные
+    получают 409
+    """
+
+    __tablename__ = "media_uploads"
+
+    filename: Mapped[Optional[str]] = mapped_column(String)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    length: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    offset: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    storage_key: Mapped[str] = mapped_column(String, nullable=False)
+    storage_state: Mapped[dict[str, Any]] = mapped_column(
+        JSONB, nullable=False, default=dict
+    )
+    lease_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"uuid - {self.uuid}, offset - {self.offset} / {self.length}"
+
+
+class MediaJob(Base, BaseModelMixin):
+    """Задача построения превью для media_id.
+
+    Очередь - сама таблица: обработчики забирают задачи через
+    FOR UPDATE SKIP LOCKED, поэтому отдельный брокер не нужен.
+    status: pending -> running -> done | failed; running с истёкшим
+    locked_until снова доступна
+    """
+
+    __tablename__ = "media_jobs"
+
+    media_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    run_after: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    locked_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        # Выборка очереди смотрит только на незавершённые задачи
+        Index(
+            "ix_media_jobs_queue",
+            "run_after",
+            postgresql_where=status.in_(("pending", "running")),
+        ),
+        Index("ix_media_jobs_finished_at", "finished_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"uuid - {self.uuid}, media_id - {self.media_id}, status - {self.status}"
@@ -1,29 +1,76 @@
 import uuid
 from typing import Any
 
-from sqlalchemy import Column, String, Text, ForeignKey
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Computed,
+    String,
+    Text,
+    ForeignKey,
+    Index,
+    false,
+)
 from sqlalchemy.ext.asyncio import create_async_engine
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from .base import Base, BaseModelMixin
 
 
 class Posts(Base, BaseModelMixin):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_create_at_uuid", "create_at", "uuid"),
+        Index("ix_posts_media_id", "media_id", unique=True),
+        # Покрывает и фильтр по category_id, и keyset-пагинацию внутри категории
+        Index(
+            "ix_posts_category_id_create_at_uuid", "category_id", "create_at", "uuid"
+        ),
+        Index(
+            "ix_posts_desc_trgm",
+            "desc",
+            postgresql_using="gin",
+            postgresql_ops={"desc": "gin_trgm_ops"},
+        ),
+        Index("ix_posts_desc_tsv", "desc_tsv", postgresql_using="gin"),
+        # Посты владельца по времени: лента по подпискам на популярных авторов
+        Index("ix_posts_owner_id_create_at_uuid", "owner_id", "create_at", "uuid"),
+    )
 
     media_id = Column(UUID(as_uuid=True), nullable=False, default=uuid.uuid4)
     desc = Column(Text)
+    # Нужен только для полнотекстового поиска, поэтому не загружается с постом
+    desc_tsv = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "to_tsvector('simple'::regconfig, coalesce(\"desc\", ''))",
+                persisted=True,
+            ),
+        )
+    )
 
     category_id = Column(
         UUID(as_uuid=True),
         ForeignKey("category.uuid", ondelete="SET NULL"),
         nullable=True,
     )
+    # Автор поста (владелец хранилища); у старых постов не задан
+    owner_id = Column(UUID(as_uuid=True), nullable=True)
+    # Число комментариев поддерживают триггеры на comments
+    comment_count = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # Есть ли у media превью: их строят только для изображений. Ставит
+    # триггер при вставке и смене media_id; у поста без записи media -
+    # false
+    has_previews = Column(Boolean, nullable=False, server_default=false())
 
     # category = relationship("Category", back_populates="posts")
     # category = relationship("Category", backref="posts")
-    category = relationship("Category", lazy="joined")
+    # Категория нужна только *_with_category-запросам: они сами выбирают
+    # joinedload/selectinload, а случайное ленивое обращение - ошибка
+    category = relationship("Category", lazy="raise")
 
     def __repr__(self) -> str:
         return f""
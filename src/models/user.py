@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, text
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.models.base import Base, BaseModelMixin
+
+
+class User(Base, BaseModelMixin):
+    __tablename__ = "users"
+
+    login: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    first_name: Mapped[str] = mapped_column(String, nullable=False)
+    last_name: Mapped[str] = mapped_column(String, nullable=False)
+    # Строка argon2 вместе с солью и параметрами
+    password_hash: Mapped[str] = mapped_column(String, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"uuid - {self.uuid}, login - {self.login}"
+
+
+class AuthSession(Base):
+    """Вход пользователя: цепочка refresh-токенов одного устройства.
+
+    Access-токен несёт uuid сессии (sid), поэтому отзыв сессии гасит и
+    выданные по ней access-токены
+    """
+
+    __tablename__ = "auth_sessions"
+    __table_args__ = (
+        Index("ix_auth_sessions_user_id", "user_id"),
+        # Процессы приложения опрашивают недавно отозванные сессии
+        Index(
+            "ix_auth_sessions_revoked_at",
+            "revoked_at",
+            postgresql_where=text("revoked_at IS NOT NULL"),
+        ),
+    )
+
+    uuid: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    user_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.uuid", ondelete="CASCADE"),
+        nullable=False,
+    )
+    create_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"uuid - {self.uuid}, user_id - {self.user_id}"
+
+
+class RefreshToken(Base):
+    """Refresh-токен хранится только как sha256: утечка таблицы не даёт
+    действующих токенов"""
+
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (Index("ix_refresh_tokens_session_id", "session_id"),)
+
+    token_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    session_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("auth_sessions.uuid", ondelete="CASCADE"),
+        nullable=False,
+    )
+    create_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Токен одноразовый: повторное предъявление означает кражу
+    used_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"session_id - {self.session_id}, used_at - {self.used_at}"
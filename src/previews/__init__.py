@@ -0,0 +1,32 @@
+from pathlib import Path
+from typing import Any
+
+from src.configs.app import settings
+
+
+def preview_name(sha256: str, size: int, fmt: str) -> str:
+    """Имя файла превью выводится из содержимого исходника: одинаковые
+    файлы, загруженные дважды, делят превью, а готовность проверяется
+    наличием файла"""
+    return f"{sha256[:2]}/{sha256}-{size}.{fmt}"
+
+
+def preview_path(root: str | Path, sha256: str, size: int, fmt: str) -> Path:
+    return Path(root) / preview_name(sha256, size, fmt)
+
+
+def preview_urls(media_id: Any, has_previews: bool) -> dict[str, str]:
+    """Адреса превью поста по размерам; пустой словарь, если media не
+    изображение (Posts.has_previews).
+
+    Превью строятся в фоне, поэтому до готовности адрес отвечает 404
+    """
+    if not has_previews:
+        return {}
+    return {
+        str(size): f"/api/v1/media/{media_id}/preview/{size}"
+        for size in settings.previews.sizes
+    }
+
+
+__all__ = ["preview_name", "preview_path", "preview_urls"]
@@ -0,0 +1,62 @@
+"""Масштабирование изображений. Выполняется в дочерних процессах пула,
+поэтому получает и возвращает только простые значения."""
+
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from src.previews import preview_path
+
+
+def render_previews(
+    source: bytes,
+    sha256: str,
+    sizes: list[int],
+    root: str,
+    fmt: str,
+    quality: int,
+) -> list[int]:
+    """Построить недостающие превью и вернуть их размеры"""
+    # Pillow - необязательная зависимость, нужна только обработчику превью
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    missing = [
+        size for size in sizes if not preview_path(root, sha256, size, fmt).exists()
+    ]
+    if not missing:
+        return []
+
+    try:
+        image: Image.Image = Image.open(io.BytesIO(source))
+    except (UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        # ValueError - признак того, что повторять задачу бессмысленно
+        raise ValueError(str(exc)) from None
+
+    with image:
+        # Для JPEG декодер сразу уменьшает изображение кратно 2, это
+        # намного быстрее полного декодирования
+        image.draft("RGB", (max(missing), max(missing)))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        for size in sorted(missing, reverse=True):
+            preview = image.copy()
+            preview.thumbnail((size, size), Image.Resampling.LANCZOS)
+            target = preview_path(root, sha256, size, fmt)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            # Запись во временный файл и rename: читатель не увидит
+            # недописанное превью
+            descriptor, temporary = tempfile.mkstemp(dir=target.parent)
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    preview.save(file, format=fmt, quality=quality)
+                os.replace(temporary, target)
+            except BaseException:
+                Path(temporary).unlink(missing_ok=True)
+                raise
+            # Следующий размер меньше, уменьшать удобнее уже уменьшенное
+            image = preview
+
+    return missing
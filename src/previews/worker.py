@@ -0,0 +1,125 @@
+"""Обработчик очереди превью.
+
+Забирает задачи из media_jobs пачками, читает исходник из хранилища и
+масштабирует его в пуле процессов, чтобы декодирование изображений не
+занимало ни event loop, ни GIL. Обработчиков может быть несколько, в том
+числе по одному в каждом воркере uvicorn (preview_settings.embedded):
+SKIP LOCKED не даст двум из них взять одну задачу.
+
+    PYTHONPATH=src python -m src.previews.worker
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from sqlalchemy import Row
+
+from src.configs.app import PreviewConfig, settings
+from src.database import async_sesion_maker
+from src.previews.render import render_previews
+from src.repositories.jobs import JobRepository
+from src.storage import StorageBackend, get_storage
+
+
+logger = logging.getLogger(__name__)
+
+
+class PreviewWorker:
+    def __init__(self, config: PreviewConfig, storage: StorageBackend):
+        self.config = config
+        self.storage = storage
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def _read(self, job: Row) -> bytes:
+        return b"".join([chunk async for chunk in self.storage.read(job.storage_key)])
+
+    async def _process(self, job: Row) -> None:
+        started = time.perf_counter()
+        try:
+            if job.size > self.config.max_source_size:
+                raise ValueError(f"Source is larger than {self.config.max_source_size}")
+            source = await self._read(job)
+            rendered = await asyncio.get_running_loop().run_in_executor(
+                self._pool,
+                render_previews,
+                source,
+                job.sha256,
+                self.config.sizes,
+                self.config.root,
+                self.config.format,
+                self.config.quality,
+            )
+        except Exception as exc:
+            # Повторять имеет смысл только временные сбои; битое или
+            # слишком большое изображение не станет лучше
+            permanent = isinstance(exc, ValueError) or (
+                job.attempts >= self.config.max_attempts
+            )
+            logger.warning("preview job %s failed: %r", job.uuid, exc)
+            async with async_sesion_maker() as session:
+                await JobRepository(session).fail(
+                    job.uuid,
+                    repr(exc),
+                    None if permanent else 2**job.attempts * self.config.poll_interval,
+                )
+            return
+
+        async with async_sesion_maker() as session:
+            await JobRepository(session).finish(job.uuid)
+        logger.debug(
+            "preview job %s: sizes %s in %.3fs",
+            job.uuid,
+            rendered,
+            time.perf_counter() - started,
+        )
+
+    async def run_once(self) -> int:
+        """Обработать одну пачку задач и вернуть её размер"""
+        async with async_sesion_maker() as session:
+            jobs = await JobRepository(session).claim(
+                self.config.batch_size, self.config.lease_seconds
+            )
+        await asyncio.gather(*(self._process(job) for job in jobs))
+        return len(jobs)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Разбирать очередь до stop; пустая очередь опрашивается раз в
+        poll_interval"""
+        self._pool = ProcessPoolExecutor(self.config.processes)
+        try:
+            while not stop.is_set():
+                try:
+                    claimed = await self.run_once()
+                except Exception:
+                    logger.exception("preview worker iteration failed")
+                    claimed = 0
+                if claimed < self.config.batch_size:
+                    try:
+                        await asyncio.wait_for(stop.wait(), self.config.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            # Незавершённые задачи заберёт другой обработчик по lease
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+async def main() -> None:
+    from src.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    await PreviewWorker(settings.previews, get_storage()).run(stop)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import Depends
+from sqlalchemy import Row, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_session
+from src.models.user import AuthSession, RefreshToken
+
+
+class AuthSessionRepository:
+    """Сессии входа и их refresh-токены"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(
+        self,
+        user_id: Any,
+        token_hash: str,
+        expires_at: datetime,
+        commit: bool = True,
+    ) -> Any:
+        """Открыть сессию с первым refresh-токеном; вернуть uuid сессии"""
+        session_id = (
+            await self.db.execute(
+                insert(AuthSession)
+                .values(user_id=user_id, expires_at=expires_at)
+                .returning(AuthSession.uuid)
+            )
+        ).scalar_one()
+        await self.db.execute(
+            insert(RefreshToken).values(
+                token_hash=token_hash, session_id=session_id, expires_at=expires_at
+            )
+        )
+        if commit:
+            await self.db.commit()
+        return session_id
+
+    async def rotate(
+        self, token_hash: str, new_hash: str, expires_at: datetime
+    ) -> Optional[tuple[Row, bool]]:
+        """Погасить refresh-токен и, если он был действителен, выдать
+        следующий в той же сессии.
+
+        Токен помечается использованным одним UPDATE; прежнее used_at
+        берётся из подзапроса FOR UPDATE, поэтому из двух одновременных
+        предъявлений одного токена действительным окажется только одно.
+        Возвращает строку с used_at до обновления и данными сессии вместе
+        с признаком, выдан ли новый токен, или None, если токена нет
+        """
+        now = datetime.utcnow()
+        old = (
+            select(RefreshToken.token_hash, RefreshToken.used_at)
+            .where(RefreshToken.token_hash == token_hash)
+            .with_for_update()
+            .subquery("old")
+        )
+        result = await self.db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == old.c.token_hash,
+                AuthSession.uuid == RefreshToken.session_id,
+            )
+            .values(used_at=func.coalesce(RefreshToken.used_at, now))
+            .returning(
+                RefreshToken.session_id,
+                RefreshToken.expires_at,
+                old.c.used_at,
+                AuthSession.user_id,
+                AuthSession.revoked_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        if row is None:
+            await self.db.rollback()
+            return None
+
+        rotated = (
+            row.used_at is None and row.revoked_at is None and row.expires_at > now
+        )
+        if rotated:
+            await self.db.execute(
+                insert(RefreshToken).values(
+                    token_hash=new_hash,
+                    session_id=row.session_id,
+                    expires_at=expires_at,
+                )
+            )
+        await self.db.commit()
+        return row, rotated
+
+    async def revoke(self, session_id: Any) -> Optional[datetime]:
+        """Отозвать сессию; вернуть время отзыва или None, если её нет"""
+        result = await self.db.execute(
+            update(AuthSession)
+            .where(AuthSession.uuid == session_id)
+            .values(revoked_at=func.coalesce(AuthSession.revoked_at, datetime.utcnow()))
+            .returning(AuthSession.revoked_at)
+            .execution_options(synchronize_session=False)
+        )
+        revoked_at = result.scalar_one_or_none()
+        await self.db.commit()
+        return revoked_at
+
+    async def revoke_all(self, user_id: Any, commit: bool = True) -> Sequence[Row]:
+        """Отозвать все действующие сессии пользователя; строки (uuid,
+        revoked_at)"""
+        result = await self.db.execute(
+            update(AuthSession)
+            .where(AuthSession.user_id == user_id, AuthSession.revoked_at.is_(None))
+            .values(revoked_at=datetime.utcnow())
+            .returning(AuthSession.uuid, AuthSession.revoked_at)
+            .execution_options(synchronize_session=False)
+        )
+        revoked = result.all()
+        if commit:
+            await self.db.commit()
+        return revoked
+
+    async def revoked_since(self, since: datetime) -> Sequence[Row]:
+        """Сессии, отозванные после since: (uuid, revoked_at)"""
+        result = await self.db.execute(
+            select(AuthSession.uuid, AuthSession.revoked_at)
+            .where(AuthSession.revoked_at > since)
+            .order_by(AuthSession.revoked_at)
+        )
+        return result.all()
+
+
+async def get_auth_session_reposetory(
+    db: AsyncSession = Depends(get_session),
+) -> AuthSessionRepository:
+    return AuthSessionRepository(db)
@@ -1,74 +1,161 @@
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import Row, delete, exists, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.cache import CacheBackend, NullCache, get_cache
+from src.cache.codec import dumps, entity_from_dict, entity_to_dict, loads
+from src.cache.keys import category_key, post_keys
 from src.models.category import Category
+from src.models.post import Posts
 from src.database import get_session
+from src.repositories.pagination import Cursor, paginate
+from src.repositories.search import escape_like
+
+
+# Поля CategoryResponse в порядке столбцов строки в режиме rows=True
+CATEGORY_ROW_FIELDS = ("uuid", "name", "desc")
 
 
 class CategoryRepository:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, cache: Optional[CacheBackend] = None):
         self.db = db
+        self.cache = cache or NullCache()
 
-    async def get_by_id(self, category_id: Any) -> Optional[Category]:
+    async def _fetch_by_id(self, category_id: Any) -> Optional[Category]:
         result = await self.db.execute(
             select(Category).where(Category.uuid == category_id)
         )
 
         return result.scalar_one_or_none()
 
+    async def _invalidate(self, category_id: Any) -> None:
+        key = category_key(category_id)
+        if key is not None:
+            await self.cache.delete(key)
+
+    async def get_by_id(self, category_id: Any) -> Optional[Category]:
+        key = category_key(category_id)
+        if key is None:
+            return await self._fetch_by_id(category_id)
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return entity_from_dict(Category, loads(cached))
+
+        category = await self._fetch_by_id(category_id)
+        if category is not None:
+            await self.cache.add(key, dumps(entity_to_dict(category)))
+
+        return category
+
+    async def get_version(self, category_id: Any) -> Optional[Row]:
+        """uuid и update_at для ETag, мимо кэша"""
+        result = await self.db.execute(
+            select(Category.uuid, Category.update_at).where(
+                Category.uuid == category_id
+            )
+        )
+        return result.one_or_none()
+
     async def get_by_name(self, name: str) -> Optional[Category]:
         result = await self.db.execute(select(Category).where(Category.name == name))
 
         return result.scalar_one_or_none()
 
     async def exists_by_name(self, name: str) -> bool:
-        category = await self.get_by_name(name)
-        return category is not None
-
-    async def get_all(self, skip: int = 0, limit: int = 100) -> list[Category]:
-        result = await self.db.execute(select(Category).offset(skip).limit(limit))
-
-        return result.scalars().all()
+        return bool(await self.db.scalar(select(exists().where(Category.name == name))))
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        rows: bool = False,
+    ) -> Sequence[Any]:
+        """Категории ORM-объектами или строками CATEGORY_ROW_FIELDS + create_at"""
+        if rows:
+            columns = [getattr(Category, name) for name in CATEGORY_ROW_FIELDS]
+            query = select(*columns, Category.create_at)
+        else:
+            query = select(Category)
+
+        result = await self.db.execute(paginate(query, Category, skip, limit, cursor))
+
+        return result.all() if rows else result.scalars().all()
 
     async def create(self, category_date: dict) -> Category:
-        category = Category(**category_date)
-        self.db.add(category)
+        result = await self.db.execute(
+            insert(Category)
+            .values(**category_date)
+            .returning(Category)
+            .execution_options(populate_existing=True)
+        )
+        category = result.scalar_one()
         await self.db.commit()
-        await self.db.refresh(category)
         return category
 
-    async def update(self, category_id: Any, category_date: dict) -> Category:
-        category = await self.get_by_id(category_id)
+    async def update(self, category_id: Any, category_date: dict) -> Optional[Category]:
+        result = await self.db.execute(
+            update(Category)
+            .where(Category.uuid == category_id)
+            .values(**category_date)
+            .returning(Category)
+            .execution_options(populate_existing=True, synchronize_session=False)
+        )
+        category = result.scalar_one_or_none()
+        await self.db.commit()
 
         if category:
-            for key, value in category_date.items():
-                setattr(category, key, value)
-
-            await self.db.commit()
-            await self.db.refresh(category)
+            await self._invalidate(category.uuid)
 
         return category
 
     async def delete(self, category_id: Any) -> bool:
-        category = await self.get_by_id(category_id)
-
-        if category:
-            await self.db.delete(category)
-            await self.db.commit()
+        """Удалить категорию; её посты остаются без категории (ON DELETE SET
+        NULL), и их ключи в кэше сбрасываются"""
+        deleted = (
+            delete(Category)
+            .where(Category.uuid == category_id)
+            .returning(Category.uuid)
+            .cte("deleted")
+        )
+        # SELECT видит посты до SET NULL, то есть ровно те, что теряют
+        # категорию
+        result = await self.db.execute(
+            select(deleted.c.uuid, Posts.uuid, Posts.media_id).select_from(
+                deleted.outerjoin(Posts, Posts.category_id == deleted.c.uuid)
+            )
+        )
+        rows = result.all()
+        await self.db.commit()
 
-            return True
+        if not rows:
+            return False
+
+        await self._invalidate(rows[0][0])
+        await self.cache.delete(
+            *(
+                key
+                for _, post_id, media_id in rows
+                if post_id is not None
+                for key in post_keys(post_id, media_id)
+            )
+        )
 
-        return False
+        return True
 
     async def search_by_name(
         self, name_pattern: str, skip: int = 0, limit: int = 100
     ) -> list[Category]:
+        # ILIKE обслуживается GIN-индексом gin_trgm_ops по name
         result = await self.db.execute(
             select(Category)
-            .where(Category.name.ilike(f"%{name_pattern}%"))
+            .where(Category.name.ilike(f"%{escape_like(name_pattern)}%", escape="\\"))
+            .order_by(
+                func.similarity(Category.name, name_pattern).desc(), Category.uuid
+            )
             .offset(skip)
             .limit(limit)
         )
@@ -77,5 +164,6 @@ class CategoryRepository:
 
 async def get_category_reposetory(
     db: AsyncSession = Depends(get_session),
+    cache: CacheBackend = Depends(get_cache),
 ) -> CategoryRepository:
-    return CategoryRepository(db)
+    return CategoryRepository(db, cache)
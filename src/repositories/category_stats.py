@@ -0,0 +1,100 @@
+from typing import Sequence
+
+from fastapi import Depends
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Row,
+    String,
+    column,
+    func,
+    select,
+    table,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_session
+
+
+# Материализованное представление из миграции category_stats. Не модель,
+# чтобы alembic не пытался создать его как таблицу
+category_stats = table(
+    "category_stats",
+    column("category_id", UUID(as_uuid=True)),
+    column("name", String),
+    column("post_count", BigInteger),
+    column("media_count", BigInteger),
+    column("first_post_at", DateTime),
+    column("latest_post_at", DateTime),
+    column("last_activity_at", DateTime),
+    column("refreshed_at", DateTime(timezone=True)),
+)
+
+# Поля CategoryStatsResponse в порядке столбцов строки
+CATEGORY_STATS_FIELDS = (
+    "category_id",
+    "name",
+    "post_count",
+    "media_count",
+    "first_post_at",
+    "latest_post_at",
+    "last_activity_at",
+)
+
+# Ключ advisory-блокировки обновления: одновременно обновляет один процесс
+REFRESH_LOCK_KEY = 0x63617473  # "cats"
+
+
+class CategoryStatsRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_all(self) -> Sequence[Row]:
+        """Все категории одним чтением представления, по имени"""
+        columns = [category_stats.c[name] for name in CATEGORY_STATS_FIELDS]
+        result = await self.db.execute(
+            select(*columns, category_stats.c.refreshed_at).order_by(
+                category_stats.c.name
+            )
+        )
+        return result.all()
+
+    async def refresh(self, max_age: float = 0.0) -> bool:
+        """Пересчитать представление, если оно старше max_age секунд.
+
+        CONCURRENTLY не блокирует чтение на время пересчёта. Если
+        пересчёт уже идёт в другом процессе, ничего не делает. Возвращает,
+        был ли пересчёт
+        """
+        locked = await self.db.scalar(
+            select(func.pg_try_advisory_xact_lock(REFRESH_LOCK_KEY))
+        )
+        if not locked:
+            await self.db.rollback()
+            return False
+
+        # Проверка под блокировкой: другой процесс мог только что обновить
+        age = await self.db.scalar(
+            select(
+                func.extract(
+                    "epoch", func.now() - func.max(category_stats.c.refreshed_at)
+                )
+            )
+        )
+        if age is not None and age < max_age:
+            await self.db.rollback()
+            return False
+
+        await self.db.execute(
+            text("REFRESH MATERIALIZED VIEW CONCURRENTLY category_stats")
+        )
+        await self.db.commit()
+        return True
+
+
+async def get_category_stats_reposetory(
+    db: AsyncSession = Depends(get_session),
+) -> CategoryStatsRepository:
+    return CategoryStatsRepository(db)
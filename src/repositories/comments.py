@@ -0,0 +1,187 @@
+import uuid
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+from fastapi import Depends
+from sqlalchemy import Row, delete, insert, literal, select, true, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import CacheBackend, NullCache, get_cache
+from src.cache.keys import post_keys
+from src.database import get_session
+from src.models.comment import Comment
+from src.models.post import Posts
+from src.repositories.pagination import Cursor, paginate
+
+
+# Поля CommentResponse в порядке столбцов строки
+COMMENT_ROW_FIELDS = (
+    "uuid",
+    "post_id",
+    "parent_id",
+    "author_id",
+    "body",
+    "create_at",
+    "update_at",
+)
+
+_COLUMNS = [getattr(Comment, name) for name in COMMENT_ROW_FIELDS]
+
+
+class CommentRepository:
+    """Комментарии к постам.
+
+    Изменения comments меняют comment_count и update_at поста (триггеры),
+    поэтому изменяющие методы сбрасывают кэш поста. media_id для ключей
+    кэша берётся из posts в том же операторе
+    """
+
+    def __init__(self, db: AsyncSession, cache: Optional[CacheBackend] = None):
+        self.db = db
+        self.cache = cache or NullCache()
+
+    async def _write(self, stmt: Any) -> Optional[Row]:
+        """Выполнить INSERT/UPDATE/DELETE комментария одним оператором и
+        вернуть строку COMMENT_ROW_FIELDS"""
+        written = stmt.returning(*_COLUMNS).cte("written")
+        result = await self.db.execute(
+            select(
+                *(written.c[name] for name in COMMENT_ROW_FIELDS), Posts.media_id
+            ).join(Posts, Posts.uuid == written.c.post_id)
+        )
+        row = result.one_or_none()
+        await self.db.commit()
+        if row is not None:
+            await self.cache.delete(*post_keys(row.post_id, row.media_id))
+        return row
+
+    async def create(self, post_id: Any, author_id: Any, body: str) -> Optional[Row]:
+        """Комментарий верхнего уровня; IntegrityError, если поста нет"""
+        now = datetime.utcnow()
+        return await self._write(
+            insert(Comment).values(
+                uuid=uuid.uuid4(),
+                post_id=post_id,
+                author_id=author_id,
+                body=body,
+                create_at=now,
+                update_at=now,
+            )
+        )
+
+    async def create_reply(
+        self, parent_id: Any, author_id: Any, body: str
+    ) -> Optional[Row]:
+        """Ответ на комментарий, в тот же пост; None, если его нет"""
+        now = datetime.utcnow()
+        parent = select(
+            literal(uuid.uuid4(), PG_UUID(as_uuid=True)),
+            Comment.post_id,
+            Comment.uuid,
+            literal(author_id, PG_UUID(as_uuid=True)),
+            literal(body),
+            literal(now),
+            literal(now),
+        ).where(Comment.uuid == parent_id)
+        return await self._write(
+            insert(Comment).from_select(
+                [
+                    "uuid",
+                    "post_id",
+                    "parent_id",
+                    "author_id",
+                    "body",
+                    "create_at",
+                    "update_at",
+                ],
+                parent,
+            )
+        )
+
+    async def update(self, comment_id: Any, author_id: Any, body: str) -> Optional[Row]:
+        """Изменить свой комментарий; None, если его нет или он чужой"""
+        return await self._write(
+            update(Comment)
+            .where(Comment.uuid == comment_id, Comment.author_id == author_id)
+            .values(body=body, update_at=datetime.utcnow())
+        )
+
+    async def delete(self, comment_id: Any, author_id: Any) -> bool:
+        """Удалить свой комментарий вместе с ответами на него"""
+        return (
+            await self._write(
+                delete(Comment).where(
+                    Comment.uuid == comment_id, Comment.author_id == author_id
+                )
+            )
+            is not None
+        )
+
+    async def get_thread(
+        self, post_id: Any, limit: int = 20, cursor: Optional[Cursor] = None
+    ) -> Sequence[Row]:
+        """Комментарии верхнего уровня поста, от старых к новым"""
+        result = await self.db.execute(
+            paginate(
+                select(*_COLUMNS).where(
+                    Comment.post_id == post_id, Comment.parent_id.is_(None)
+                ),
+                Comment,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return result.all()
+
+    async def get_replies(
+        self, parent_id: Any, limit: int = 20, cursor: Optional[Cursor] = None
+    ) -> Sequence[Row]:
+        """Ответы на комментарий, от старых к новым"""
+        result = await self.db.execute(
+            paginate(
+                select(*_COLUMNS).where(Comment.parent_id == parent_id),
+                Comment,
+                limit=limit,
+                cursor=cursor,
+            )
+        )
+        return result.all()
+
+    async def get_first_comments(
+        self, post_ids: Sequence[Any], limit: int
+    ) -> Sequence[Row]:
+        """Первые limit комментариев верхнего уровня каждого из постов одним
+        запросом.
+
+        Для каждого поста LATERAL берёт начало его ветки по индексу
+        (post_id, create_at, uuid), поэтому стоимость не зависит от длины
+        веток. Строка на каждый комментарий плюс строка без комментария
+        для поста без них; первые столбцы - requested_id и comment_count
+        поста
+        """
+        first = (
+            select(*_COLUMNS)
+            .where(Comment.post_id == Posts.uuid, Comment.parent_id.is_(None))
+            .order_by(Comment.create_at, Comment.uuid)
+            .limit(limit)
+            .lateral("first_comments")
+        )
+        result = await self.db.execute(
+            select(
+                Posts.uuid.label("requested_id"),
+                Posts.comment_count,
+                *(first.c[name] for name in COMMENT_ROW_FIELDS),
+            )
+            .outerjoin(first, true())
+            .where(Posts.uuid.in_(post_ids))
+            .order_by(Posts.uuid, first.c.create_at, first.c.uuid)
+        )
+        return result.all()
+
+
+async def get_comment_reposetory(
+    db: AsyncSession = Depends(get_session),
+    cache: CacheBackend = Depends(get_cache),
+) -> CommentRepository:
+    return CommentRepository(db, cache)
@@ -0,0 +1,215 @@
+from typing import Any, Optional, Sequence, cast
+
+from fastapi import Depends
+from sqlalchemy import DateTime, Row, Select, Subquery, delete, func, literal, select
+from sqlalchemy import BigInteger, CursorResult, Integer, bindparam, true, tuple_, union
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.configs.app import FeedConfig, settings
+from src.database import get_session
+from src.models.feed import FeedItem, Subscription, SubscriptionCounter
+from src.models.post import Posts
+from src.repositories.pagination import Cursor
+from src.repositories.posts import POST_ROW_FIELDS
+
+
+def _before(create_at: Any, uuid: Any) -> Any:
+    """Условие keyset-пагинации для выдачи от новых к старым"""
+    return tuple_(create_at, uuid) < tuple_(
+        bindparam("cursor_at", type_=DateTime), bindparam("cursor_uuid", type_=PG_UUID)
+    )
+
+
+def _page(after_cursor: bool) -> Subquery:
+    limit = bindparam("limit", type_=Integer)
+    materialized = (
+        select(FeedItem.post_id.label("uuid"), FeedItem.create_at)
+        .where(FeedItem.user_id == bindparam("user_id", type_=PG_UUID))
+        .order_by(FeedItem.create_at.desc(), FeedItem.post_id.desc())
+        .limit(limit)
+    )
+    if after_cursor:
+        materialized = materialized.where(_before(FeedItem.create_at, FeedItem.post_id))
+
+    celebrities = (
+        select(Subscription.owner_id)
+        .join(
+            SubscriptionCounter,
+            SubscriptionCounter.owner_id == Subscription.owner_id,
+        )
+        .where(
+            Subscription.subscriber_id == bindparam("user_id", type_=PG_UUID),
+            SubscriptionCounter.followers
+            > bindparam("celebrity_threshold", type_=BigInteger),
+        )
+        .subquery("celebrities")
+    )
+    # По limit последних постов каждого популярного автора: LATERAL
+    # проходит индекс (owner_id, create_at, uuid) отдельно для каждого,
+    # а не сортирует все их посты
+    latest = (
+        select(Posts.uuid, Posts.create_at)
+        .where(Posts.owner_id == celebrities.c.owner_id)
+        .order_by(Posts.create_at.desc(), Posts.uuid.desc())
+        .limit(limit)
+    )
+    if after_cursor:
+        latest = latest.where(_before(Posts.create_at, Posts.uuid))
+    celebrity_posts = latest.lateral("celebrity_posts")
+    pulled = select(celebrity_posts.c.uuid, celebrity_posts.c.create_at).join_from(
+        celebrities, celebrity_posts, true()
+    )
+
+    # UNION убирает пост, попавший в обе части, если автор пересёк порог
+    return union(materialized, pulled).subquery("page")
+
+
+def _feed_query(after_cursor: bool) -> Select:
+    page = _page(after_cursor)
+    columns = [getattr(Posts, name) for name in POST_ROW_FIELDS]
+    return (
+        select(*columns, Posts.has_previews, Posts.create_at)
+        .join(page, page.c.uuid == Posts.uuid)
+        .order_by(page.c.create_at.desc(), page.c.uuid.desc())
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+# Запрос ленты собирается один раз: построение UNION с LATERAL и ключ
+# кэша компиляции SQLAlchemy стоили больше, чем его выполнение в базе.
+# Меняются только параметры
+FEED_QUERIES = {
+    after_cursor: _feed_query(after_cursor) for after_cursor in (False, True)
+}
+
+
+class FeedRepository:
+    """Ленты подписок.
+
+    Пост автора с не больше чем celebrity_threshold подписчиков при
+    создании раскладывается в feed_items каждого подписчика (fan-out on
+    write), и лента читается по первичному ключу feed_items. Посты
+    популярных авторов не копируются: при чтении последние из них берутся
+    по индексу (owner_id, create_at, uuid) и сливаются с материализованной
+    частью (fan-out on read)
+    """
+
+    def __init__(self, db: AsyncSession, config: FeedConfig):
+        self.db = db
+        self.config = config
+
+    def _followers(self, owner_id: Any) -> Any:
+        return func.coalesce(
+            select(SubscriptionCounter.followers)
+            .where(SubscriptionCounter.owner_id == owner_id)
+            .scalar_subquery(),
+            0,
+        )
+
+    async def fan_out(self, post: Posts) -> int:
+        """Разложить пост по лентам подписчиков автора одним INSERT ... SELECT
+        и зафиксировать транзакцию вместе с самим постом.
+
+        Для популярного автора ничего не вставляется. Возвращает число
+        затронутых лент
+        """
+        result = await self.db.execute(
+            pg_insert(FeedItem)
+            .from_select(
+                ["user_id", "create_at", "post_id", "owner_id"],
+                select(
+                    Subscription.subscriber_id,
+                    literal(post.create_at, DateTime()),
+                    literal(post.uuid, PG_UUID(as_uuid=True)),
+                    Subscription.owner_id,
+                ).where(
+                    Subscription.owner_id == post.owner_id,
+                    self._followers(post.owner_id) <= self.config.celebrity_threshold,
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        await self.db.commit()
+        return cast(CursorResult, result).rowcount
+
+    async def subscribe(self, subscriber_id: Any, owner_id: Any) -> bool:
+        """Подписаться и перенести в ленту последние backfill_posts постов
+        автора. False, если подписка уже была"""
+        result = await self.db.execute(
+            pg_insert(Subscription)
+            .values(subscriber_id=subscriber_id, owner_id=owner_id)
+            .on_conflict_do_nothing()
+            .returning(Subscription.owner_id)
+        )
+        if result.scalar_one_or_none() is None:
+            await self.db.rollback()
+            return False
+
+        # Посты популярного автора и так подмешиваются при чтении
+        if self.config.backfill_posts:
+            recent = (
+                select(
+                    literal(subscriber_id, PG_UUID(as_uuid=True)),
+                    Posts.create_at,
+                    Posts.uuid,
+                    Posts.owner_id,
+                )
+                .where(
+                    Posts.owner_id == owner_id,
+                    self._followers(owner_id) <= self.config.celebrity_threshold,
+                )
+                .order_by(Posts.create_at.desc(), Posts.uuid.desc())
+                .limit(self.config.backfill_posts)
+            )
+            await self.db.execute(
+                pg_insert(FeedItem)
+                .from_select(["user_id", "create_at", "post_id", "owner_id"], recent)
+                .on_conflict_do_nothing()
+            )
+        await self.db.commit()
+        return True
+
+    async def unsubscribe(self, subscriber_id: Any, owner_id: Any) -> bool:
+        """Отписаться и убрать посты автора из ленты. False, если подписки
+        не было"""
+        result = await self.db.execute(
+            delete(Subscription)
+            .where(
+                Subscription.subscriber_id == subscriber_id,
+                Subscription.owner_id == owner_id,
+            )
+            .returning(Subscription.owner_id)
+        )
+        if result.scalar_one_or_none() is None:
+            await self.db.rollback()
+            return False
+
+        await self.db.execute(
+            delete(FeedItem).where(
+                FeedItem.user_id == subscriber_id, FeedItem.owner_id == owner_id
+            )
+        )
+        await self.db.commit()
+        return True
+
+    async def get_feed(
+        self, user_id: Any, limit: int = 20, cursor: Optional[Cursor] = None
+    ) -> Sequence[Row]:
+        """Страница ленты от новых постов к старым строками POST_ROW_FIELDS"""
+        params = {
+            "user_id": user_id,
+            "limit": limit,
+            "celebrity_threshold": self.config.celebrity_threshold,
+        }
+        if cursor is not None:
+            params.update(cursor_at=cursor.create_at, cursor_uuid=cursor.uuid)
+        result = await self.db.execute(FEED_QUERIES[cursor is not None], params)
+        return result.all()
+
+
+async def get_feed_reposetory(
+    db: AsyncSession = Depends(get_session),
+) -> FeedRepository:
+    return FeedRepository(db, settings.feed)
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence, cast
+
+from sqlalchemy import CursorResult, Row, and_, delete, exists, func, or_, select
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.media import Media, MediaJob
+
+
+class JobRepository:
+    """Очередь задач превью в таблице media_jobs"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def enqueue(self, media_id: Any) -> MediaJob:
+        """Добавить задачу в сессию; commit делает вызывающий, чтобы задача
+        появилась вместе с media"""
+        job = MediaJob(media_id=media_id, run_after=datetime.utcnow())
+        self.db.add(job)
+        return job
+
+    async def claim(self, limit: int, lease_seconds: float) -> Sequence[Row]:
+        """Забрать до limit задач вместе с данными их media.
+
+        Строки, которые уже забирает другой обработчик, пропускаются
+        (SKIP LOCKED), а не ждут его транзакции. Задача с истёкшим
+        locked_until считается брошенной и забирается снова
+        """
+        now = datetime.utcnow()
+        candidates = (
+            select(MediaJob.uuid)
+            .where(
+                MediaJob.run_after <= now,
+                or_(
+                    MediaJob.status == "pending",
+                    and_(MediaJob.status == "running", MediaJob.locked_until < now),
+                ),
+            )
+            .order_by(MediaJob.run_after)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            update(MediaJob)
+            .where(MediaJob.uuid.in_(candidates.scalar_subquery()))
+            .where(MediaJob.media_id == Media.uuid)
+            .values(
+                status="running",
+                attempts=MediaJob.attempts + 1,
+                locked_until=now + timedelta(seconds=lease_seconds),
+                started_at=now,
+            )
+            .returning(
+                MediaJob.uuid,
+                MediaJob.attempts,
+                Media.uuid.label("media_id"),
+                Media.sha256,
+                Media.storage_key,
+                Media.size,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        jobs = result.all()
+        await self.db.commit()
+        return jobs
+
+    async def finish(self, job_id: Any) -> None:
+        await self.db.execute(
+            update(MediaJob)
+            .where(MediaJob.uuid == job_id)
+            .values(
+                status="done",
+                finished_at=datetime.utcnow(),
+                locked_until=None,
+                error=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def fail(self, job_id: Any, error: str, retry_after: Optional[float]) -> None:
+        """Вернуть задачу в очередь через retry_after секунд или, если
+        retry_after None, пометить её неудавшейся"""
+        now = datetime.utcnow()
+        values: dict[str, Any] = {"error": error, "locked_until": None}
+        if retry_after is None:
+            values.update(status="failed", finished_at=now)
+        else:
+            values.update(
+                status="pending", run_after=now + timedelta(seconds=retry_after)
+            )
+        await self.db.execute(
+            update(MediaJob)
+            .where(MediaJob.uuid == job_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def delete_orphaned(self, limit: int) -> int:
+        """Удалить незавершённые задачи, чьё media уже удалено: claim их не
+        выбирает, и они навсегда остались бы в очереди"""
+        candidates = (
+            select(MediaJob.uuid)
+            .where(
+                MediaJob.status.in_(("pending", "running")),
+                ~exists().where(Media.uuid == MediaJob.media_id),
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            delete(MediaJob)
+            .where(MediaJob.uuid.in_(candidates.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        return cast(CursorResult, result).rowcount
+
+    async def stats(self, window_seconds: float) -> dict[str, Any]:
+        """Глубина очереди и задержки задач, завершённых за window_seconds.
+
+        wait - от постановки в очередь до готовности, processing - время
+        последней попытки
+        """
+        rows = await self.db.execute(
+            select(MediaJob.status, func.count())
+            .where(MediaJob.status.in_(("pending", "running")))
+            .group_by(MediaJob.status)
+        )
+        depth = {status: count for status, count in rows}
+
+        since = datetime.utcnow() - timedelta(seconds=window_seconds)
+        wait = func.extract("epoch", MediaJob.finished_at - MediaJob.create_at)
+        processing = func.extract("epoch", MediaJob.finished_at - MediaJob.started_at)
+        recent = (
+            await self.db.execute(
+                select(
+                    func.count().filter(MediaJob.status == "done"),
+                    func.count().filter(MediaJob.status == "failed"),
+                    func.percentile_cont(0.5).within_group(wait),
+                    func.percentile_cont(0.95).within_group(wait),
+                    func.percentile_cont(0.5).within_group(processing),
+                    func.percentile_cont(0.95).within_group(processing),
+                ).where(MediaJob.finished_at >= since)
+            )
+        ).one()
+
+        return {
+            "pending": depth.get("pending", 0),
+            "running": depth.get("running", 0),
+            "window_seconds": window_seconds,
+            "done": recent[0],
+            "failed": recent[1],
+            "wait_seconds_p50": recent[2],
+            "wait_seconds_p95": recent[3],
+            "processing_seconds_p50": recent[4],
+            "processing_seconds_p95": recent[5],
+        }
@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import Depends
+from sqlalchemy import Boolean, delete, exists, func, literal_column, or_, select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_session
+from src.models.media import Media, MediaBlob, MediaUpload
+from src.models.post import Posts
+
+
+class MediaRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_id(self, media_id: Any) -> Optional[Media]:
+        result = await self.db.execute(select(Media).where(Media.uuid == media_id))
+        return result.scalar_one_or_none()
+
+    async def get_upload(self, upload_id: Any) -> Optional[MediaUpload]:
+        result = await self.db.execute(
+            select(MediaUpload).where(MediaUpload.uuid == upload_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def create_upload(self, upload_data: dict) -> MediaUpload:
+        upload = MediaUpload(**upload_data)
+        self.db.add(upload)
+        await self.db.commit()
+        return upload
+
+    async def acquire_upload(
+        self, upload_id: Any, offset: int, lease_seconds: float
+    ) -> Optional[MediaUpload]:
+        """Захватить загрузку, если она стоит на offset и не занята.
+
+        Одним UPDATE, поэтому из двух параллельных запросов на одну позицию
+        загрузку получает только один
+        """
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            update(MediaUpload)
+            .where(
+                MediaUpload.uuid == upload_id,
+                MediaUpload.offset == offset,
+                or_(MediaUpload.lease_until.is_(None), MediaUpload.lease_until < now),
+            )
+            .values(lease_until=now + timedelta(seconds=lease_seconds))
+            .returning(MediaUpload)
+            .execution_options(populate_existing=True, synchronize_session=False)
+        )
+        upload = result.scalar_one_or_none()
+        await self.db.commit()
+        return upload
+
+    async def release_upload(self, upload_id: Any, offset: int, state: dict) -> None:
+        """Сохранить позицию и состояние хранилища и снять захват.
+
+        Вызывается и после ошибки в сессии, поэтому сначала откатывает
+        незавершённую транзакцию
+        """
+        await self.db.rollback()
+        await self.db.execute(
+            update(MediaUpload)
+            .where(MediaUpload.uuid == upload_id)
+            .values(offset=offset, storage_state=state, lease_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def attach_blob(
+        self, sha256: str, storage_key: str, size: int
+    ) -> tuple[str, bool]:
+        """Сослаться на блоб sha256, создав его из storage_key, если такого
+        содержимого ещё нет.
+
+        Возвращает ключ блоба и признак того, что блоб создан. Без commit,
+        как и finish_upload. Строка блоба остаётся заблокированной до
+        commit, поэтому сборщик мусора не удалит её между этим оператором
+        и появлением media
+        """
+        stmt = pg_insert(MediaBlob).values(
+            sha256=sha256, storage_key=storage_key, size=size, ref_count=1
+        )
+        result = await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[MediaBlob.sha256],
+                set_={
+                    "ref_count": MediaBlob.ref_count + 1,
+                    "update_at": datetime.utcnow(),
+                },
+            ).returning(
+                MediaBlob.storage_key,
+                # xmax = 0 только у строки, вставленной этим оператором
+                literal_column("xmax = 0", Boolean),
+            )
+        )
+        key, created = result.one()
+        return key, created
+
+    async def finish_upload(
+        self, upload: MediaUpload, sha256: str, storage_key: str
+    ) -> Media:
+        """Заменить загрузку записью media, ссылающейся на блоб storage_key.
+
+        Без commit: его делает создание поста в той же сессии, чтобы media
+        и пост появились вместе
+        """
+        media = Media(
+            uuid=upload.uuid,
+            filename=upload.filename,
+            content_type=upload.content_type,
+            size=upload.length,
+            sha256=sha256,
+            storage_key=storage_key,
+        )
+        self.db.add(media)
+        await self.db.execute(
+            delete(MediaUpload).where(MediaUpload.uuid == upload.uuid)
+        )
+        await self.db.flush()
+        return media
+
+    async def delete_upload(self, upload_id: Any) -> Optional[MediaUpload]:
+        """Удалить загрузку, если её сейчас никто не пишет"""
+        now = datetime.utcnow()
+        result = await self.db.execute(
+            delete(MediaUpload)
+            .where(
+                MediaUpload.uuid == upload_id,
+                or_(MediaUpload.lease_until.is_(None), MediaUpload.lease_until < now),
+            )
+            .returning(MediaUpload)
+            .execution_options(synchronize_session=False)
+        )
+        upload = result.scalar_one_or_none()
+        await self.db.commit()
+        return upload
+
+    async def release_orphaned_media(self, limit: int, older_than: datetime) -> int:
+        """Удалить до limit media, на которые не ссылается ни один пост, и
+        уменьшить счётчики их блобов. Одним оператором.
+
+        Так освобождаются файлы постов, у которых сменился media_id
+        """
+        orphans = (
+            select(Media.uuid)
+            .where(
+                Media.create_at < older_than,
+                ~exists().where(Posts.media_id == Media.uuid),
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("orphans")
+        )
+        released = (
+            delete(Media)
+            .where(Media.uuid.in_(select(orphans.c.uuid)))
+            .returning(Media.sha256)
+            .cte("released")
+        )
+        counts = (
+            select(released.c.sha256, func.count().label("count"))
+            .group_by(released.c.sha256)
+            .subquery("counts")
+        )
+        result = await self.db.execute(
+            update(MediaBlob)
+            .where(MediaBlob.sha256 == counts.c.sha256)
+            .values(ref_count=MediaBlob.ref_count - counts.c.count)
+            .returning(counts.c.count)
+            .execution_options(synchronize_session=False)
+        )
+        released_count = sum(count for (count,) in result)
+        await self.db.commit()
+        return released_count
+
+    async def delete_orphaned_blobs(
+        self, limit: int, older_than: datetime
+    ) -> list[tuple[str, str]]:
+        """Удалить до limit блобов без ссылок и вернуть их (sha256,
+        storage_key); объекты в хранилище удаляет вызывающий после commit.
+
+        older_than - счётчик обнулился раньше: блоб, который вот-вот снова
+        понадобится, не удаляется сразу
+        """
+        candidates = (
+            select(MediaBlob.sha256)
+            .where(
+                MediaBlob.ref_count <= 0,
+                MediaBlob.update_at < older_than,
+                ~exists().where(Media.sha256 == MediaBlob.sha256),
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            delete(MediaBlob)
+            .where(
+                MediaBlob.sha256.in_(candidates.scalar_subquery()),
+                # Повторная проверка после блокировки: attach_blob мог
+                # увеличить счётчик, пока строка ждала
+                MediaBlob.ref_count <= 0,
+            )
+            .returning(MediaBlob.sha256, MediaBlob.storage_key)
+            .execution_options(synchronize_session=False)
+        )
+        blobs = [tuple(row) for row in result]
+        await self.db.commit()
+        return blobs
+
+
+async def get_media_reposetory(
+    db: AsyncSession = Depends(get_session),
+) -> MediaRepository:
+    return MediaRepository(db)
@@ -0,0 +1,64 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import Select, literal, tuple_
+
+
+class Cursor(NamedTuple):
+    """Позиция в выдаче, упорядоченной по (create_at, uuid)"""
+
+    create_at: datetime
+    uuid: UUID
+
+
+def encode_cursor(create_at: datetime, uuid: UUID) -> str:
+    """Упаковать позицию в непрозрачную строку"""
+    raw = json.dumps([create_at.isoformat(), str(uuid)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Распаковать курсор. ValueError, если строка повреждена"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        create_at, uuid = json.loads(base64.urlsafe_b64decode(padded))
+        return Cursor(datetime.fromisoformat(create_at), UUID(uuid))
+    except (ValueError, TypeError, binascii.Error) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def paginate(
+    query: Select,
+    model: Any,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[Cursor] = None,
+) -> Select:
+    """Добавить к запросу сортировку и offset- либо keyset-пагинацию.
+
+    Keyset-режим сравнивает (create_at, uuid) как кортеж, поэтому Postgres
+    идёт по составному индексу сразу к нужной позиции, а не отбрасывает
+    все предыдущие строки, как при OFFSET.
+    """
+    query = query.order_by(model.create_at, model.uuid)
+
+    if cursor is not None:
+        return query.where(
+            tuple_(model.create_at, model.uuid)
+            > tuple_(literal(cursor.create_at), literal(cursor.uuid))
+        ).limit(limit)
+
+    return query.offset(skip).limit(limit)
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """Курсор на следующую страницу или None, если страница последняя"""
+    if not items or len(items) < limit:
+        return None
+
+    last = items[-1]
+    return encode_cursor(last.create_at, last.uuid)
@@ -1,194 +1,634 @@
+import json
+from datetime import datetime
 from uuid import UUID
-from typing import List, Optional, Any
+from typing import AsyncIterator, List, Optional, Any, Sequence
 
 from fastapi import Depends
-from sqlalchemy import select, delete, update
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import Row, RowMapping, Select, select, delete, update, text
+from sqlalchemy import select, and_, or_, func, any_, bindparam, exists
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.sql import ColumnElement
+
+from src.cache import CacheBackend, NullCache, get_cache
+from src.cache.codec import dumps, entity_from_dict, entity_to_dict, loads
+from src.cache.keys import category_key, post_key, post_keys, post_media_key
+from src.models.category import Category
+from src.models.counter import PostCounter
+from src.models.media import Media, MediaBlob
 from src.models.post import Posts
 from src.database import get_session
+from src.repositories.pagination import Cursor, paginate
+from src.repositories.search import search_clause
+from src.schemas.post_schema import BulkConflict
+from src.schemas.search_schema import SearchMode, SearchOrder
+
+
+COUNTER_UNCATEGORIZED = "uncategorized"
+COUNTER_CATEGORY_PREFIX = "category:"
+
+# Строк в одном INSERT при пакетной вставке
+BULK_CHUNK_SIZE = 1000
+# Строк, которые выгрузка держит в памяти за раз
+EXPORT_BATCH_SIZE = 1000
+
+# Поля PostResponse в порядке столбцов строки в режиме rows=True;
+# следом идут has_previews для previews и create_at, нужный для курсора
+POST_ROW_FIELDS = (
+    "uuid",
+    "media_id",
+    "desc",
+    "category_id",
+    "owner_id",
+    "comment_count",
+)
 
 
 class PostRepository:
-    def __init__(self, db: AsyncSession):
-        self.db = db
+    """Репозиторий постов.
 
-    async def get_by_id(self, post_id: Any) -> Optional[Posts]:
+    get_by_id, get_by_id_with_category и get_by_media_id читают через кэш
+    и возвращают transient-объекты при попадании, поэтому изменяющие
+    методы загружают пост мимо кэша и сбрасывают его ключи после commit.
+    Категория поста кэшируется под своим ключом, а не вместе с постом:
+    изменение категории сбрасывает один ключ.
+    """
+
+    def __init__(self, db: AsyncSession, cache: Optional[CacheBackend] = None):
+        self.db = db
+        self.cache = cache or NullCache()
+
+    async def _read_through(self, key, load):
+        if key is None:
+            return await load()
+
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return entity_from_dict(Posts, loads(cached))
+
+        value = await load()
+        if value is not None:
+            # add не перезапишет ключ, сброшенный, пока шло чтение
+            await self.cache.add(key, dumps(entity_to_dict(value)))
+        return value
+
+    async def _invalidate(self, *posts: Sequence[Any]) -> None:
+        """Сбросить кэш по парам (uuid, media_id)"""
+        keys = [
+            key for post_id, media_id in posts for key in post_keys(post_id, media_id)
+        ]
+        if keys:
+            await self.cache.delete(*keys)
+
+    async def _fetch_by_id(self, post_id: Any) -> Optional[Posts]:
         result = await self.db.execute(select(Posts).where(Posts.uuid == post_id))
         return result.scalar_one_or_none()
 
-    async def get_by_id_with_category(self, post_id: Any) -> Optional[Posts]:
-        """Получить пост с категорией"""
+    async def _fetch_by_id_with_category(self, post_id: Any) -> Optional[Posts]:
         result = await self.db.execute(
             select(Posts)
-            .options(selectinload(Posts.category))
+            .options(joinedload(Posts.category))
             .where(Posts.uuid == post_id)
         )
         return result.scalar_one_or_none()
 
-    async def get_by_media_id(self, media_id: Any) -> Optional[Posts]:
+    async def _fetch_by_media_id(self, media_id: Any) -> Optional[Posts]:
         result = await self.db.execute(select(Posts).where(Posts.media_id == media_id))
         return result.scalar_one_or_none()
 
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Posts]:
-        result = await self.db.execute(select(Posts).offset(skip).limit(limit))
-        return result.scalars().all()
+    async def get_by_id(self, post_id: Any) -> Optional[Posts]:
+        return await self._read_through(
+            post_key(post_id), lambda: self._fetch_by_id(post_id)
+        )
+
+    async def _cached_with_category(self, key: str) -> Optional[Posts]:
+        """Пост с категорией из кэша, если там есть и пост, и его категория"""
+        cached = await self.cache.get(key)
+        if cached is None:
+            return None
+        post = entity_from_dict(Posts, loads(cached))
+        if post.category_id is None:
+            post.category = None
+            return post
+
+        category_cache_key = category_key(post.category_id)
+        cached_category = (
+            None
+            if category_cache_key is None
+            else await self.cache.get(category_cache_key)
+        )
+        if cached_category is None:
+            return None
+        post.category = entity_from_dict(Category, loads(cached_category))
+        return post
+
+    async def get_by_id_with_category(self, post_id: Any) -> Optional[Posts]:
+        """Получить пост с категорией"""
+        key = post_key(post_id)
+        if key is None:
+            return await self._fetch_by_id_with_category(post_id)
+
+        post = await self._cached_with_category(key)
+        if post is not None:
+            return post
+
+        post = await self._fetch_by_id_with_category(post_id)
+        if post is not None:
+            await self.cache.add(key, dumps(entity_to_dict(post)))
+            category_cache_key = category_key(post.category_id)
+            if post.category is not None and category_cache_key is not None:
+                await self.cache.add(
+                    category_cache_key, dumps(entity_to_dict(post.category))
+                )
+        return post
+
+    async def get_by_media_id(self, media_id: Any) -> Optional[Posts]:
+        return await self._read_through(
+            post_media_key(media_id), lambda: self._fetch_by_media_id(media_id)
+        )
+
+    # Версии для ETag: читаются из базы мимо кэша
+    async def get_version(self, post_id: Any) -> Optional[Row]:
+        result = await self.db.execute(
+            select(Posts.uuid, Posts.update_at).where(Posts.uuid == post_id)
+        )
+        return result.one_or_none()
+
+    async def get_version_with_category(self, post_id: Any) -> Optional[Row]:
+        result = await self.db.execute(
+            select(Posts.uuid, Posts.update_at, Category.uuid, Category.update_at)
+            .outerjoin(Category, Posts.category_id == Category.uuid)
+            .where(Posts.uuid == post_id)
+        )
+        return result.one_or_none()
+
+    async def get_version_by_media_id(self, media_id: Any) -> Optional[Row]:
+        result = await self.db.execute(
+            select(Posts.uuid, Posts.update_at).where(Posts.media_id == media_id)
+        )
+        return result.one_or_none()
+
+    @staticmethod
+    def _select(rows: bool) -> Select:
+        """select(Posts) или, для rows=True, только столбцы POST_ROW_FIELDS.
+
+        Строки не проходят через identity map и не становятся ORM-объектами,
+        поэтому для больших страниц они заметно дешевле
+        """
+        if rows:
+            columns = [getattr(Posts, name) for name in POST_ROW_FIELDS]
+            return select(*columns, Posts.has_previews, Posts.create_at)
+        return select(Posts)
+
+    async def _fetch_list(self, query: Select, rows: bool) -> Sequence[Any]:
+        result = await self.db.execute(query)
+        return result.all() if rows else result.scalars().all()
+
+    async def get_all(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        rows: bool = False,
+    ) -> Sequence[Any]:
+        return await self._fetch_list(
+            paginate(self._select(rows), Posts, skip, limit, cursor), rows
+        )
 
     async def get_all_with_category(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, cursor: Optional[Cursor] = None
     ) -> List[Posts]:
         """Получить все посты с категориями"""
         result = await self.db.execute(
-            select(Posts)
-            .options(selectinload(Posts.category))
-            .offset(skip)
-            .limit(limit)
+            paginate(
+                select(Posts).options(selectinload(Posts.category)),
+                Posts,
+                skip,
+                limit,
+                cursor,
+            )
         )
         return result.scalars().all()
 
-    async def create(self, post_data: dict) -> Posts:
-        """Создать новый пост"""
-        post = Posts(**post_data)
-        self.db.add(post)
-        await self.db.commit()
-        await self.db.refresh(post)
+    async def create(self, post_data: dict, commit: bool = True) -> Posts:
+        """Создать новый пост.
+
+        commit=False оставляет транзакцию открытой, чтобы вызывающий
+        записал вместе с постом связанные строки (ленты подписчиков)
+        """
+        result = await self.db.execute(
+            pg_insert(Posts)
+            .values(**post_data)
+            .returning(Posts)
+            .execution_options(populate_existing=True)
+        )
+        post = result.scalar_one()
+        if commit:
+            await self.db.commit()
         return post
 
     async def update(self, post_id: Any, update_data: dict) -> Optional[Posts]:
-        post = await self.get_by_id(post_id)
-        if not post:
-            return None
-
-        for key, value in update_data.items():
-            setattr(post, key, value)
+        """Обновить пост одним UPDATE ... RETURNING.
+
+        Если меняется media_id, старое значение нужно для сброса кэша: оно
+        берётся из подзапроса FOR UPDATE в том же операторе.
+        """
+        stmt = update(Posts).values(**update_data)
+
+        if "media_id" in update_data:
+            old = (
+                select(Posts.uuid, Posts.media_id)
+                .where(Posts.uuid == post_id)
+                .with_for_update()
+                .subquery("old")
+            )
+            stmt = stmt.where(Posts.uuid == old.c.uuid).returning(Posts, old.c.media_id)
+        else:
+            stmt = stmt.where(Posts.uuid == post_id).returning(Posts, Posts.media_id)
 
+        result = await self.db.execute(
+            stmt.execution_options(populate_existing=True, synchronize_session=False)
+        )
+        row = result.one_or_none()
         await self.db.commit()
-        await self.db.refresh(post)
+        if row is None:
+            return None
+
+        post, old_media_id = row
+        await self._invalidate((post.uuid, old_media_id), (post.uuid, post.media_id))
         return post
 
     async def delete(self, post_id: Any) -> bool:
-        post = await self.get_by_id(post_id)
-        if post:
-            await self.db.delete(post)
-            await self.db.commit()
-            return True
-        return False
+        """Удалить пост вместе с его media и уменьшить счётчик ссылок блоба.
+
+        Одним оператором: удаления идут в CTE, итоговый SELECT возвращает
+        удалённый пост. Сам блоб, если ссылок не осталось, удалит сборщик
+        мусора
+        """
+        deleted_post = (
+            delete(Posts)
+            .where(Posts.uuid == post_id)
+            .returning(Posts.uuid, Posts.media_id)
+            .cte("deleted_post")
+        )
+        released = (
+            delete(Media)
+            .where(Media.uuid.in_(select(deleted_post.c.media_id)))
+            .returning(Media.sha256)
+            .cte("released_media")
+        )
+        # У поста не больше одного media, поэтому счётчик уменьшается на 1.
+        # onupdate для UPDATE внутри CTE не подставляется, а по update_at
+        # сборщик мусора отсчитывает, сколько блоб уже без ссылок
+        decremented = (
+            update(MediaBlob)
+            .where(MediaBlob.sha256.in_(select(released.c.sha256)))
+            .values(ref_count=MediaBlob.ref_count - 1, update_at=datetime.utcnow())
+            .cte("decremented_blob")
+        )
+        result = await self.db.execute(
+            select(deleted_post.c.uuid, deleted_post.c.media_id).add_cte(decremented)
+        )
+        deleted = result.one_or_none()
+        await self.db.commit()
+        if deleted is None:
+            return False
+
+        await self._invalidate(deleted)
+        return True
 
     async def search_by_description(
-        self, desc_pattern: str, skip: int = 0, limit: int = 100
-    ) -> List[Posts]:
-        result = await self.db.execute(
-            select(Posts)
-            .where(Posts.desc.ilike(f"%{desc_pattern}%"))
-            .offset(skip)
-            .limit(limit)
+        self,
+        desc_pattern: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        mode: SearchMode = SearchMode.substring,
+        order: SearchOrder = SearchOrder.relevance,
+        rows: bool = False,
+    ) -> Sequence[Any]:
+        return await self._fetch_list(
+            self._search(
+                self._select(rows), desc_pattern, mode, order, skip, limit, cursor
+            ),
+            rows,
         )
-        return result.scalars().all()
 
     async def search_by_description_with_category(
-        self, desc_pattern: str, skip: int = 0, limit: int = 100
+        self,
+        desc_pattern: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        mode: SearchMode = SearchMode.substring,
+        order: SearchOrder = SearchOrder.relevance,
     ) -> List[Posts]:
         """Поиск постов с категориями"""
         result = await self.db.execute(
-            select(Posts)
-            .options(selectinload(Posts.category))
-            .where(Posts.desc.ilike(f"%{desc_pattern}%"))
+            self._search(
+                select(Posts).options(selectinload(Posts.category)),
+                desc_pattern,
+                mode,
+                order,
+                skip,
+                limit,
+                cursor,
+            )
+        )
+        return result.scalars().all()
+
+    @staticmethod
+    def _search(
+        query: Select,
+        desc_pattern: str,
+        mode: SearchMode,
+        order: SearchOrder,
+        skip: int,
+        limit: int,
+        cursor: Optional[Cursor],
+    ) -> Select:
+        condition, rank = search_clause(Posts.desc, Posts.desc_tsv, desc_pattern, mode)
+        query = query.where(condition)
+
+        if order == SearchOrder.recent:
+            return paginate(query, Posts, skip, limit, cursor)
+
+        return (
+            query.order_by(rank.desc(), Posts.create_at, Posts.uuid)
             .offset(skip)
             .limit(limit)
         )
-        return result.scalars().all()
 
     # Работа с категориями
     async def get_by_category_id(
-        self, category_id: Any, skip: int = 0, limit: int = 100
-    ) -> List[Posts]:
+        self,
+        category_id: Any,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        rows: bool = False,
+    ) -> Sequence[Any]:
         """Получить посты по категории"""
-        result = await self.db.execute(
-            select(Posts)
-            .where(Posts.category_id == category_id)
-            .offset(skip)
-            .limit(limit)
+        return await self._fetch_list(
+            paginate(
+                self._select(rows).where(Posts.category_id == category_id),
+                Posts,
+                skip,
+                limit,
+                cursor,
+            ),
+            rows,
         )
-        return result.scalars().all()
 
     async def get_by_category_id_with_category(
-        self, category_id: Any, skip: int = 0, limit: int = 100
+        self,
+        category_id: Any,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
     ) -> List[Posts]:
         """Получить посты по категории с загрузкой категорий"""
         result = await self.db.execute(
-            select(Posts)
-            .where(Posts.category_id == category_id)
-            .options(selectinload(Posts.category))
-            .offset(skip)
-            .limit(limit)
+            paginate(
+                select(Posts)
+                .where(Posts.category_id == category_id)
+                .options(selectinload(Posts.category)),
+                Posts,
+                skip,
+                limit,
+                cursor,
+            )
         )
         return result.scalars().all()
 
     async def get_posts_without_category(
-        self, skip: int = 0, limit: int = 100
-    ) -> List[Posts]:
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Cursor] = None,
+        rows: bool = False,
+    ) -> Sequence[Any]:
         """Получить посты без категории"""
-        result = await self.db.execute(
-            select(Posts).where(Posts.category_id.is_(None)).offset(skip).limit(limit)
+        return await self._fetch_list(
+            paginate(
+                self._select(rows).where(Posts.category_id.is_(None)),
+                Posts,
+                skip,
+                limit,
+                cursor,
+            ),
+            rows,
         )
-        return result.scalars().all()
 
     async def assign_category(self, post_id: Any, category_id: Any) -> Optional[Posts]:
         """Назначить категорию посту"""
-        post = await self.get_by_id(post_id)
-        if post:
-            post.category_id = category_id
-            await self.db.commit()
-            await self.db.refresh(post)
-        return post
+        return await self.update(post_id, {"category_id": category_id})
 
     async def remove_category(self, post_id: Any) -> Optional[Posts]:
         """Убрать категорию у поста"""
-        post = await self.get_by_id(post_id)
-        if post:
-            post.category_id = None
-            await self.db.commit()
-            await self.db.refresh(post)
-        return post
+        return await self.update(post_id, {"category_id": None})
 
     # Проверки
     async def exists_by_id(self, post_id: Any) -> bool:
-        post = await self.get_by_id(post_id)
-        return post is not None
+        return bool(await self.db.scalar(select(exists().where(Posts.uuid == post_id))))
 
     async def exists_by_media_id(self, media_id: Any) -> bool:
-        post = await self.get_by_media_id(media_id)
-        return post is not None
+        return bool(
+            await self.db.scalar(select(exists().where(Posts.media_id == media_id)))
+        )
 
     # Статистика
+    async def _get_counter(self, scope: str) -> int:
+        result = await self.db.execute(
+            select(func.sum(PostCounter.count)).where(PostCounter.scope == scope)
+        )
+        # sum(bigint) в Postgres - numeric, asyncpg отдаёт Decimal
+        return int(result.scalar() or 0)
+
     async def get_count(self) -> int:
-        """Получить общее количество постов"""
-        result = await self.db.execute(select(func.count(Posts.uuid)))
-        return result.scalar()
+        """Получить общее количество постов.
+
+        Отдельного общего счётчика нет, чтобы все вставки не ждали одну
+        строку: сумма по всем слотам категорий и uncategorized
+        """
+        result = await self.db.execute(select(func.sum(PostCounter.count)))
+        return int(result.scalar() or 0)
 
     async def get_count_by_category(self, category_id: Any) -> int:
         """Получить количество постов в категории"""
+        # Триггер пишет category_id::text - uuid в каноническом виде
+        try:
+            canonical = UUID(str(category_id))
+        except ValueError:
+            return 0
+        return await self._get_counter(f"{COUNTER_CATEGORY_PREFIX}{canonical}")
+
+    async def get_count_without_category(self) -> int:
+        """Получить количество постов без категории"""
+        return await self._get_counter(COUNTER_UNCATEGORIZED)
+
+    async def get_count_by_description(
+        self, desc_pattern: str, mode: SearchMode = SearchMode.substring
+    ) -> int:
+        """Точное количество постов, подходящих под поиск по описанию"""
         result = await self.db.execute(
-            select(func.count(Posts.uuid)).where(Posts.category_id == category_id)
+            select(func.count())
+            .select_from(Posts)
+            .where(*self._filters(desc_pattern=desc_pattern, search_mode=mode))
         )
         return result.scalar()
 
+    async def estimate_count(
+        self,
+        category_id: Any = None,
+        without_category: bool = False,
+        desc_pattern: Optional[str] = None,
+        search_mode: SearchMode = SearchMode.substring,
+    ) -> int:
+        """Оценка количества постов по статистике планировщика"""
+        criteria = self._filters(
+            category_id, without_category, desc_pattern, search_mode
+        )
+
+        if not criteria:
+            result = await self.db.execute(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE oid = 'posts'::regclass"
+                )
+            )
+            estimate = result.scalar()
+            # -1 - таблица ещё ни разу не анализировалась
+            if estimate is not None and estimate >= 0:
+                return estimate
+
+        connection = await self.db.connection()
+        compiled = (
+            select(Posts.uuid)
+            .where(*criteria)
+            .compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True})
+        )
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+        plan: Any = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    @staticmethod
+    def _filters(
+        category_id: Any = None,
+        without_category: bool = False,
+        desc_pattern: Optional[str] = None,
+        search_mode: SearchMode = SearchMode.substring,
+    ) -> list:
+        criteria: list[ColumnElement[bool]] = []
+        if without_category:
+            criteria.append(Posts.category_id.is_(None))
+        elif category_id is not None:
+            criteria.append(Posts.category_id == category_id)
+        if desc_pattern is not None:
+            condition, _ = search_clause(
+                Posts.desc, Posts.desc_tsv, desc_pattern, search_mode
+            )
+            criteria.append(condition)
+        return criteria
+
+    # Выгрузка
+    async def stream_export(
+        self,
+        with_category: bool = False,
+        category_id: Any = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[Sequence[RowMapping]]:
+        """Выдавать посты пачками строк через серверный курсор.
+
+        ORM-объекты не создаются, в памяти одновременно не больше
+        batch_size строк независимо от размера таблицы.
+        """
+        query = select(
+            Posts.uuid,
+            Posts.media_id,
+            Posts.desc,
+            Posts.category_id,
+            Posts.owner_id,
+            Posts.create_at,
+            Posts.update_at,
+        )
+        if with_category:
+            query = query.add_columns(
+                Category.name.label("category_name"),
+                Category.desc.label("category_desc"),
+            ).outerjoin(Category, Category.uuid == Posts.category_id)
+
+        if category_id is not None:
+            query = query.where(Posts.category_id == category_id)
+        if created_from is not None:
+            query = query.where(Posts.create_at >= created_from)
+        if created_to is not None:
+            query = query.where(Posts.create_at < created_to)
+
+        result = await self.db.stream(
+            query.order_by(Posts.create_at, Posts.uuid).execution_options(
+                yield_per=batch_size
+            )
+        )
+        async for batch in result.mappings().partitions():
+            yield batch
+
     # Пакетные операции
-    async def create_many(self, posts_data: List[dict]) -> List[Posts]:
-        """Создать несколько постов"""
-        posts = []
-        for data in posts_data:
-            post = Posts(**data)
-            posts.append(post)
-            self.db.add(post)
+    async def get_existing_media_ids(self, media_ids: List[Any]) -> set[UUID]:
+        """Какие из media_id уже заняты - одним запросом"""
+        result = await self.db.execute(
+            select(Posts.media_id).where(
+                Posts.media_id
+                == any_(bindparam("media_ids", media_ids, type_=ARRAY(PG_UUID)))
+            )
+        )
+        return set(result.scalars().all())
+
+    async def create_many(
+        self,
+        posts_data: List[dict],
+        on_conflict: BulkConflict = BulkConflict.error,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[Posts]:
+        """Создать несколько постов.
+
+        Каждая пачка из chunk_size строк - один INSERT ... RETURNING;
+        все пачки вставляются в одной транзакции. При конфликте по
+        media_id: error - IntegrityError, skip - строка пропускается и не
+        попадает в результат, update - обновляются desc и category_id.
+        """
+        stmt = pg_insert(Posts)
+        if on_conflict == BulkConflict.skip:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Posts.media_id])
+        elif on_conflict == BulkConflict.update:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Posts.media_id],
+                set_={
+                    "desc": stmt.excluded.desc,
+                    "category_id": stmt.excluded.category_id,
+                    "update_at": datetime.utcnow(),
+                },
+            )
+        returning = stmt.returning(Posts).execution_options(populate_existing=True)
+
+        posts: list[Posts] = []
+        for start in range(0, len(posts_data), chunk_size):
+            result = await self.db.scalars(
+                returning, posts_data[start : start + chunk_size]
+            )
+            posts.extend(result.all())
 
         await self.db.commit()
 
-        # Refresh всех созданных постов
-        for post in posts:
-            await self.db.refresh(post)
+        if on_conflict == BulkConflict.update:
+            await self._invalidate(*((post.uuid, post.media_id) for post in posts))
 
         return posts
 
@@ -197,16 +637,20 @@ class PostRepository:
     ) -> bool:
         """Обновить категорию для нескольких постов"""
 
-        await self.db.execute(
+        result = await self.db.execute(
             update(Posts)
             .where(Posts.uuid.in_(post_ids))
             .values(category_id=category_id)
+            .returning(Posts.uuid, Posts.media_id)
         )
+        updated = result.all()
         await self.db.commit()
+        await self._invalidate(*updated)
         return True
 
 
 async def get_post_reposetory(
     db: AsyncSession = Depends(get_session),
+    cache: CacheBackend = Depends(get_cache),
 ) -> PostRepository:
-    return PostRepository(db)
+    return PostRepository(db, cache)
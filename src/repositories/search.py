@@ -0,0 +1,50 @@
+import re
+from typing import Any
+
+from sqlalchemy import false, func, literal, literal_column
+from sqlalchemy.sql import ColumnElement
+
+from src.schemas.search_schema import SearchMode
+
+
+# Конфигурация text search: без стемминга, одинаково для любого языка.
+# Должна совпадать с выражением сгенерированного столбца posts.desc_tsv
+TS_CONFIG = "simple"
+
+_ts_config: ColumnElement[Any] = literal_column(f"'{TS_CONFIG}'::regconfig")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def escape_like(value: str) -> str:
+    """Экранировать спецсимволы LIKE, чтобы искать строку буквально"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def prefix_tsquery(query: str) -> str:
+    """'кот мур' -> 'кот:* & мур:*'"""
+    return " & ".join(f"{word}:*" for word in _WORD_RE.findall(query.lower()))
+
+
+def search_clause(
+    text_column: Any, tsv_column: Any, query: str, mode: SearchMode
+) -> tuple[ColumnElement, ColumnElement]:
+    """Условие поиска и выражение релевантности для выбранного режима.
+
+    substring - ILIKE по GIN-индексу gin_trgm_ops, релевантность по
+    word_similarity; fulltext и prefix - tsvector @@ tsquery по GIN-индексу
+    и ранжирование ts_rank_cd.
+    """
+    if mode == SearchMode.substring:
+        condition = text_column.ilike(f"%{escape_like(query)}%", escape="\\")
+        return condition, func.word_similarity(query, text_column)
+
+    if mode == SearchMode.fulltext:
+        tsquery = func.websearch_to_tsquery(_ts_config, query)
+    else:
+        terms = prefix_tsquery(query)
+        if not terms:
+            return false(), literal(0.0)
+        tsquery = func.to_tsquery(_ts_config, terms)
+
+    return tsv_column.op("@@")(tsquery), func.ts_rank_cd(tsv_column, tsquery)
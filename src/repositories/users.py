@@ -0,0 +1,52 @@
+from typing import Any, Optional
+
+from fastapi import Depends
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_session
+from src.models.user import User
+
+
+class UserRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create(self, user_data: dict) -> User:
+        """Создать пользователя; IntegrityError, если логин занят"""
+        result = await self.db.execute(
+            pg_insert(User)
+            .values(**user_data)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalar_one()
+        await self.db.commit()
+        return user
+
+    async def get_by_id(self, user_id: Any) -> Optional[User]:
+        result = await self.db.execute(select(User).where(User.uuid == user_id))
+        return result.scalar_one_or_none()
+
+    async def get_by_login(self, login: str) -> Optional[User]:
+        result = await self.db.execute(select(User).where(User.login == login))
+        return result.scalar_one_or_none()
+
+    async def set_password_hash(
+        self, user_id: Any, password_hash: str, commit: bool = True
+    ) -> None:
+        await self.db.execute(
+            update(User)
+            .where(User.uuid == user_id)
+            .values(password_hash=password_hash)
+            .execution_options(synchronize_session=False)
+        )
+        if commit:
+            await self.db.commit()
+
+
+async def get_user_reposetory(
+    db: AsyncSession = Depends(get_session),
+) -> UserRepository:
+    return UserRepository(db)
@@ -0,0 +1,41 @@
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class UserCreate(BaseModel):
+    login: str = Field(min_length=3, max_length=64)
+    password: str = Field(min_length=8, max_length=128)
+    first_name: str = Field(min_length=1, max_length=128)
+    last_name: str = Field(min_length=1, max_length=128)
+
+
+class UserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    uuid: UUID
+    login: str
+    first_name: str
+    last_name: str
+
+
+class LoginRequest(BaseModel):
+    login: str
+    password: str = Field(max_length=128)
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class PasswordChange(BaseModel):
+    old_password: str = Field(max_length=128)
+    new_password: str = Field(min_length=8, max_length=128)
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    # Время жизни access-токена, секунды
+    expires_in: int
@@ -1,3 +1,4 @@
+from datetime import datetime
 from uuid import UUID
 from typing import Optional
 
@@ -23,3 +24,20 @@ class CategoryResponse(CategoryBase):
 
     class Config:
         from_attributes = True
+
+
+class CategoryStatsResponse(BaseModel):
+    category_id: UUID
+    name: str
+    post_count: int
+    # Постов с загруженным файлом
+    media_count: int
+    first_post_at: Optional[datetime] = None
+    latest_post_at: Optional[datetime] = None
+    last_activity_at: Optional[datetime] = None
+
+
+class CategoryStatsListResponse(BaseModel):
+    categories: list[CategoryStatsResponse]
+    # Когда пересчитывалась статистика; None, если категорий нет
+    refreshed_at: Optional[datetime] = None
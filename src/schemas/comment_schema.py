@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class CommentCreate(BaseModel):
+    body: str = Field(min_length=1, max_length=4000)
+
+
+class CommentUpdate(CommentCreate):
+    pass
+
+
+class CommentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    uuid: UUID
+    post_id: UUID
+    parent_id: Optional[UUID] = None
+    author_id: UUID
+    body: str
+    create_at: datetime
+    update_at: datetime
+
+
+class CommentListResponse(BaseModel):
+    comments: list[CommentResponse]
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class PostCommentsPreview(BaseModel):
+    post_id: UUID
+    comment_count: int
+    comments: list[CommentResponse]
+    # Продолжение ветки через GET /comments/posts/{post_id}
+    next_cursor: Optional[str] = None
+
+
+class CommentBatchResponse(BaseModel):
+    posts: list[PostCommentsPreview]
@@ -0,0 +1,11 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.schemas.post_schema import PostResponse
+
+
+class FeedResponse(BaseModel):
+    posts: list[PostResponse]
+    limit: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,40 @@
+from datetime import datetime
+from uuid import UUID
+
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class UploadCreate(BaseModel):
+    filename: Optional[str] = None
+    content_type: str = "application/octet-stream"
+    # Полный размер файла в байтах
+    length: int = Field(gt=0)
+
+
+class UploadResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    uuid: UUID
+    filename: Optional[str] = None
+    content_type: str
+    length: int
+    offset: int
+
+
+class UploadComplete(BaseModel):
+    """Поля поста, который создаётся для загруженного файла"""
+
+    desc: str = ""
+    category_id: UUID | None = None
+
+
+class MediaResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    uuid: UUID
+    filename: Optional[str] = None
+    content_type: str
+    size: int
+    sha256: str
+    create_at: datetime
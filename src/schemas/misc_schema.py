@@ -1,6 +1,32 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
 class HelthCheckSchema(BaseModel):
     status: str
     version: str
+
+
+class PoolStatsSchema(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    acquired: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class PreviewQueueStatsSchema(BaseModel):
+    pending: int
+    running: int
+    window_seconds: float
+    done: int
+    failed: int
+    wait_seconds_p50: Optional[float] = None
+    wait_seconds_p95: Optional[float] = None
+    processing_seconds_p50: Optional[float] = None
+    processing_seconds_p95: Optional[float] = None
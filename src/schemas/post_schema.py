@@ -1,9 +1,13 @@
+from enum import Enum
 from uuid import UUID
 
 from typing import Optional, Any
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+
+from src.previews import preview_urls
 
 from src.schemas.category_schema import CategoryResponse
+from src.schemas.search_schema import SearchMode, SearchOrder
 
 
 # Базовые схемы
@@ -30,6 +34,16 @@ class PostResponse(PostBase):
     )
 
     uuid: UUID
+    owner_id: Optional[UUID] = None
+    comment_count: int = 0
+    has_previews: Optional[bool] = Field(False, exclude=True)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def previews(self) -> dict[str, str]:
+        """Адреса превью по размерам; 404, пока превью не построены, и
+        пусто, если media не изображение"""
+        return preview_urls(self.media_id, bool(self.has_previews))
 
 
 class PostWithCategoryResponse(PostResponse):
@@ -37,18 +51,28 @@ class PostWithCategoryResponse(PostResponse):
 
 
 # Схемы для списков
+class TotalMode(str, Enum):
+    """Способ подсчёта total в списках"""
+
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
 class PostListResponse(BaseModel):
     posts: list[PostResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 class PostWithCategoryListResponse(BaseModel):
     posts: list[PostWithCategoryResponse]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 # Схемы для статистики
@@ -66,9 +90,27 @@ class PostSearchParams(BaseModel):
     desc_pattern: str
     skip: int = 0
     limit: int = 100
+    cursor: Optional[str] = None
+    total: TotalMode = TotalMode.exact
+    mode: SearchMode = SearchMode.substring
+    order: SearchOrder = SearchOrder.relevance
+
+
+# Схема для выгрузки
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
 
 
 # Схема для пакетных операций
+class BulkConflict(str, Enum):
+    """Что делать с постом, media_id которого уже занят"""
+
+    error = "error"
+    skip = "skip"
+    update = "update"
+
+
 class BulkAssignCategory(BaseModel):
     post_ids: list[UUID]
     category_id: UUID
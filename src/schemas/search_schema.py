@@ -0,0 +1,16 @@
+from enum import Enum
+
+
+class SearchMode(str, Enum):
+    """Режим поиска по тексту"""
+
+    substring = "substring"
+    fulltext = "fulltext"
+    prefix = "prefix"
+
+
+class SearchOrder(str, Enum):
+    """Порядок результатов поиска"""
+
+    relevance = "relevance"
+    recent = "recent"
@@ -0,0 +1,181 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+from src.auth import (
+    AccessClaims,
+    PasswordHasher,
+    RevocationCache,
+    TokenCodec,
+    get_password_hasher,
+    get_revocation_cache,
+    get_token_codec,
+)
+from src.configs.app import AuthConfig, settings
+from src.models.user import User
+from src.repositories.auth_sessions import (
+    AuthSessionRepository,
+    get_auth_session_reposetory,
+)
+from src.repositories.users import UserRepository, get_user_reposetory
+from src.schemas.auth_schema import (
+    LoginRequest,
+    PasswordChange,
+    TokenResponse,
+    UserCreate,
+)
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _new_refresh_token() -> tuple[str, str]:
+    """Случайный refresh-токен и его sha256 для хранения в базе"""
+    token = secrets.token_urlsafe(32)
+    return token, hashlib.sha256(token.encode()).hexdigest()
+
+
+class AuthService:
+    def __init__(
+        self,
+        users: UserRepository,
+        sessions: AuthSessionRepository,
+        hasher: PasswordHasher,
+        codec: TokenCodec,
+        revocations: RevocationCache,
+        config: AuthConfig,
+    ):
+        self.users = users
+        self.sessions = sessions
+        self.hasher = hasher
+        self.codec = codec
+        self.revocations = revocations
+        self.config = config
+
+    def _refresh_expires_at(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.config.refresh_ttl_seconds)
+
+    def _tokens(
+        self, user_id: Any, session_id: Any, refresh_token: str
+    ) -> TokenResponse:
+        access_token, expires_in = self.codec.issue(user_id, session_id)
+        return TokenResponse(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_in=expires_in,
+        )
+
+    async def _open_session(self, user_id: Any) -> TokenResponse:
+        refresh_token, token_hash = _new_refresh_token()
+        session_id = await self.sessions.create(
+            user_id, token_hash, self._refresh_expires_at()
+        )
+        return self._tokens(user_id, session_id, refresh_token)
+
+    async def register(self, user_data: UserCreate) -> User:
+        """Зарегистрировать пользователя"""
+        values = user_data.model_dump(exclude={"password"})
+        values["password_hash"] = await self.hasher.hash(user_data.password)
+        try:
+            return await self.users.create(values)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="User with this login already exists",
+            )
+
+    async def login(self, credentials: LoginRequest) -> TokenResponse:
+        """Проверить логин и пароль и открыть новую сессию"""
+        user = await self.users.get_by_login(credentials.login)
+        if user is None:
+            # Заглушку проверяем всё равно, чтобы по времени ответа нельзя
+            # было узнать, есть ли такой логин
+            await self.hasher.verify(None, credentials.password)
+            raise _unauthorized("Invalid login or password")
+        if not await self.hasher.verify(user.password_hash, credentials.password):
+            raise _unauthorized("Invalid login or password")
+
+        # Хэш со старыми параметрами argon2 обновляется, пока пароль известен
+        if self.hasher.needs_rehash(user.password_hash):
+            await self.users.set_password_hash(
+                user.uuid, await self.hasher.hash(credentials.password), commit=False
+            )
+        return await self._open_session(user.uuid)
+
+    async def refresh(self, refresh_token: str) -> TokenResponse:
+        """Обменять refresh-токен на новую пару.
+
+        Повторно предъявленный токен означает, что его копия у кого-то
+        ещё: сессия отзывается целиком, и выйти придётся обоим
+        """
+        new_token, new_hash = _new_refresh_token()
+        rotation = await self.sessions.rotate(
+            hashlib.sha256(refresh_token.encode()).hexdigest(),
+            new_hash,
+            self._refresh_expires_at(),
+        )
+        if rotation is None:
+            raise _unauthorized("Invalid refresh token")
+
+        row, rotated = rotation
+        if row.used_at is not None:
+            revoked_at = await self.sessions.revoke(row.session_id)
+            self.revocations.add(row.session_id, revoked_at)
+            raise _unauthorized("Refresh token reuse detected, session revoked")
+        if not rotated:
+            raise _unauthorized("Refresh token expired or session revoked")
+
+        return self._tokens(row.user_id, row.session_id, new_token)
+
+    async def logout(self, claims: AccessClaims) -> None:
+        """Отозвать текущую сессию вместе с её access-токенами"""
+        revoked_at = await self.sessions.revoke(claims.session_id)
+        self.revocations.add(claims.session_id, revoked_at)
+
+    async def change_password(
+        self, claims: AccessClaims, change: PasswordChange
+    ) -> TokenResponse:
+        """Сменить пароль, отозвать все сессии пользователя и открыть новую"""
+        user = await self.users.get_by_id(claims.user_id)
+        if user is None or not await self.hasher.verify(
+            user.password_hash, change.old_password
+        ):
+            raise _unauthorized("Invalid password")
+
+        await self.users.set_password_hash(
+            user.uuid, await self.hasher.hash(change.new_password), commit=False
+        )
+        revoked = await self.sessions.revoke_all(user.uuid, commit=False)
+        tokens = await self._open_session(user.uuid)
+        for session_id, revoked_at in revoked:
+            self.revocations.add(session_id, revoked_at)
+        return tokens
+
+    async def get_user(self, claims: AccessClaims) -> User:
+        user = await self.users.get_by_id(claims.user_id)
+        if user is None:
+            raise _unauthorized("User not found")
+        return user
+
+
+async def get_auth_service(
+    users: UserRepository = Depends(get_user_reposetory),
+    sessions: AuthSessionRepository = Depends(get_auth_session_reposetory),
+) -> AuthService:
+    return AuthService(
+        users,
+        sessions,
+        get_password_hasher(),
+        get_token_codec(),
+        get_revocation_cache(),
+        settings.auth,
+    )
@@ -1,7 +1,13 @@
 from uuid import UUID
+from typing import Any, Optional, Sequence
+
 from fastapi import Depends, HTTPException, status
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
 
+from src.models.category import Category
 from src.repositories.category import CategoryRepository, get_category_reposetory
+from src.repositories.pagination import decode_cursor
 from src.schemas.category_schema import (
     CategoryCreate,
     CategoryResponse,
@@ -14,20 +20,36 @@ class CategoryService:
         self.repo = repo
 
     async def add_category(self, in_data: CategoryCreate) -> CategoryResponse:
-        if await self.check_name(in_data.name):
+        # Занятое имя отлавливается уникальным индексом, без отдельного SELECT
+        try:
+            category = await self.repo.create(in_data.model_dump())
+        except IntegrityError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Категория с таким именем уже существует",
             )
 
-        category = await self.repo.create(in_data.model_dump())
         return category
 
     async def check_name(self, name: str) -> CategoryResponse | None:
         return await self.repo.exists_by_name(name)
 
-    async def get_all(self, skip: int, limit: int) -> list[CategoryResponse]:
-        res = await self.repo.get_all(skip=skip, limit=limit)
+    async def get_all(
+        self, skip: int, limit: int, cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """Категории строками CATEGORY_ROW_FIELDS"""
+        if cursor is not None:
+            try:
+                position = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+                )
+
+            # Пустая страница в конце выдачи по курсору - не ошибка
+            return await self.repo.get_all(limit=limit, cursor=position, rows=True)
+
+        res = await self.repo.get_all(skip=skip, limit=limit, rows=True)
 
         if not res:
             raise HTTPException(
@@ -37,7 +59,7 @@ class CategoryService:
 
         return res
 
-    async def get_by_id(self, id: UUID) -> CategoryResponse:
+    async def get_by_id(self, id: UUID) -> Category:
         res = await self.repo.get_by_id(id)
 
         if not res:
@@ -48,24 +70,30 @@ class CategoryService:
 
         return res
 
-    async def update(self, id: UUID, in_data: CategoryUpdate) -> CategoryResponse:
-        # Проверяем существование категории
-        existing_category = await self.get_by_id(id)
-
-        if in_data.name and in_data.name != existing_category.name:
-            if await self.check_name(in_data.name):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Категория с таким именем уже существует",
-                )
+    async def get_version(self, id: Any) -> Optional[Row]:
+        return await self.repo.get_version(id)
 
+    async def update(self, id: UUID, in_data: CategoryUpdate) -> Category:
         update_dict = {k: v for k, v in in_data.model_dump().items() if v is not None}
 
-        if update_dict:
+        if not update_dict:
+            return await self.get_by_id(id)
+
+        try:
             res = await self.repo.update(id, update_dict)
-            return res
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Категория с таким именем уже существует",
+            )
+
+        if not res:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Категория не найдена",
+            )
 
-        return existing_category
+        return res
 
     async def delete(self, id: UUID) -> None:
         res = await self.repo.delete(id)
@@ -0,0 +1,77 @@
+"""Статистика категорий из материализованного представления category_stats.
+
+Чтение - один SELECT по представлению, сколько бы категорий ни было.
+Свежесть задаёт category_stats_settings: в режиме interval каждый процесс
+приложения раз в interval_seconds пытается пересчитать представление, а
+advisory-блокировка и проверка возраста оставляют из них один пересчёт.
+
+    PYTHONPATH=src python -m src.services.category_stats_service
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import Depends
+from sqlalchemy import Row
+
+from src.configs.app import CategoryStatsConfig
+from src.database import async_sesion_maker
+from src.repositories.category_stats import (
+    CategoryStatsRepository,
+    get_category_stats_reposetory,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class CategoryStatsService:
+    def __init__(self, repo: CategoryStatsRepository):
+        self.repo = repo
+
+    async def get_stats(self) -> tuple[Sequence[Row], Optional[datetime]]:
+        """Строки CATEGORY_STATS_FIELDS и время пересчёта"""
+        rows = await self.repo.get_all()
+        refreshed_at = rows[0].refreshed_at if rows else None
+        return rows, refreshed_at
+
+
+async def refresh_periodically(
+    config: CategoryStatsConfig, stop: asyncio.Event
+) -> None:
+    """Пересчитывать представление раз в interval_seconds до stop"""
+    while not stop.is_set():
+        try:
+            async with async_sesion_maker() as session:
+                # Чуть меньше интервала, чтобы не пропускать каждый второй
+                # цикл из-за разброса времени между процессами
+                await CategoryStatsRepository(session).refresh(
+                    max_age=config.interval_seconds * 0.9
+                )
+        except Exception:
+            logger.exception("category_stats refresh failed")
+        try:
+            await asyncio.wait_for(stop.wait(), config.interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def get_category_stats_service(
+    repo: CategoryStatsRepository = Depends(get_category_stats_reposetory),
+) -> CategoryStatsService:
+    return CategoryStatsService(repo)
+
+
+async def main() -> None:
+    from src.database import engine
+
+    async with async_sesion_maker() as session:
+        refreshed = await CategoryStatsRepository(session).refresh()
+    await engine.dispose()
+    print("refreshed" if refreshed else "refresh is already running")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+from typing import Any, Optional, Sequence
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+
+from src.repositories.comments import CommentRepository, get_comment_reposetory
+from src.repositories.pagination import Cursor, decode_cursor, next_cursor
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found"
+    )
+
+
+class CommentService:
+    def __init__(self, repo: CommentRepository):
+        self.repo = repo
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+        if cursor is None:
+            return None
+
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    async def get_thread(
+        self, post_id: Any, limit: int, cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """Комментарии верхнего уровня поста строками COMMENT_ROW_FIELDS"""
+        return await self.repo.get_thread(post_id, limit, self._decode_cursor(cursor))
+
+    async def get_replies(
+        self, comment_id: Any, limit: int, cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """Ответы на комментарий строками COMMENT_ROW_FIELDS"""
+        return await self.repo.get_replies(
+            comment_id, limit, self._decode_cursor(cursor)
+        )
+
+    async def get_first_comments(
+        self, post_ids: list[Any], limit: int
+    ) -> list[dict[str, Any]]:
+        """Начала веток для нескольких постов в порядке post_ids; посты,
+        которых нет, пропускаются. comments - строки репозитория"""
+        previews: dict[Any, dict[str, Any]] = {}
+        for row in await self.repo.get_first_comments(post_ids, limit):
+            preview = previews.setdefault(
+                row.requested_id,
+                {
+                    "post_id": row.requested_id,
+                    "comment_count": row.comment_count,
+                    "comments": [],
+                },
+            )
+            # У поста без комментариев LEFT JOIN даёт одну строку без них
+            if row.uuid is not None:
+                preview["comments"].append(row)
+
+        for preview in previews.values():
+            preview["next_cursor"] = next_cursor(preview["comments"], limit)
+        return [
+            previews[post_id]
+            for post_id in dict.fromkeys(post_ids)
+            if post_id in previews
+        ]
+
+    async def create(self, post_id: Any, author_id: Any, body: str) -> Row:
+        try:
+            comment = await self.repo.create(post_id, author_id, body)
+        except IntegrityError:
+            comment = None
+        if comment is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Post not found"
+            )
+        return comment
+
+    async def reply(self, comment_id: Any, author_id: Any, body: str) -> Row:
+        comment = await self.repo.create_reply(comment_id, author_id, body)
+        if comment is None:
+            raise _not_found()
+        return comment
+
+    async def update(self, comment_id: Any, author_id: Any, body: str) -> Row:
+        """Изменить свой комментарий; чужой неотличим от несуществующего"""
+        comment = await self.repo.update(comment_id, author_id, body)
+        if comment is None:
+            raise _not_found()
+        return comment
+
+    async def delete(self, comment_id: Any, author_id: Any) -> None:
+        if not await self.repo.delete(comment_id, author_id):
+            raise _not_found()
+
+
+async def get_comment_service(
+    repo: CommentRepository = Depends(get_comment_reposetory),
+) -> CommentService:
+    return CommentService(repo)
@@ -0,0 +1,49 @@
+from typing import Any, Optional, Sequence
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Row
+
+from src.repositories.feed import FeedRepository, get_feed_reposetory
+from src.repositories.pagination import Cursor, decode_cursor
+
+
+class FeedService:
+    def __init__(self, repo: FeedRepository):
+        self.repo = repo
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+        if cursor is None:
+            return None
+
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    async def get_feed(
+        self, user_id: Any, limit: int = 20, cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """Лента пользователя строками POST_ROW_FIELDS, от новых к старым"""
+        return await self.repo.get_feed(user_id, limit, self._decode_cursor(cursor))
+
+    async def subscribe(self, subscriber_id: Any, owner_id: Any) -> bool:
+        """Подписаться на автора"""
+        if subscriber_id == owner_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot subscribe to yourself",
+            )
+        return await self.repo.subscribe(subscriber_id, owner_id)
+
+    async def unsubscribe(self, subscriber_id: Any, owner_id: Any) -> bool:
+        """Отписаться от автора"""
+        return await self.repo.unsubscribe(subscriber_id, owner_id)
+
+
+async def get_feed_service(
+    repo: FeedRepository = Depends(get_feed_reposetory),
+) -> FeedService:
+    return FeedService(repo)
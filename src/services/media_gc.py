@@ -0,0 +1,119 @@
+"""Сборщик мусора медиа.
+
+Проход состоит из трёх шагов, каждый пачками по gc_batch_size:
+media без поста (пост удалён мимо PostRepository.delete или сменил
+media_id) удаляются с уменьшением счётчиков блобов; блобы без ссылок
+старше gc_grace_seconds удаляются из базы, затем их объекты и превью -
+из хранилища; задачи превью удалённых media снимаются с очереди.
+Пачки берутся через SKIP LOCKED, поэтому сборщиков может быть несколько.
+
+    PYTHONPATH=src python -m src.services.media_gc --once
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from src.configs.app import PreviewConfig, StorageConfig, settings
+from src.database import async_sesion_maker
+from src.previews import preview_path
+from src.repositories.jobs import JobRepository
+from src.repositories.media import MediaRepository
+from src.storage import StorageBackend, get_storage
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CollectStats:
+    released_media: int = 0
+    deleted_blobs: int = 0
+    deleted_jobs: int = 0
+
+
+class MediaCollector:
+    def __init__(
+        self, config: StorageConfig, previews: PreviewConfig, storage: StorageBackend
+    ):
+        self.config = config
+        self.previews = previews
+        self.storage = storage
+
+    async def _delete_objects(self, blobs: list[tuple[str, str]]) -> None:
+        # Строки блобов уже удалены: объект, который не удалось удалить
+        # здесь, остаётся в хранилище без ссылок
+        for sha256, storage_key in blobs:
+            try:
+                await self.storage.delete(storage_key)
+                for size in self.previews.sizes:
+                    await asyncio.to_thread(
+                        preview_path(
+                            self.previews.root, sha256, size, self.previews.format
+                        ).unlink,
+                        missing_ok=True,
+                    )
+            except Exception:
+                logger.exception("failed to delete blob %s", storage_key)
+
+    async def collect(self) -> CollectStats:
+        """Один полный проход"""
+        stats = CollectStats()
+        batch = self.config.gc_batch_size
+        now = datetime.utcnow()
+        older_than = now - timedelta(seconds=self.config.gc_grace_seconds)
+
+        async with async_sesion_maker() as session:
+            repo = MediaRepository(session)
+            while released := await repo.release_orphaned_media(batch, older_than):
+                stats.released_media += released
+
+            # Отсчёт для блобов - от момента, когда обнулился счётчик
+            while blobs := await repo.delete_orphaned_blobs(batch, older_than):
+                stats.deleted_blobs += len(blobs)
+                await self._delete_objects(blobs)
+
+            jobs = JobRepository(session)
+            while deleted := await jobs.delete_orphaned(batch):
+                stats.deleted_jobs += deleted
+
+        return stats
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Повторять проход раз в gc_interval до stop"""
+        while not stop.is_set():
+            try:
+                stats = await self.collect()
+                logger.info("media gc: %s", stats)
+            except Exception:
+                logger.exception("media gc pass failed")
+            try:
+                await asyncio.wait_for(stop.wait(), self.config.gc_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def main(args: argparse.Namespace) -> None:
+    from src.database import engine
+
+    logging.basicConfig(level=logging.INFO)
+    collector = MediaCollector(settings.storage, settings.previews, get_storage())
+    if args.once:
+        print(await collector.collect())
+    else:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        await collector.run(stop)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--once", action="store_true", help="один проход и выход")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,308 @@
+import asyncio
+import copy
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+from uuid import UUID, uuid4
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+from src.configs.app import settings
+from src.models.media import Media, MediaUpload
+from src.models.post import Posts
+from src.previews import preview_path
+from src.repositories.jobs import JobRepository
+from src.repositories.media import MediaRepository, get_media_reposetory
+from src.repositories.posts import PostRepository, get_post_reposetory
+from src.schemas.media_schema import UploadComplete, UploadCreate, UploadResponse
+from src.storage import StorageBackend, StorageError, get_storage
+
+
+class _UploadHashes:
+    """sha256 загрузок, которые идут через этот процесс.
+
+    Хэш досчитывается по мере записи и хранится вместе с позицией, до
+    которой он посчитан. Если очередной кусок загрузки попал в другой
+    воркер или процесс перезапускался, позиции не совпадут, и хэш будет
+    посчитан при завершении чтением собранного объекта.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._items: OrderedDict[UUID, tuple[int, Any]] = OrderedDict()
+
+    def resume(self, upload_id: UUID, offset: int) -> Optional[Any]:
+        item = self._items.pop(upload_id, None)
+        if item is not None and item[0] == offset:
+            return item[1]
+        return hashlib.sha256() if offset == 0 else None
+
+    def save(self, upload_id: UUID, offset: int, hasher: Any) -> None:
+        self._items[upload_id] = (offset, hasher)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def pop(self, upload_id: UUID, offset: int) -> Optional[str]:
+        item = self._items.pop(upload_id, None)
+        if item is not None and item[0] == offset:
+            return item[1].hexdigest()
+        return None
+
+
+_hashes = _UploadHashes()
+
+
+def _upload_response(upload: MediaUpload, offset: int) -> UploadResponse:
+    return UploadResponse(
+        uuid=upload.uuid,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        length=upload.length,
+        offset=offset,
+    )
+
+
+class MediaService:
+    def __init__(
+        self, repo: MediaRepository, posts: PostRepository, storage: StorageBackend
+    ):
+        self.repo = repo
+        self.posts = posts
+        self.storage = storage
+
+    @staticmethod
+    def _storage_key(media_id: UUID) -> str:
+        # Первые символы - подкаталог, чтобы не держать миллионы файлов в одном
+        return f"{media_id.hex[:2]}/{media_id.hex}"
+
+    @staticmethod
+    async def _limit(
+        chunks: AsyncIterator[bytes], max_bytes: int
+    ) -> AsyncIterator[bytes]:
+        received = 0
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Request body exceeds the remaining upload length",
+                )
+            yield chunk
+
+    async def _hash_object(self, key: str) -> str:
+        hasher = hashlib.sha256()
+        async for chunk in self.storage.read(key):
+            hasher.update(chunk)
+        return hasher.hexdigest()
+
+    async def create_upload(self, in_data: UploadCreate) -> UploadResponse:
+        """Начать загрузку файла размером in_data.length"""
+        if in_data.length > settings.storage.max_upload_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File is too large",
+            )
+
+        upload_id = uuid4()
+        key = self._storage_key(upload_id)
+        state = await self.storage.start_upload(key, in_data.content_type)
+        upload = await self.repo.create_upload(
+            {
+                **in_data.model_dump(),
+                "uuid": upload_id,
+                "offset": 0,
+                "storage_key": key,
+                "storage_state": state,
+            }
+        )
+        return _upload_response(upload, 0)
+
+    async def get_upload(self, upload_id: Any) -> UploadResponse:
+        upload = await self.repo.get_upload(upload_id)
+        if not upload:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found"
+            )
+        return _upload_response(upload, upload.offset)
+
+    async def _acquire(self, upload_id: Any, offset: int) -> MediaUpload:
+        upload = await self.repo.acquire_upload(
+            upload_id, offset, settings.storage.lease_seconds
+        )
+        if upload is None:
+            current = await self.get_upload(upload_id)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=(
+                    f"Upload is at offset {current.offset} "
+                    "or is being written by another request"
+                ),
+            )
+        return upload
+
+    async def write(
+        self,
+        upload_id: Any,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        content_length: Optional[int] = None,
+    ) -> UploadResponse:
+        """Дописать тело запроса в загрузку с позиции offset.
+
+        Тело не собирается в памяти: оно потоком уходит в хранилище, а sha256
+        считается по тем же блокам. Позиция сохраняется и при обрыве
+        запроса, чтобы клиент продолжил с неё
+        """
+        upload = await self._acquire(upload_id, offset)
+
+        max_bytes = min(upload.length - offset, settings.storage.max_request_size)
+        if content_length is not None and content_length > max_bytes:
+            await self.repo.release_upload(upload.uuid, offset, upload.storage_state)
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Request body exceeds the remaining upload length",
+            )
+
+        hasher = _hashes.resume(upload.uuid, offset)
+        state = copy.deepcopy(upload.storage_state)
+        written = 0
+
+        def on_commit(data: bytes) -> None:
+            nonlocal written
+            written += len(data)
+            if hasher is not None:
+                hasher.update(data)
+
+        try:
+            await self.storage.write(
+                upload.storage_key,
+                state,
+                offset,
+                self._limit(chunks, max_bytes),
+                upload.length,
+                on_commit,
+            )
+        except StorageError as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+        finally:
+            await self.repo.release_upload(upload.uuid, offset + written, state)
+            if hasher is not None:
+                _hashes.save(upload.uuid, offset + written, hasher)
+
+        return _upload_response(upload, offset + written)
+
+    async def complete(self, upload_id: Any, in_data: UploadComplete) -> Posts:
+        """Собрать файл, сохранить media и создать пост с этим media_id"""
+        current = await self.get_upload(upload_id)
+        if current.offset != current.length:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload is incomplete: {current.offset} / {current.length}",
+            )
+
+        upload = await self._acquire(upload_id, current.length)
+        try:
+            # Повторное завершение после ошибки ниже допустимо: объект уже собран
+            await self.storage.complete_upload(upload.storage_key, upload.storage_state)
+            sha256 = _hashes.pop(upload.uuid, upload.length)
+            if sha256 is None:
+                sha256 = await self._hash_object(upload.storage_key)
+
+            # Такое содержимое уже есть - новый media ссылается на готовый
+            # блоб, а только что загруженный объект не нужен
+            storage_key, created = await self.repo.attach_blob(
+                sha256, upload.storage_key, upload.length
+            )
+            media = await self.repo.finish_upload(upload, sha256, storage_key)
+            if created and media.content_type.startswith("image/"):
+                # Задача попадёт в очередь тем же commit, что и пост; у
+                # повторного файла превью уже есть
+                JobRepository(self.repo.db).enqueue(media.uuid)
+            post = await self.posts.create(
+                {
+                    "media_id": upload.uuid,
+                    "desc": in_data.desc,
+                    "category_id": in_data.category_id,
+                }
+            )
+        except BaseException as exc:
+            await self.repo.release_upload(
+                upload.uuid, upload.length, upload.storage_state
+            )
+            if isinstance(exc, IntegrityError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Category not found",
+                )
+            raise
+
+        if storage_key != upload.storage_key:
+            await self.storage.delete(upload.storage_key)
+        return post
+
+    async def abort(self, upload_id: Any) -> None:
+        """Отменить загрузку и удалить сохранённые данные"""
+        upload = await self.repo.delete_upload(upload_id)
+        if upload is None:
+            await self.get_upload(upload_id)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Upload is being written by another request",
+            )
+        await self.storage.abort_upload(upload.storage_key, upload.storage_state)
+
+    async def get_media(self, media_id: Any) -> Media:
+        media = await self.repo.get_by_id(media_id)
+        if not media:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Media not found"
+            )
+        return media
+
+    async def get_preview(self, media_id: Any, size: int) -> tuple[Media, Path]:
+        """Файл готового превью; 404, пока оно не построено"""
+        if size not in settings.previews.sizes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Unknown preview size"
+            )
+        media = await self.get_media(media_id)
+        path = preview_path(
+            settings.previews.root, media.sha256, size, settings.previews.format
+        )
+        if not await asyncio.to_thread(path.exists):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Preview is not ready"
+            )
+        return media, path
+
+    async def read(
+        self,
+        media: Media,
+        ranges: list[tuple[int, int]],
+        heads: Optional[list[bytes]] = None,
+        tail: bytes = b"",
+    ) -> AsyncIterator[bytes]:
+        """Поток диапазонов (start, length) файла.
+
+        heads - заголовки частей multipart/byteranges перед каждым
+        диапазоном, tail - завершающая граница
+        """
+        for number, (start, length) in enumerate(ranges):
+            if heads:
+                yield heads[number]
+            async for chunk in self.storage.read_range(
+                media.storage_key, start, length
+            ):
+                yield chunk
+        if tail:
+            yield tail
+
+
+async def get_media_service(
+    repo: MediaRepository = Depends(get_media_reposetory),
+    posts: PostRepository = Depends(get_post_reposetory),
+    storage: StorageBackend = Depends(get_storage),
+) -> MediaService:
+    return MediaService(repo, posts, storage)
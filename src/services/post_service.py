@@ -1,57 +1,142 @@
-from typing import List, Optional, Any
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Any, Sequence
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+
+from src.models.post import Posts
+from src.repositories.feed import FeedRepository, get_feed_reposetory
+from src.repositories.pagination import Cursor, decode_cursor
 from src.repositories.posts import PostRepository, get_post_reposetory
+from src.schemas.search_schema import SearchMode, SearchOrder
 
 from src.schemas.post_schema import (
+    BulkConflict,
+    ExportFormat,
     PostCreate,
     PostUpdate,
     PostResponse,
     PostWithCategoryResponse,
+    TotalMode,
+)
+
+
+EXPORT_COLUMNS = (
+    "uuid",
+    "media_id",
+    "desc",
+    "category_id",
+    "owner_id",
+    "create_at",
+    "update_at",
 )
+EXPORT_CATEGORY_COLUMNS = ("category_name", "category_desc")
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """create_at хранится без часового пояса в UTC; значение с поясом
+    переводится в UTC, иначе asyncpg отвергнет его уже во время выгрузки"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# SQLSTATE нарушений ограничений
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
 
 
 class PostService:
-    def __init__(self, repo: PostRepository):
+    def __init__(self, repo: PostRepository, feed: Optional[FeedRepository] = None):
         self.repo = repo
+        self.feed = feed
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+        if cursor is None:
+            return None
+
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
 
-    async def get_post_by_id(self, post_id: Any) -> Optional[PostResponse]:
+    async def get_post_by_id(self, post_id: Any) -> Optional[Posts]:
         """Получить пост по ID"""
         post = await self.repo.get_by_id(post_id)
         return post
 
-    async def get_post_by_id_with_category(
-        self, post_id: Any
-    ) -> Optional[PostWithCategoryResponse]:
+    async def get_post_by_id_with_category(self, post_id: Any) -> Optional[Posts]:
         """Получить пост по ID с информацией о категории"""
         post = await self.repo.get_by_id_with_category(post_id)
         return post
 
-    async def get_post_by_media_id(
-        self, media_id: Any
-    ) -> Optional[PostResponse]:
+    async def get_post_by_media_id(self, media_id: Any) -> Optional[Posts]:
         """Получить пост по media_id"""
         post = await self.repo.get_by_media_id(media_id)
         return post
 
+    async def get_post_version(self, post_id: Any) -> Optional[Row]:
+        """uuid и update_at поста из базы"""
+        return await self.repo.get_version(post_id)
+
+    async def get_post_version_with_category(self, post_id: Any) -> Optional[Row]:
+        """uuid и update_at поста и его категории из базы"""
+        return await self.repo.get_version_with_category(post_id)
+
+    async def get_post_version_by_media_id(self, media_id: Any) -> Optional[Row]:
+        return await self.repo.get_version_by_media_id(media_id)
+
     async def get_all_posts(
-        self, skip: int = 0, limit: int = 100
-    ) -> List[PostResponse]:
-        """Получить все посты"""
-        posts = await self.repo.get_all(skip, limit)
-        return [post for post in posts]
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """Получить все посты строками POST_ROW_FIELDS"""
+        return await self.repo.get_all(
+            skip, limit, self._decode_cursor(cursor), rows=True
+        )
 
     async def get_all_posts_with_category(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
     ) -> List[PostWithCategoryResponse]:
         """Получить все посты с категориями"""
-        posts = await self.repo.get_all_with_category(skip, limit)
+        posts = await self.repo.get_all_with_category(
+            skip, limit, self._decode_cursor(cursor)
+        )
         return [post for post in posts]
 
-    async def create_post(self, post_data: PostCreate) -> PostResponse:
-        """Создать новый пост"""
+    async def create_post(
+        self, post_data: PostCreate, owner_id: Any = None
+    ) -> PostResponse:
+        """Создать новый пост.
+
+        Пост автора сразу раскладывается по лентам его подписчиков в той же
+        транзакции
+        """
         post_dict = post_data.model_dump()
-        post = await self.repo.create(post_dict)
+        feed = self.feed if owner_id is not None else None
+        if owner_id is not None:
+            post_dict["owner_id"] = owner_id
+        try:
+            post = await self.repo.create(post_dict, commit=feed is None)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Post with this media_id already exists or category not found",
+            )
+        if feed is not None:
+            await feed.fan_out(post)
         return post
 
     async def update_post(
@@ -64,9 +149,17 @@ class PostService:
         }
 
         if not update_dict:
-            return None
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="No data to update"
+            )
 
-        post = await self.repo.update(post_id, update_dict)
+        try:
+            post = await self.repo.update(post_id, update_dict)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Post with this media_id already exists or category not found",
+            )
         return post
 
     async def delete_post(self, post_id: Any) -> bool:
@@ -74,57 +167,104 @@ class PostService:
         return await self.repo.delete(post_id)
 
     async def search_posts_by_description(
-        self, desc_pattern: str, skip: int = 0, limit: int = 100
-    ) -> List[PostResponse]:
-        """Поиск постов по описанию"""
-        posts = await self.repo.search_by_description(
-            desc_pattern, skip, limit
+        self,
+        desc_pattern: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        mode: SearchMode = SearchMode.substring,
+        order: SearchOrder = SearchOrder.relevance,
+    ) -> Sequence[Row]:
+        """Поиск постов по описанию, строками POST_ROW_FIELDS"""
+        return await self.repo.search_by_description(
+            desc_pattern,
+            skip,
+            limit,
+            self._search_cursor(cursor, order),
+            mode=mode,
+            order=order,
+            rows=True,
         )
-        return [post for post in posts]
 
     async def search_posts_by_description_with_category(
-        self, desc_pattern: str, skip: int = 0, limit: int = 100
+        self,
+        desc_pattern: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        mode: SearchMode = SearchMode.substring,
+        order: SearchOrder = SearchOrder.relevance,
     ) -> List[PostWithCategoryResponse]:
         """Поиск постов по описанию с категориями"""
         posts = await self.repo.search_by_description_with_category(
-            desc_pattern, skip, limit
+            desc_pattern,
+            skip,
+            limit,
+            self._search_cursor(cursor, order),
+            mode=mode,
+            order=order,
         )
         return [post for post in posts]
 
+    def _search_cursor(
+        self, cursor: Optional[str], order: SearchOrder
+    ) -> Optional[Cursor]:
+        # Курсор привязан к порядку (create_at, uuid), по релевантности
+        # результаты листаются только через skip/limit
+        if cursor is not None and order != SearchOrder.recent:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination requires order=recent",
+            )
+        return self._decode_cursor(cursor)
+
     # Работа с категориями
     async def get_posts_by_category_id(
-        self, category_id: Any, skip: int = 0, limit: int = 100
-    ) -> List[PostResponse]:
-        """Получить посты по категории"""
-        posts = await self.repo.get_by_category_id(category_id, skip, limit)
-        return [post for post in posts]
+        self,
+        category_id: Any,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Sequence[Row]:
+        """Получить посты по категории строками POST_ROW_FIELDS"""
+        return await self.repo.get_by_category_id(
+            category_id, skip, limit, self._decode_cursor(cursor), rows=True
+        )
 
     async def get_posts_by_category_id_with_category(
-        self, category_id: Any, skip: int = 0, limit: int = 100
+        self,
+        category_id: Any,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[PostWithCategoryResponse]:
         """Получить посты по категории с информацией о категории"""
         posts = await self.repo.get_by_category_id_with_category(
-            category_id, skip, limit
+            category_id, skip, limit, self._decode_cursor(cursor)
         )
         return [post for post in posts]
 
     async def get_posts_without_category(
-        self, skip: int = 0, limit: int = 100
-    ) -> List[PostResponse]:
-        """Получить посты без категории"""
-        posts = await self.repo.get_posts_without_category(skip, limit)
-        return [post for post in posts]
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Sequence[Row]:
+        """Получить посты без категории строками POST_ROW_FIELDS"""
+        return await self.repo.get_posts_without_category(
+            skip, limit, self._decode_cursor(cursor), rows=True
+        )
 
     async def assign_category_to_post(
         self, post_id: Any, category_id: Any
     ) -> Optional[PostResponse]:
         """Назначить категорию посту"""
-        post = await self.repo.assign_category(post_id, category_id)
+        try:
+            post = await self.repo.assign_category(post_id, category_id)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Category not found"
+            )
         return post
 
-    async def remove_category_from_post(
-        self, post_id: Any
-    ) -> Optional[PostResponse]:
+    async def remove_category_from_post(self, post_id: Any) -> Optional[PostResponse]:
         """Убрать категорию у поста"""
         post = await self.repo.remove_category(post_id)
         return post
@@ -143,17 +283,131 @@ class PostService:
         """Получить общее количество постов"""
         return await self.repo.get_count()
 
+    async def get_posts_total(
+        self,
+        mode: TotalMode,
+        category_id: Any = None,
+        without_category: bool = False,
+        desc_pattern: Optional[str] = None,
+        search_mode: SearchMode = SearchMode.substring,
+    ) -> Optional[int]:
+        """Посчитать total для списка с учётом применённого фильтра"""
+        if mode == TotalMode.none:
+            return None
+
+        if mode == TotalMode.estimate:
+            return await self.repo.estimate_count(
+                category_id, without_category, desc_pattern, search_mode
+            )
+
+        # Для ленты и категорий точное значение берётся из счётчиков,
+        # полный подсчёт нужен только для поиска
+        if desc_pattern is not None:
+            return await self.repo.get_count_by_description(desc_pattern, search_mode)
+        if without_category:
+            return await self.repo.get_count_without_category()
+        if category_id is not None:
+            return await self.repo.get_count_by_category(category_id)
+        return await self.repo.get_count()
+
     async def get_posts_count_by_category(self, category_id: Any) -> int:
         """Получить количество постов в категории"""
         return await self.repo.get_count_by_category(category_id)
 
+    # Выгрузка
+    async def export_posts(
+        self,
+        export_format: ExportFormat,
+        with_category: bool = False,
+        category_id: Any = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> AsyncIterator[bytes]:
+        """Выгрузить посты в NDJSON или CSV, по куску на пачку строк"""
+        batches = self.repo.stream_export(
+            with_category,
+            category_id,
+            _naive_utc(created_from),
+            _naive_utc(created_to),
+        )
+
+        if export_format == ExportFormat.csv:
+            columns = EXPORT_COLUMNS + (
+                EXPORT_CATEGORY_COLUMNS if with_category else ()
+            )
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            async for batch in batches:
+                writer.writerows([row[column] for column in columns] for row in batch)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+            return
+
+        async for batch in batches:
+            lines = []
+            for row in batch:
+                item = {column: row[column] for column in EXPORT_COLUMNS}
+                if with_category:
+                    item["category"] = (
+                        {
+                            "uuid": row["category_id"],
+                            "name": row["category_name"],
+                            "desc": row["category_desc"],
+                        }
+                        if row["category_id"] is not None
+                        else None
+                    )
+                lines.append(
+                    json.dumps(item, default=_json_default, ensure_ascii=False)
+                )
+            yield ("\n".join(lines) + "\n").encode()
+
     # Пакетные операции
     async def create_multiple_posts(
-        self, posts_data: List[PostCreate]
+        self,
+        posts_data: List[PostCreate],
+        on_conflict: BulkConflict = BulkConflict.error,
     ) -> List[PostResponse]:
         """Создать несколько постов"""
-        posts_dict = [post_data.model_dump for post_data in posts_data]
-        posts = await self.repo.create_many(posts_dict)
+        # Повтор media_id внутри запроса: для update побеждает последний,
+        # иначе один INSERT ... ON CONFLICT DO UPDATE затронул бы строку дважды
+        unique: dict[Any, dict] = {}
+        for post_data in posts_data:
+            if post_data.media_id in unique and on_conflict == BulkConflict.error:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Duplicate media_id '{post_data.media_id}' in request",
+                )
+            if post_data.media_id not in unique or on_conflict == BulkConflict.update:
+                unique[post_data.media_id] = post_data.model_dump()
+
+        if on_conflict == BulkConflict.error:
+            existing = await self.repo.get_existing_media_ids(list(unique))
+            if existing:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=(
+                        "Posts with these media_id already exist: "
+                        + ", ".join(sorted(str(media_id) for media_id in existing))
+                    ),
+                )
+
+        try:
+            posts = await self.repo.create_many(list(unique.values()), on_conflict)
+        except IntegrityError as exc:
+            sqlstate = getattr(exc.orig, "sqlstate", None)
+            if sqlstate == UNIQUE_VIOLATION:
+                # media_id занят параллельным запросом между проверкой и вставкой
+                detail = "Post with this media_id already exists"
+            elif sqlstate == FOREIGN_KEY_VIOLATION:
+                detail = "Category not found"
+            else:
+                detail = "Post with this media_id already exists or category not found"
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
         return [post for post in posts]
 
     async def update_category_for_multiple_posts(
@@ -166,5 +420,6 @@ class PostService:
 
 async def get_post_service(
     repo: PostRepository = Depends(get_post_reposetory),
+    feed: FeedRepository = Depends(get_feed_reposetory),
 ) -> PostService:
-    return PostService(repo)
+    return PostService(repo, feed)
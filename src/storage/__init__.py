@@ -0,0 +1,48 @@
+from typing import Optional
+
+from src.configs.app import StorageConfig, settings
+from src.storage.base import StorageBackend, StorageError
+from src.storage.local import LocalStorage
+from src.storage.s3 import S3Storage
+
+
+def build_storage(config: StorageConfig) -> StorageBackend:
+    if config.backend == "s3":
+        # aiobotocore - необязательная зависимость, нужна только этому бэкенду
+        from aiobotocore.session import get_session  # type: ignore[import-untyped]
+
+        client = get_session().create_client(
+            "s3",
+            endpoint_url=config.s3_endpoint_url,
+            region_name=config.s3_region,
+            aws_access_key_id=config.s3_access_key,
+            aws_secret_access_key=config.s3_secret_key,
+        )
+        return S3Storage(
+            client,
+            config.s3_bucket,
+            part_size=config.s3_part_size,
+            chunk_size=config.chunk_size,
+        )
+
+    return LocalStorage(config.root, chunk_size=config.chunk_size)
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = build_storage(settings.storage)
+    return _storage
+
+
+__all__ = [
+    "LocalStorage",
+    "S3Storage",
+    "StorageBackend",
+    "StorageError",
+    "build_storage",
+    "get_storage",
+]
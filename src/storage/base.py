@@ -0,0 +1,52 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable
+
+
+class StorageError(RuntimeError):
+    pass
+
+
+class StorageBackend(ABC):
+    """Хранилище медиа-объектов с возобновляемой загрузкой по частям.
+
+    Загрузка объекта key идёт несколькими вызовами write, каждый с позиции,
+    на которой остановился предыдущий. Состояние загрузки (state) - словарь,
+    пригодный для JSON: его хранит вызывающая сторона, а бэкенд дополняет
+    на месте. Через on_commit бэкенд сообщает о байтах, которые записаны
+    окончательно; байты, не прошедшие через on_commit, клиент отправит
+    повторно.
+    """
+
+    @abstractmethod
+    async def start_upload(self, key: str, content_type: str) -> dict:
+        """Начать загрузку и вернуть её состояние"""
+
+    @abstractmethod
+    async def write(
+        self,
+        key: str,
+        state: dict,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        length: int,
+        on_commit: Callable[[bytes], None],
+    ) -> None:
+        """Записать поток с позиции offset; length - полный размер объекта"""
+
+    @abstractmethod
+    async def complete_upload(self, key: str, state: dict) -> None:
+        """Собрать объект. Повторный вызов после успеха не ошибка"""
+
+    @abstractmethod
+    async def abort_upload(self, key: str, state: dict) -> None: ...
+
+    @abstractmethod
+    def read(self, key: str) -> AsyncIterator[bytes]:
+        """Прочитать объект потоком, блоками не больше chunk_size"""
+
+    @abstractmethod
+    def read_range(self, key: str, start: int, length: int) -> AsyncIterator[bytes]:
+        """Прочитать length байт объекта начиная с start"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
@@ -0,0 +1,108 @@
+import asyncio
+import mmap
+import os
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable
+
+from src.storage.base import StorageBackend, StorageError
+
+
+class LocalStorage(StorageBackend):
+    """Объекты в файлах под root/objects, незавершённые загрузки в root/uploads.
+
+    Файловые операции блокирующие, поэтому выполняются в пуле потоков
+    блоками по chunk_size.
+    """
+
+    def __init__(self, root: str | Path, chunk_size: int = 1024 * 1024):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    def object_path(self, key: str) -> Path:
+        return self.root / "objects" / key
+
+    def _part_path(self, key: str) -> Path:
+        return self.root / "uploads" / (key.replace("/", "_") + ".part")
+
+    @staticmethod
+    def _open_at(path: Path, offset: int) -> BinaryIO:
+        if not path.exists():
+            raise StorageError(f"Upload data for {path.name} is missing")
+        file = path.open("r+b")
+        # Хвост после offset - остаток прерванного запроса, клиент пришлёт его снова
+        file.seek(offset)
+        file.truncate()
+        return file
+
+    async def start_upload(self, key: str, content_type: str) -> dict:
+        path = self._part_path(key)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(path.touch)
+        return {}
+
+    async def write(
+        self,
+        key: str,
+        state: dict,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        length: int,
+        on_commit: Callable[[bytes], None],
+    ) -> None:
+        file = await asyncio.to_thread(self._open_at, self._part_path(key), offset)
+        try:
+            buffer = bytearray()
+            async for chunk in chunks:
+                buffer += chunk
+                if len(buffer) >= self.chunk_size:
+                    await asyncio.to_thread(file.write, buffer)
+                    on_commit(buffer)
+                    buffer = bytearray()
+            if buffer:
+                await asyncio.to_thread(file.write, buffer)
+                on_commit(buffer)
+        finally:
+            await asyncio.to_thread(file.close)
+
+    async def complete_upload(self, key: str, state: dict) -> None:
+        part, target = self._part_path(key), self.object_path(key)
+        if not part.exists() and target.exists():
+            return
+        await asyncio.to_thread(target.parent.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread(os.replace, part, target)
+
+    async def abort_upload(self, key: str, state: dict) -> None:
+        await asyncio.to_thread(self._part_path(key).unlink, missing_ok=True)
+
+    async def read(self, key: str) -> AsyncIterator[bytes]:
+        file = await asyncio.to_thread(self.object_path(key).open, "rb")
+        try:
+            while chunk := await asyncio.to_thread(file.read, self.chunk_size):
+                yield chunk
+        finally:
+            await asyncio.to_thread(file.close)
+
+    @staticmethod
+    def _map(path: Path) -> mmap.mmap:
+        with path.open("rb") as file:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    async def read_range(
+        self, key: str, start: int, length: int
+    ) -> AsyncIterator[bytes]:
+        # Отображение в память вместо read(): блоки берутся из page cache без
+        # промежуточного буфера, а seek между диапазонами ничего не стоит
+        mapped = await asyncio.to_thread(self._map, self.object_path(key))
+        try:
+            end = start + length
+            for position in range(start, end, self.chunk_size):
+                # Копирование среза может упереться в чтение с диска
+                yield await asyncio.to_thread(
+                    mapped.__getitem__,
+                    slice(position, min(position + self.chunk_size, end)),
+                )
+        finally:
+            mapped.close()
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.object_path(key).unlink, missing_ok=True)
@@ -0,0 +1,133 @@
+from typing import Any, AsyncIterator, Callable, Optional
+
+from src.storage.base import StorageBackend
+
+
+class S3Storage(StorageBackend):
+    """Объекты в бакете S3-совместимого хранилища, загрузка через multipart.
+
+    Клиент передаётся снаружи (API aiobotocore), поэтому вместо AWS можно
+    подставить MinIO или любую совместимую реализацию. Можно передать и
+    ещё не открытый клиент - асинхронный контекстный менеджер, он будет
+    открыт при первом обращении.
+
+    S3 требует, чтобы все части, кроме последней, были не меньше 5 MiB,
+    поэтому write отправляет данные целыми частями по part_size, а
+    неполный остаток запроса отбрасывает: клиент продолжит с
+    подтверждённой позиции.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        part_size: int = 8 * 1024 * 1024,
+        chunk_size: int = 1024 * 1024,
+    ):
+        self._client_source = client
+        self._client: Optional[Any] = None
+        self.bucket = bucket
+        self.part_size = part_size
+        self.chunk_size = chunk_size
+
+    async def client(self) -> Any:
+        if self._client is None:
+            source = self._client_source
+            if hasattr(source, "__aenter__"):
+                source = await source.__aenter__()
+            self._client = source
+        return self._client
+
+    async def exists(self, key: str) -> bool:
+        client = await self.client()
+        try:
+            await client.head_object(Bucket=self.bucket, Key=key)
+        except client.exceptions.ClientError:
+            return False
+        return True
+
+    async def start_upload(self, key: str, content_type: str) -> dict:
+        client = await self.client()
+        response = await client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, ContentType=content_type
+        )
+        return {"upload_id": response["UploadId"], "parts": []}
+
+    async def _upload_part(self, key: str, state: dict, body: bytes) -> None:
+        client = await self.client()
+        number = len(state["parts"]) + 1
+        response = await client.upload_part(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=state["upload_id"],
+            PartNumber=number,
+            Body=body,
+        )
+        state["parts"].append({"PartNumber": number, "ETag": response["ETag"]})
+
+    async def write(
+        self,
+        key: str,
+        state: dict,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        length: int,
+        on_commit: Callable[[bytes], None],
+    ) -> None:
+        committed = offset
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer += chunk
+            while len(buffer) >= self.part_size:
+                part = bytes(buffer[: self.part_size])
+                await self._upload_part(key, state, part)
+                on_commit(part)
+                committed += len(part)
+                del buffer[: self.part_size]
+
+        # Последняя часть может быть короче part_size
+        if buffer and committed + len(buffer) == length:
+            await self._upload_part(key, state, bytes(buffer))
+            on_commit(buffer)
+
+    async def complete_upload(self, key: str, state: dict) -> None:
+        client = await self.client()
+        try:
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=state["upload_id"],
+                MultipartUpload={"Parts": state["parts"]},
+            )
+        except client.exceptions.ClientError:
+            # Повтор после сбоя на стороне БД: объект уже собран
+            if not await self.exists(key):
+                raise
+
+    async def abort_upload(self, key: str, state: dict) -> None:
+        client = await self.client()
+        await client.abort_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=state["upload_id"]
+        )
+
+    async def read(self, key: str) -> AsyncIterator[bytes]:
+        client = await self.client()
+        response = await client.get_object(Bucket=self.bucket, Key=key)
+        async with response["Body"] as body:
+            async for chunk in body.iter_chunks(self.chunk_size):
+                yield chunk
+
+    async def read_range(
+        self, key: str, start: int, length: int
+    ) -> AsyncIterator[bytes]:
+        client = await self.client()
+        response = await client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes={start}-{start + length - 1}"
+        )
+        async with response["Body"] as body:
+            async for chunk in body.iter_chunks(self.chunk_size):
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        client = await self.client()
+        await client.delete_object(Bucket=self.bucket, Key=key)
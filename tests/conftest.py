@@ -0,0 +1,60 @@
+"""Общие фикстуры.
+
+Тесты с фикстурой db_engine работают с базой из settings.toml (db_settings)
+и пропускаются, если она недоступна. Изменения они откатывают, а
+сохранённое через приложение удаляют в конце теста. app_client вызывает
+основное приложение через httpx.ASGITransport с кэшем в памяти.
+"""
+
+import asyncio
+from typing import Optional
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.cache import MemoryCache, get_cache
+from src.configs.app import settings
+
+
+_unreachable: Optional[str] = None
+
+
+@pytest.fixture
+async def db_engine() -> AsyncEngine:
+    global _unreachable
+    if _unreachable is not None:
+        pytest.skip(_unreachable)
+
+    # NullPool: у каждого теста свой event loop, соединения между ними не
+    # переиспользуются
+    engine = create_async_engine(settings.db.dsl, poolclass=NullPool)
+    try:
+        async with asyncio.timeout(3):
+            async with engine.connect():
+                pass
+    except Exception as exc:
+        await engine.dispose()
+        _unreachable = f"database is not reachable: {exc!r}"
+        pytest.skip(_unreachable)
+
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def app_client(db_engine):
+    from main import app
+    from src.database import engine
+
+    app.dependency_overrides[get_cache] = lambda cache=MemoryCache(): cache
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_cache, None)
+        # Пул приложения привязан к event loop этого теста
+        await engine.dispose()
@@ -0,0 +1,120 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.auth import revocation
+from src.auth.passwords import PasswordHasher
+from src.auth.revocation import RevocationCache
+from src.auth.tokens import DEFAULT_SECRET, TokenCodec
+from src.configs.app import AuthConfig
+from src.schemas.auth_schema import LoginRequest
+from src.services.auth_service import AuthService
+
+
+STRONG_SECRET = "x" * 32
+
+
+@pytest.mark.parametrize("secret", [DEFAULT_SECRET, "short-secret", "x" * 31])
+def test_weak_secret_rejected(secret):
+    with pytest.raises(ValueError):
+        TokenCodec(AuthConfig(secret=secret))
+
+
+def test_weak_secret_allowed_in_dev():
+    codec = TokenCodec(AuthConfig(secret=DEFAULT_SECRET), allow_weak_secret=True)
+    user_id, session_id = uuid.uuid4(), uuid.uuid4()
+    token, _ = codec.issue(user_id, session_id)
+    assert codec.decode(token).session_id == session_id
+
+
+def test_strong_secret_round_trip():
+    codec = TokenCodec(AuthConfig(secret=STRONG_SECRET))
+    user_id, session_id = uuid.uuid4(), uuid.uuid4()
+    token, _ = codec.issue(user_id, session_id)
+    claims = codec.decode(token)
+    assert (claims.user_id, claims.session_id) == (user_id, session_id)
+
+
+class FakeSessions:
+    """Вместо базы: отдаёт заранее заданные отзывы и запоминает since"""
+
+    def __init__(self) -> None:
+        self.batches: list[list[tuple[uuid.UUID, datetime]]] = []
+        self.queries: list[datetime] = []
+
+    def session_maker(self):
+        return self
+
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    def repository(self, session):
+        return self
+
+    async def revoked_since(self, since: datetime):
+        self.queries.append(since)
+        return self.batches.pop(0) if self.batches else []
+
+
+@pytest.fixture
+def sessions(monkeypatch) -> FakeSessions:
+    fake = FakeSessions()
+    monkeypatch.setattr(revocation, "async_sesion_maker", fake.session_maker)
+    monkeypatch.setattr(revocation, "AuthSessionRepository", fake.repository)
+    return fake
+
+
+async def test_revocation_watermark_does_not_drift(sessions):
+    config = AuthConfig(secret=STRONG_SECRET, revocation_poll_interval=5.0)
+    cache = RevocationCache(config)
+    session_id = uuid.uuid4()
+    revoked_at = datetime.utcnow() - timedelta(seconds=1)
+    sessions.batches = [[(session_id, revoked_at)]]
+
+    for _ in range(4):
+        await cache.load()
+
+    assert cache.is_revoked(session_id)
+    overlap = timedelta(seconds=2 * config.revocation_poll_interval)
+    # Первый опрос - за время жизни токена, дальше граница стоит на месте
+    assert sessions.queries[1:] == [revoked_at - overlap] * 3
+
+
+async def test_revocation_watermark_follows_latest(sessions):
+    config = AuthConfig(secret=STRONG_SECRET, revocation_poll_interval=5.0)
+    cache = RevocationCache(config)
+    now = datetime.utcnow()
+    first, second = now - timedelta(seconds=30), now - timedelta(seconds=2)
+    sessions.batches = [[(uuid.uuid4(), first)], [(uuid.uuid4(), second)]]
+
+    for _ in range(3):
+        await cache.load()
+
+    overlap = timedelta(seconds=2 * config.revocation_poll_interval)
+    assert sessions.queries[1:] == [first - overlap, second - overlap]
+
+
+class NoUsers:
+    async def get_by_login(self, login: str):
+        return None
+
+
+async def test_login_unknown_user_checks_dummy_hash():
+    hasher = PasswordHasher(workers=1)
+    service = AuthService(
+        NoUsers(), None, hasher, None, None, AuthConfig(secret=STRONG_SECRET)
+    )
+    try:
+        with pytest.raises(HTTPException) as error:
+            await service.login(LoginRequest(login="nobody", password="password"))
+    finally:
+        hasher.shutdown()
+
+    assert error.value.status_code == 401
+    # Заглушка посчитана: время ответа не отличается от неверного пароля
+    assert hasher._dummy_hash is not None
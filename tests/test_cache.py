@@ -0,0 +1,200 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import MemoryCache, NullCache, RedisCache, build_cache
+from src.cache import memory
+from src.cache.codec import dumps, entity_from_dict, entity_to_dict, loads
+from src.cache.keys import post_key
+from src.configs.app import CacheConfig
+from src.models.category import Category
+from src.models.post import Posts
+from src.repositories.category import CategoryRepository
+from src.repositories.posts import PostRepository
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(memory, "time", clock)
+    return clock
+
+
+@pytest.fixture
+async def redis_cache():
+    client = FakeRedis()
+    yield RedisCache(client, ttl=60.0, key_prefix="test:", invalidation_ttl=5.0)
+    await client.aclose()
+
+
+# MemoryCache
+
+
+async def test_memory_entry_expires_after_ttl(clock):
+    cache = MemoryCache(ttl=10.0)
+    await cache.set("post:1", "value")
+
+    clock.now += 9.9
+    assert await cache.get("post:1") == "value"
+    clock.now += 0.2
+    assert await cache.get("post:1") is None
+
+
+async def test_memory_evicts_least_recently_used(clock):
+    cache = MemoryCache(max_entries=2)
+    await cache.set("a", "1")
+    await cache.set("b", "2")
+    await cache.get("a")
+    await cache.set("c", "3")
+
+    assert await cache.get("a") == "1"
+    assert await cache.get("b") is None
+    assert await cache.get("c") == "3"
+
+
+async def test_memory_add_after_delete_is_rejected_until_window_passes(clock):
+    cache = MemoryCache(ttl=60.0, invalidation_ttl=5.0)
+    await cache.set("post:1", "old")
+
+    # Читатель загрузил старую строку, запись сбросила ключ после commit
+    await cache.delete("post:1")
+    assert await cache.get("post:1") is None
+    assert not await cache.add("post:1", "old")
+    assert await cache.get("post:1") is None
+
+    clock.now += 5.1
+    assert await cache.add("post:1", "new")
+    assert await cache.get("post:1") == "new"
+
+
+async def test_memory_add_keeps_existing_value(clock):
+    cache = MemoryCache()
+    assert await cache.add("post:1", "first")
+    assert not await cache.add("post:1", "second")
+    assert await cache.get("post:1") == "first"
+
+
+# build_cache
+
+
+def test_memory_backend_is_disabled_with_several_workers():
+    config = CacheConfig(backend="memory")
+    assert isinstance(build_cache(config, workers=1), MemoryCache)
+    assert isinstance(build_cache(config, workers=4), NullCache)
+
+
+# codec
+
+
+def test_codec_round_trip_post():
+    post = Posts(
+        uuid=uuid.uuid4(),
+        media_id=uuid.uuid4(),
+        desc="описание",
+        category_id=None,
+        owner_id=uuid.uuid4(),
+        comment_count=3,
+        create_at=datetime(2026, 1, 2, 3, 4, 5, 678901),
+        update_at=datetime(2026, 1, 2, 3, 4, 6),
+    )
+
+    restored = entity_from_dict(Posts, loads(dumps(entity_to_dict(post))))
+
+    assert entity_to_dict(restored) == entity_to_dict(post)
+    assert "desc_tsv" not in entity_to_dict(post)
+
+
+def test_codec_round_trip_none():
+    assert entity_from_dict(Category, loads(dumps(entity_to_dict(None)))) is None
+
+
+# RedisCache
+
+
+async def test_redis_get_set_and_ttl(redis_cache):
+    await redis_cache.set("post:1", "value", ttl=2.0)
+
+    assert await redis_cache.get("post:1") == "value"
+    assert 0 < await redis_cache.client.pttl("test:post:1") <= 2000
+
+
+async def test_redis_add_after_delete_is_rejected(redis_cache):
+    assert await redis_cache.add("post:1", "first")
+    assert not await redis_cache.add("post:1", "second")
+
+    await redis_cache.delete("post:1")
+    assert await redis_cache.get("post:1") is None
+    assert not await redis_cache.add("post:1", "stale")
+    assert 0 < await redis_cache.client.pttl("test:post:1") <= 5000
+
+
+async def test_redis_delete_many_keys(redis_cache):
+    keys = [f"post:{number}" for number in range(1200)]
+    for key in keys:
+        await redis_cache.set(key, "value")
+    await redis_cache.set("category:1", "value")
+
+    # Больше одного конвейера
+    await redis_cache.delete(*keys)
+
+    assert await redis_cache.get("post:0") is None
+    assert await redis_cache.get("post:1199") is None
+    assert not await redis_cache.add("post:1199", "stale")
+    assert await redis_cache.get("category:1") == "value"
+
+
+# Инвалидация при изменении категории
+
+
+async def test_category_change_invalidates_cached_post(db_engine):
+    async with db_engine.connect() as connection:
+        # Сессии присоединяются к внешней транзакции, и их commit её не
+        # завершает
+        await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+        cache = MemoryCache()
+        posts = PostRepository(session, cache)
+        categories = CategoryRepository(session, cache)
+        try:
+            marker = uuid.uuid4().hex
+            category = Category(name=f"cache-{marker}")
+            session.add(category)
+            await session.flush()
+            post = Posts(desc=f"cache-{marker}", category_id=category.uuid)
+            session.add(post)
+            await session.flush()
+            session.expunge_all()
+
+            cached = await posts.get_by_id_with_category(post.uuid)
+            assert cached.category.name == f"cache-{marker}"
+            # Повторное чтение собирается из кэша поста и категории
+            assert (await posts.get_by_id_with_category(post.uuid)).category.name == (
+                f"cache-{marker}"
+            )
+
+            await categories.update(category.uuid, {"name": f"renamed-{marker}"})
+            renamed = await posts.get_by_id_with_category(post.uuid)
+            assert renamed.category.name == f"renamed-{marker}"
+
+            assert await categories.delete(category.uuid)
+            assert await cache.get(post_key(post.uuid)) is None
+            # Как в следующем запросе: без объектов, загруженных этой сессией
+            session.expunge_all()
+            orphan = await posts.get_by_id_with_category(post.uuid)
+            assert orphan.category_id is None
+            assert orphan.category is None
+            assert (await posts.get_by_id(post.uuid)).category_id is None
+        finally:
+            await session.close()
+            await connection.rollback()
@@ -0,0 +1,14 @@
+import pytest
+from fastapi import HTTPException
+
+from src.services.category_service import CategoryService
+
+
+async def test_invalid_cursor():
+    service = CategoryService(repo=None)
+
+    with pytest.raises(HTTPException) as error:
+        await service.get_all(skip=0, limit=10, cursor="not-a-cursor")
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Invalid cursor"
@@ -0,0 +1,195 @@
+"""HTTP-кэширование: ETag, Cache-Control и 304.
+
+Первые тесты идут на маленьком приложении с HTTPCacheMiddleware и базы не
+требуют. Остальные вызывают основное приложение через httpx.ASGITransport
+с кэшем в памяти и пропускаются без базы; созданные ими пост и категория
+удаляются в конце.
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, Request
+from sqlalchemy import event, text
+
+from src.api.http_cache import (
+    HTTPCacheMiddleware,
+    cache_policy,
+    revalidate,
+    revalidate_version,
+    weak_etag,
+)
+
+
+POSTS = "/api/v1/posts/posts"
+CATEGORIES = "/api/v1/category"
+
+
+class Versioned:
+    """Ресурс с версией, которую отдаёт лёгкий запрос"""
+
+    def __init__(self) -> None:
+        self.update_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.version_reads = 0
+
+    async def version(self):
+        self.version_reads += 1
+        return ("item", self.update_at)
+
+
+@pytest.fixture
+def resource() -> Versioned:
+    return Versioned()
+
+
+@pytest.fixture
+async def client(resource):
+    app = FastAPI()
+    app.add_middleware(HTTPCacheMiddleware)
+
+    @app.get("/item", dependencies=[Depends(cache_policy("public, no-cache"))])
+    async def get_item(request: Request):
+        not_modified = await revalidate_version(request, resource.version)
+        if not_modified:
+            return not_modified
+        etag = weak_etag("item", resource.update_at)
+        return revalidate(request, etag) or {"update_at": resource.update_at}
+
+    @app.get("/list", dependencies=[Depends(cache_policy("public, max-age=5"))])
+    async def get_list():
+        return [1, 2, 3]
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def test_detail_revalidates_by_version(client, resource):
+    first = await client.get("/item")
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "public, no-cache"
+    # Без If-None-Match версия отдельно не читается
+    assert resource.version_reads == 0
+
+    again = await client.get("/item", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert not again.content
+    assert resource.version_reads == 1
+
+    resource.update_at = datetime(2026, 1, 2, tzinfo=timezone.utc)
+    changed = await client.get("/item", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+async def test_list_etag_from_body(client):
+    first = await client.get("/list")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    again = await client.get("/list", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert not again.content
+    assert "content-length" not in again.headers
+
+
+class StatementCounter:
+    def __init__(self, engine) -> None:
+        self.engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, *args) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(
+            self.engine.sync_engine,
+            "before_cursor_execute",
+            self._before_cursor_execute,
+        )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(
+            self.engine.sync_engine,
+            "before_cursor_execute",
+            self._before_cursor_execute,
+        )
+
+
+@pytest.fixture
+async def post(app_client):
+    marker = uuid.uuid4().hex
+    category = (
+        await app_client.post(f"{CATEGORIES}/", json={"name": f"http-cache-{marker}"})
+    ).json()
+    post = (
+        await app_client.post(
+            f"{POSTS}/",
+            json={
+                "media_id": str(uuid.uuid4()),
+                "desc": f"http-cache-{marker}",
+                "category_id": category["uuid"],
+            },
+        )
+    ).json()
+    yield post
+    await app_client.delete(f"{POSTS}/{post['uuid']}")
+    await app_client.delete(f"{CATEGORIES}/{category['uuid']}")
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        POSTS + "/{uuid}",
+        POSTS + "/{uuid}/with-category",
+        POSTS + "/media/{media_id}",
+        CATEGORIES + "/{category_id}",
+    ],
+)
+async def test_detail_revalidation(app_client, post, url):
+    from src.database import engine
+
+    url = url.format(**post)
+    first = await app_client.get(url)
+    etag = first.headers.get("etag")
+    assert first.status_code == 200
+    assert etag is not None
+    assert "cache-control" in first.headers
+
+    # Объект уже в кэше; версия всё равно читается из базы одним запросом
+    with StatementCounter(engine) as counter:
+        again = await app_client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert not again.content
+    assert counter.count == 1
+
+
+async def test_stale_cache_entry_does_not_revalidate(app_client, post, db_engine):
+    url = f"{POSTS}/{post['uuid']}"
+    etag = (await app_client.get(url)).headers["etag"]
+
+    # Изменение мимо кэша этого процесса, как из другого воркера
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("UPDATE posts SET update_at = now() WHERE uuid = :uuid"),
+            {"uuid": post["uuid"]},
+        )
+
+    changed = await app_client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+
+
+@pytest.mark.parametrize("url", [POSTS + "/?limit=20", CATEGORIES + "/?limit=20"])
+async def test_list_revalidation(app_client, post, url):
+    first = await app_client.get(url)
+    etag = first.headers.get("etag")
+    assert etag is not None
+
+    again = await app_client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert not again.content
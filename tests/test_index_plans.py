@@ -0,0 +1,23 @@
+"""Планы горячих запросов не читают большие таблицы целиком.
+
+Проверка та же, что при старте с check_indexes_on_startup: Seq Scan по
+таблице больше settings.diagnostics.seq_scan_max_rows строк - ошибка.
+На пустой базе таблицы маленькие, поэтому имеет смысл на заполненной
+(make bench-seed).
+"""
+
+from src.configs.app import settings
+from src.diagnostics.index_check import explain_hot_queries
+
+
+async def test_hot_queries_use_indexes(db_engine):
+    max_rows = settings.diagnostics.seq_scan_max_rows
+
+    violations = [
+        f"{plan.name}: Seq Scan on {relation} (~{rows} rows)\n    {plan.statement}"
+        for plan in await explain_hot_queries(db_engine)
+        for relation, rows in plan.seq_scans
+        if rows > max_rows
+    ]
+
+    assert not violations, "\n".join(violations)
@@ -0,0 +1,57 @@
+"""Удаление поста освобождает его media и ссылку на блоб"""
+
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.posts import PostRepository
+
+
+async def test_delete_post_releases_blob(db_engine):
+    async with db_engine.connect() as connection:
+        await connection.begin()
+        try:
+            sha256 = uuid.uuid4().hex * 2
+            await connection.execute(
+                text(
+                    "INSERT INTO media_blobs (sha256, storage_key, size, ref_count, "
+                    "create_at, update_at) "
+                    "VALUES (:sha256, 'key', 1, 2, now(), '2000-01-01')"
+                ),
+                {"sha256": sha256},
+            )
+            media_ids = [uuid.uuid4(), uuid.uuid4()]
+            await connection.execute(
+                text(
+                    "INSERT INTO media (uuid, content_type, size, sha256, "
+                    "storage_key, create_at, update_at) "
+                    "VALUES (:uuid, 'text/plain', 1, :sha256, 'key', now(), now())"
+                ),
+                [{"uuid": media_id, "sha256": sha256} for media_id in media_ids],
+            )
+
+            repository = PostRepository(
+                AsyncSession(bind=connection, expire_on_commit=False)
+            )
+            post = await repository.create({"media_id": media_ids[0], "desc": "media"})
+
+            assert await repository.delete(post.uuid)
+
+            blob = (
+                await connection.execute(
+                    text(
+                        "SELECT ref_count, update_at > '2000-01-01' AS touched "
+                        "FROM media_blobs WHERE sha256 = :sha256"
+                    ),
+                    {"sha256": sha256},
+                )
+            ).one()
+            assert (blob.ref_count, blob.touched) == (1, True)
+            remaining = await connection.scalars(
+                text("SELECT uuid FROM media WHERE sha256 = :sha256"),
+                {"sha256": sha256},
+            )
+            assert remaining.all() == [media_ids[1]]
+        finally:
+            await connection.rollback()
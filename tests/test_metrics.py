@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+
+from src.configs.app import MetricsConfig
+from src.instrumentation.metrics import Registry
+from src.instrumentation.shared_metrics import (
+    ACCUMULATED,
+    SharedMetrics,
+    build_shared_metrics,
+    metrics_enabled,
+)
+
+
+def worker_registry() -> Registry:
+    registry = Registry()
+    registry.counter("requests", "Запросы", ("route",))
+    registry.gauge("in_flight", "Запросы в обработке")
+    registry.histogram("duration_seconds", "Время", buckets=(0.1, 1.0))
+    return registry
+
+
+def record(registry: Registry, requests: int, in_flight: int, duration: float):
+    metrics = registry._metrics
+    metrics["requests"].labels("/posts").inc(requests)
+    metrics["in_flight"].set(in_flight)
+    metrics["duration_seconds"].observe(duration)
+
+
+def test_merged_sums_workers():
+    first, second = worker_registry(), worker_registry()
+    record(first, 3, 1, 0.05)
+    record(second, 4, 2, 0.5)
+
+    exposition = first.merged([first.snapshot(), second.snapshot()]).render()
+
+    assert 'requests_total{route="/posts"} 7.0' in exposition
+    assert "in_flight 3.0" in exposition
+    assert 'duration_seconds_bucket{le="0.1"} 1' in exposition
+    assert 'duration_seconds_bucket{le="1.0"} 2' in exposition
+    assert "duration_seconds_count 2" in exposition
+
+
+def test_merged_skips_unknown_and_mismatched():
+    registry = worker_registry()
+    snapshot = {
+        "unknown": [[[], 1.0]],
+        "duration_seconds": [[[], [[1, 1, 1, 1], 2.0]]],
+    }
+
+    exposition = registry.merged([snapshot]).render()
+
+    assert "unknown" not in exposition
+    assert "duration_seconds_sum 0.0" in exposition
+
+
+def test_shared_metrics_render(tmp_path):
+    own, other = worker_registry(), worker_registry()
+    record(own, 1, 0, 0.05)
+    record(other, 2, 1, 0.05)
+    (tmp_path / "other.json").write_text(json.dumps(other.snapshot()))
+
+    exposition = SharedMetrics(own, str(tmp_path)).render()
+
+    assert 'requests_total{route="/posts"} 3.0' in exposition
+    assert (tmp_path / f"{os.getpid()}.json").exists()
+
+
+def age(path, seconds: float) -> None:
+    old = os.path.getmtime(path) - seconds
+    os.utime(path, (old, old))
+
+
+def test_shared_metrics_folds_stale(tmp_path):
+    own, gone = worker_registry(), worker_registry()
+    record(gone, 5, 1, 0.05)
+    stale = tmp_path / "gone.json"
+    stale.write_text(json.dumps(gone.snapshot()))
+    age(stale, 60)
+
+    shared = SharedMetrics(own, str(tmp_path), interval=5.0)
+    exposition = shared.render()
+
+    # Счётчики остановленного воркера остаются, его gauge - нет
+    assert 'requests_total{route="/posts"} 5.0' in exposition
+    assert "duration_seconds_count 1" in exposition
+    assert "in_flight 1.0" not in exposition
+    assert not stale.exists()
+    assert (tmp_path / ACCUMULATED).exists()
+
+    # Повторное чтение не прибавляет снимок второй раз
+    assert 'requests_total{route="/posts"} 5.0' in shared.render()
+
+
+def test_shared_metrics_skips_stale_alive(tmp_path):
+    own, hung = worker_registry(), worker_registry()
+    record(hung, 5, 1, 0.05)
+    # pid 1 есть всегда: воркер завис, но ещё может дописать снимок
+    stale = tmp_path / "1.json"
+    stale.write_text(json.dumps(hung.snapshot()))
+    age(stale, 60)
+
+    exposition = SharedMetrics(own, str(tmp_path), interval=5.0).render()
+
+    assert 'route="/posts"' not in exposition
+    assert stale.exists()
+    assert not (tmp_path / ACCUMULATED).exists()
+
+
+async def test_shared_metrics_folds_own_on_stop(tmp_path):
+    first, second = worker_registry(), worker_registry()
+    record(first, 2, 1, 0.05)
+    record(second, 3, 1, 0.05)
+    shared = SharedMetrics(first, str(tmp_path))
+    stop = asyncio.Event()
+    stop.set()
+
+    await shared.run(stop)
+    shared.write()
+
+    assert not (tmp_path / f"{os.getpid()}.json").exists()
+    exposition = SharedMetrics(second, str(tmp_path)).render()
+    assert 'requests_total{route="/posts"} 5.0' in exposition
+    assert "in_flight 1.0" in exposition
+
+
+def test_metrics_need_shared_dir_with_workers():
+    config = MetricsConfig(enabled=True)
+
+    assert metrics_enabled(config, workers=1)
+    assert not metrics_enabled(config, workers=4)
+    assert build_shared_metrics(config, Registry(), workers=4) is None
+
+    shared = MetricsConfig(enabled=True, multiprocess_dir="/tmp/metrics")
+    assert metrics_enabled(shared, workers=4)
+    assert build_shared_metrics(shared, Registry(), workers=4) is not None
+    assert build_shared_metrics(shared, Registry(), workers=1) is None
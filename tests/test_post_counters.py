@@ -0,0 +1,64 @@
+"""Счётчики постов в post_counters, которые ведут триггеры на posts"""
+
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.repositories.posts import PostRepository
+
+
+INSERT_POST = text(
+    'INSERT INTO posts (uuid, media_id, "desc", category_id, create_at, update_at) '
+    "VALUES (gen_random_uuid(), gen_random_uuid(), :desc, :category_id, now(), now())"
+)
+
+
+async def test_counters_spread_over_slots(db_engine):
+    async with db_engine.connect() as connection:
+        await connection.begin()
+        try:
+            category_id = uuid.uuid4()
+            await connection.execute(
+                text(
+                    "INSERT INTO category (uuid, name, create_at, update_at) "
+                    "VALUES (:uuid, :name, now(), now())"
+                ),
+                {"uuid": category_id, "name": f"counters-{category_id.hex}"},
+            )
+            repository = PostRepository(AsyncSession(bind=connection))
+            total_before = await repository.get_count()
+            uncategorized_before = await repository.get_count_without_category()
+
+            # Каждый оператор прибавляет к случайному слоту
+            for _ in range(20):
+                await connection.execute(
+                    INSERT_POST, {"desc": "counters", "category_id": category_id}
+                )
+            await connection.execute(
+                INSERT_POST, {"desc": "counters", "category_id": None}
+            )
+
+            slots = await connection.scalar(
+                text("SELECT count(*) FROM post_counters WHERE scope = :scope"),
+                {"scope": f"category:{category_id}"},
+            )
+            assert slots > 1
+            count = await repository.get_count_by_category(category_id)
+            assert count == 20
+            # Сумма по слотам попадает в JSON-ответы и должна быть int
+            assert type(count) is int
+            assert type(await repository.get_count()) is int
+            assert (
+                await repository.get_count_without_category()
+                == uncategorized_before + 1
+            )
+            assert await repository.get_count() == total_before + 21
+
+            await connection.execute(
+                text("DELETE FROM posts WHERE category_id = :category_id"),
+                {"category_id": category_id},
+            )
+            assert await repository.get_count_by_category(category_id) == 0
+        finally:
+            await connection.rollback()
@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from src.schemas.post_schema import BulkConflict, ExportFormat, PostCreate
+from src.services.post_service import (
+    FOREIGN_KEY_VIOLATION,
+    UNIQUE_VIOLATION,
+    PostService,
+)
+
+
+class DriverError(Exception):
+    def __init__(self, sqlstate):
+        super().__init__(sqlstate)
+        self.sqlstate = sqlstate
+
+
+class FailingRepository:
+    def __init__(self, sqlstate):
+        self.sqlstate = sqlstate
+
+    async def create_many(self, posts, on_conflict):
+        raise IntegrityError("INSERT INTO posts ...", {}, DriverError(self.sqlstate))
+
+
+@pytest.mark.parametrize(
+    "sqlstate, detail",
+    [
+        (UNIQUE_VIOLATION, "Post with this media_id already exists"),
+        (FOREIGN_KEY_VIOLATION, "Category not found"),
+        (None, "Post with this media_id already exists or category not found"),
+    ],
+)
+async def test_bulk_create_reports_violated_constraint(sqlstate, detail):
+    service = PostService(FailingRepository(sqlstate))
+    posts = [PostCreate(media_id=uuid.uuid4(), desc="", category_id=uuid.uuid4())]
+
+    with pytest.raises(HTTPException) as raised:
+        await service.create_multiple_posts(posts, BulkConflict.skip)
+
+    assert raised.value.status_code == 400
+    assert raised.value.detail == detail
+
+
+class ExportRepository:
+    def __init__(self):
+        self.filters = None
+
+    async def stream_export(self, with_category, category_id, created_from, created_to):
+        self.filters = (created_from, created_to)
+        return
+        yield
+
+
+async def test_export_filters_are_naive_utc():
+    repo = ExportRepository()
+    moscow = timezone(timedelta(hours=3))
+    created_from = datetime(2026, 1, 1, 12, 0, tzinfo=moscow)
+    created_to = datetime(2026, 1, 2, 12, 0)
+
+    chunks = PostService(repo).export_posts(
+        ExportFormat.ndjson, created_from=created_from, created_to=created_to
+    )
+    assert [chunk async for chunk in chunks] == []
+
+    # create_at хранится без пояса в UTC
+    assert repo.filters == (datetime(2026, 1, 1, 9, 0), created_to)
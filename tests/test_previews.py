@@ -0,0 +1,61 @@
+"""Адреса превью в ответах с постами: только для media-изображений"""
+
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.configs.app import settings
+from src.repositories.posts import PostRepository
+from src.schemas.post_schema import PostResponse
+
+
+INSERT_MEDIA = text(
+    "INSERT INTO media (uuid, content_type, size, sha256, storage_key, "
+    "create_at, update_at) "
+    "VALUES (:uuid, :content_type, 1, :sha256, 'key', now(), now())"
+)
+
+
+async def test_previews_only_for_image_media(db_engine):
+    async with db_engine.connect() as connection:
+        await connection.begin()
+        try:
+            sha256 = uuid.uuid4().hex * 2
+            await connection.execute(
+                text(
+                    "INSERT INTO media_blobs (sha256, storage_key, size, ref_count, "
+                    "create_at, update_at) VALUES (:sha256, 'key', 1, 2, now(), now())"
+                ),
+                {"sha256": sha256},
+            )
+            image, document = uuid.uuid4(), uuid.uuid4()
+            await connection.execute(
+                INSERT_MEDIA,
+                [
+                    {"uuid": image, "content_type": "image/png", "sha256": sha256},
+                    {"uuid": document, "content_type": "text/plain", "sha256": sha256},
+                ],
+            )
+
+            repository = PostRepository(
+                AsyncSession(bind=connection, expire_on_commit=False)
+            )
+            previews = {}
+            for media_id in (image, document, uuid.uuid4()):
+                post = await repository.create(
+                    {"media_id": media_id, "desc": "previews"}
+                )
+                previews[media_id] = PostResponse.model_validate(post).previews
+
+            assert sorted(previews[image]) == sorted(
+                str(size) for size in settings.previews.sizes
+            )
+            assert all(str(image) in url for url in previews[image].values())
+            assert previews[document] == {}
+            assert list(previews.values())[2] == {}
+
+            # Флаг нужен только для previews и в ответ не попадает
+            assert "has_previews" not in PostResponse.model_validate(post).model_dump()
+        finally:
+            await connection.rollback()
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.api import profiling
+from src.api.profiling import ProfilingMiddleware, RequestProfileStore
+from src.configs.app import settings
+from src.instrumentation.profiler import Profile, _Sampler, profile_process
+
+
+ADMIN_TOKEN = "admin-token"
+
+
+def sample_profile(name: str = "GET /") -> Profile:
+    profile = Profile(name=name, interval=0.001)
+    profile.add(("[root]", "[leaf]"), 0.002)
+    return profile
+
+
+def test_store_shared_between_workers(tmp_path):
+    writer = RequestProfileStore(str(tmp_path), limit=5)
+    reader = RequestProfileStore(str(tmp_path), limit=5)
+    writer.add("a" * 32, sample_profile())
+
+    collapsed = reader.get("a" * 32, "collapsed")
+    speedscope = reader.get("a" * 32, "speedscope")
+
+    assert collapsed.body == b"[root];[leaf] 2000\n"
+    assert b'"name":"GET /"' in speedscope.body
+    assert reader.get("b" * 32, "collapsed") is None
+
+
+def test_store_keeps_latest(tmp_path):
+    store = RequestProfileStore(str(tmp_path), limit=2)
+    for index, profile_id in enumerate(("a" * 32, "b" * 32, "c" * 32)):
+        store.add(profile_id, sample_profile())
+        path = tmp_path / f"{profile_id}.json"
+        stamp = time.time() + index
+        # mtime файлов, записанных подряд, может совпасть
+        os.utime(path, (stamp, stamp))
+    store._prune()
+
+    assert store.get("a" * 32, "collapsed") is None
+    assert store.get("c" * 32, "collapsed") is not None
+
+
+async def test_sampler_stop_does_not_block_loop():
+    started = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def slow_sample(elapsed: float) -> None:
+        loop.call_soon_threadsafe(started.set)
+        time.sleep(0.3)
+
+    sampler = _Sampler(0.001, slow_sample)
+    sampler.start()
+    await started.wait()
+
+    gaps = []
+
+    async def ticker() -> None:
+        last = time.perf_counter()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    await asyncio.gather(sampler.stop(), ticker())
+
+    assert max(gaps) < 0.15
+
+
+async def test_profile_process():
+    profile = await profile_process(0.05, 0.001)
+
+    assert profile.samples > 0
+    assert profile.duration >= 0.05
+
+
+@pytest.fixture
+def profiled_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.profiling, "enabled", True)
+    monkeypatch.setattr(settings.profiling, "admin_token", ADMIN_TOKEN)
+    store = RequestProfileStore(str(tmp_path), limit=5)
+    monkeypatch.setattr(profiling, "request_profiles", store)
+
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ), store
+
+
+async def test_profile_stored_before_response(profiled_client):
+    client, store = profiled_client
+    async with client:
+        response = await client.get(
+            "/slow", headers={"X-Profile": "1", "X-Admin-Token": ADMIN_TOKEN}
+        )
+        plain = await client.get("/slow", headers={"X-Profile": "1"})
+
+    profile_id = response.headers["x-profile-id"]
+    assert response.json() == {"ok": True}
+    assert store.get(profile_id, "speedscope") is not None
+    assert "x-profile-id" not in plain.headers
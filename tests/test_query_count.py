@@ -0,0 +1,229 @@
+"""Число SQL-запросов и JOIN в запросах постов и категорий.
+
+Перед каждой пробой в транзакции создаются категория и пост, чтобы
+selectinload действительно выполнил второй запрос; после пробы транзакция
+откатывается, в том числе commit изменяющих методов. Проба, которая
+выполнила больше запросов или JOIN, чем указано в QUERY_BUDGETS, падает:
+так ловится возврат неявной загрузки Posts.category, N+1 или лишний SELECT
+перед UPDATE/DELETE.
+"""
+
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.configs.app import settings
+from src.models.category import Category
+from src.models.post import Posts
+from src.repositories.category import CategoryRepository
+from src.repositories.comments import CommentRepository
+from src.repositories.feed import FeedRepository
+from src.repositories.posts import PostRepository
+from src.schemas.category_schema import CategoryUpdate
+from src.schemas.post_schema import PostCreate, PostUpdate
+from src.services.category_service import CategoryService
+from src.services.post_service import PostService
+
+
+Probe = Callable[[PostRepository, CategoryRepository, Posts], Awaitable[Any]]
+
+_JOIN_RE = re.compile(r"\bJOIN\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    probe: Probe
+    statements: int
+    joins: int = 0
+
+
+QUERY_BUDGETS: dict[str, QueryBudget] = {
+    "posts.get_by_id": QueryBudget(
+        lambda posts, _, post: posts.get_by_id(post.uuid), 1
+    ),
+    "posts.get_by_id_with_category": QueryBudget(
+        lambda posts, _, post: posts.get_by_id_with_category(post.uuid), 1, joins=1
+    ),
+    "posts.get_by_media_id": QueryBudget(
+        lambda posts, _, post: posts.get_by_media_id(post.media_id), 1
+    ),
+    "posts.exists_by_id": QueryBudget(
+        lambda posts, _, post: posts.exists_by_id(post.uuid), 1
+    ),
+    "posts.exists_by_media_id": QueryBudget(
+        lambda posts, _, post: posts.exists_by_media_id(post.media_id), 1
+    ),
+    "posts.get_all": QueryBudget(lambda posts, *_: posts.get_all(limit=100), 1),
+    "posts.get_all_with_category": QueryBudget(
+        lambda posts, *_: posts.get_all_with_category(limit=100), 2
+    ),
+    "posts.get_by_category_id": QueryBudget(
+        lambda posts, _, post: posts.get_by_category_id(post.category_id, limit=100), 1
+    ),
+    "posts.get_by_category_id_with_category": QueryBudget(
+        lambda posts, _, post: posts.get_by_category_id_with_category(
+            post.category_id, limit=100
+        ),
+        2,
+    ),
+    "posts.get_posts_without_category": QueryBudget(
+        lambda posts, *_: posts.get_posts_without_category(limit=100), 1
+    ),
+    "posts.search_by_description": QueryBudget(
+        lambda posts, _, post: posts.search_by_description(post.desc, limit=100), 1
+    ),
+    "posts.search_by_description_with_category": QueryBudget(
+        lambda posts, _, post: posts.search_by_description_with_category(
+            post.desc, limit=100
+        ),
+        2,
+    ),
+    # Изменяющие эндпоинты проверяются через сервисы, как их вызывает API
+    "posts.create": QueryBudget(
+        lambda posts, *_: PostService(posts).create_post(
+            PostCreate(media_id=uuid.uuid4(), desc="query-count")
+        ),
+        1,
+    ),
+    # Пост автора и его раскладка по лентам - два INSERT в одной транзакции
+    "posts.create[owner]": QueryBudget(
+        lambda posts, *_: PostService(
+            posts, FeedRepository(posts.db, settings.feed)
+        ).create_post(
+            PostCreate(media_id=uuid.uuid4(), desc="query-count"),
+            owner_id=uuid.uuid4(),
+        ),
+        2,
+    ),
+    "posts.update": QueryBudget(
+        lambda posts, _, post: PostService(posts).update_post(
+            post.uuid, PostUpdate(desc="updated")
+        ),
+        1,
+    ),
+    "posts.update[media_id]": QueryBudget(
+        lambda posts, _, post: PostService(posts).update_post(
+            post.uuid, PostUpdate(media_id=uuid.uuid4())
+        ),
+        1,
+    ),
+    "posts.delete": QueryBudget(
+        lambda posts, _, post: PostService(posts).delete_post(post.uuid), 1
+    ),
+    "posts.assign_category": QueryBudget(
+        lambda posts, _, post: PostService(posts).assign_category_to_post(
+            post.uuid, post.category_id
+        ),
+        1,
+    ),
+    "posts.remove_category": QueryBudget(
+        lambda posts, _, post: PostService(posts).remove_category_from_post(post.uuid),
+        1,
+    ),
+    "comments.get_thread": QueryBudget(
+        lambda posts, _, post: CommentRepository(posts.db).get_thread(post.uuid), 1
+    ),
+    # Страница ленты получает начала веток одним запросом, а не по посту
+    "comments.get_first_comments": QueryBudget(
+        lambda posts, _, post: CommentRepository(posts.db).get_first_comments(
+            [post.uuid], 3
+        ),
+        1,
+        joins=1,
+    ),
+    "category.update": QueryBudget(
+        lambda _, categories, post: CategoryService(categories).update(
+            post.category_id, CategoryUpdate(desc="updated")
+        ),
+        1,
+    ),
+    "category.delete": QueryBudget(
+        lambda _, categories, post: CategoryService(categories).delete(
+            post.category_id
+        ),
+        1,
+        joins=1,
+    ),
+    "category.exists_by_name": QueryBudget(
+        lambda _, categories, __: categories.exists_by_name("query-count"), 1
+    ),
+}
+
+
+@dataclass
+class QueryCount:
+    name: str
+    budget: QueryBudget
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def joins(self) -> int:
+        return sum(len(_JOIN_RE.findall(statement)) for statement in self.statements)
+
+    @property
+    def exceeded(self) -> bool:
+        return (
+            len(self.statements) > self.budget.statements
+            or self.joins > self.budget.joins
+        )
+
+
+async def _count(engine: AsyncEngine, name: str, budget: QueryBudget) -> QueryCount:
+    count = QueryCount(name, budget)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        count.statements.append(statement)
+
+    async with engine.connect() as connection:
+        # Сессии присоединяются к внешней транзакции, и их commit её не
+        # завершает; expire_on_commit=False, как у async_sesion_maker
+        await connection.begin()
+        seed = AsyncSession(bind=connection, expire_on_commit=False)
+        # Отдельная сессия, чтобы проба не брала объекты из identity map
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+        try:
+            marker = uuid.uuid4().hex
+            category = Category(name=f"query-count-{marker}")
+            seed.add(category)
+            await seed.flush()
+            post = Posts(desc=f"query-count-{marker}", category_id=category.uuid)
+            seed.add(post)
+            await seed.flush()
+
+            event.listen(
+                connection.sync_connection,
+                "before_cursor_execute",
+                before_cursor_execute,
+            )
+            try:
+                await budget.probe(
+                    PostRepository(session), CategoryRepository(session), post
+                )
+            finally:
+                event.remove(
+                    connection.sync_connection,
+                    "before_cursor_execute",
+                    before_cursor_execute,
+                )
+        finally:
+            await session.close()
+            await seed.close()
+            await connection.rollback()
+
+    return count
+
+
+@pytest.mark.parametrize("name", QUERY_BUDGETS)
+async def test_query_budget(db_engine, name):
+    count = await _count(db_engine, name, QUERY_BUDGETS[name])
+
+    assert not count.exceeded, (
+        f"{name}: {len(count.statements)} statements, {count.joins} joins "
+        f"(budget {count.budget.statements} / {count.budget.joins})\n    "
+        + "\n    ".join(count.statements)
+    )
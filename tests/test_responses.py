@@ -0,0 +1,181 @@
+"""Списки, лента, комментарии и статистика, которые сериализуются из
+строк asyncpg без pydantic.
+
+asyncpg отдаёт uuid как asyncpg.pgproto.pgproto.UUID, и orjson без
+default их не принимает. Тесты требуют базы; созданные ими пост и
+категория удаляются в конце.
+"""
+
+import uuid
+
+import orjson
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.identity import get_user_id, require_user_id
+from src.api.responses import ORJSONResponse
+from src.repositories.category_stats import CategoryStatsRepository
+
+
+POSTS = "/api/v1/posts/posts"
+CATEGORIES = "/api/v1/category"
+FEED = "/api/v1/feed"
+COMMENTS = "/api/v1/comments"
+
+
+async def test_renders_asyncpg_row(db_engine):
+    async with db_engine.connect() as connection:
+        row = (
+            await connection.execute(text("SELECT gen_random_uuid() AS uuid, now()"))
+        ).one()
+
+    assert type(row.uuid) is not uuid.UUID
+    body = orjson.loads(ORJSONResponse(dict(row._mapping)).body)
+    assert body["uuid"] == str(row.uuid)
+
+
+@pytest.fixture
+async def post(app_client):
+    marker = uuid.uuid4().hex
+    category = (
+        await app_client.post(f"{CATEGORIES}/", json={"name": f"responses-{marker}"})
+    ).json()
+    post = (
+        await app_client.post(
+            f"{POSTS}/",
+            json={
+                "media_id": str(uuid.uuid4()),
+                "desc": f"responses-{marker}",
+                "category_id": category["uuid"],
+            },
+        )
+    ).json()
+    yield post
+    await app_client.delete(f"{POSTS}/{post['uuid']}")
+    await app_client.delete(f"{CATEGORIES}/{category['uuid']}")
+
+
+async def test_post_lists(app_client, post):
+    pages = [
+        await app_client.get(f"{POSTS}/", params={"limit": 100}),
+        await app_client.get(f"{POSTS}/category/{post['category_id']}"),
+        await app_client.post(f"{POSTS}/search", json={"desc_pattern": post["desc"]}),
+    ]
+
+    for page in pages:
+        assert page.status_code == 200
+        found = [item for item in page.json()["posts"] if item["uuid"] == post["uuid"]]
+        assert found
+        assert found[0]["category_id"] == post["category_id"]
+        assert found[0]["media_id"] == post["media_id"]
+
+
+async def test_category_list(app_client, post):
+    response = await app_client.get(f"{CATEGORIES}/", params={"limit": 1000})
+
+    assert response.status_code == 200
+    assert post["category_id"] in [item["uuid"] for item in response.json()]
+
+
+async def test_category_stats(app_client, post, db_engine):
+    async with AsyncSession(bind=db_engine) as session:
+        assert await CategoryStatsRepository(session).refresh()
+
+    response = await app_client.get(f"{CATEGORIES}/stats")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["refreshed_at"] is not None
+    stats = [
+        item
+        for item in body["categories"]
+        if item["category_id"] == post["category_id"]
+    ]
+    assert len(stats) == 1
+    assert stats[0]["post_count"] == 1
+
+
+async def test_feed(app_client):
+    from main import app
+
+    subscriber, owner = uuid.uuid4(), uuid.uuid4()
+    app.dependency_overrides[require_user_id] = lambda: subscriber
+    app.dependency_overrides[get_user_id] = lambda: owner
+    post = None
+    try:
+        subscribed = await app_client.put(f"{FEED}/subscriptions/{owner}")
+        assert subscribed.status_code == 204
+        post = (
+            await app_client.post(
+                f"{POSTS}/",
+                json={"media_id": str(uuid.uuid4()), "desc": "responses-feed"},
+            )
+        ).json()
+
+        response = await app_client.get(f"{FEED}/")
+
+        assert response.status_code == 200
+        assert [item["uuid"] for item in response.json()["posts"]] == [post["uuid"]]
+    finally:
+        if post is not None:
+            await app_client.delete(f"{POSTS}/{post['uuid']}")
+        await app_client.delete(f"{FEED}/subscriptions/{owner}")
+        app.dependency_overrides.pop(require_user_id, None)
+        app.dependency_overrides.pop(get_user_id, None)
+
+
+@pytest.fixture
+async def author(db_engine):
+    user_id = uuid.uuid4()
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text(
+                "INSERT INTO users (uuid, login, first_name, last_name, "
+                "password_hash, create_at, update_at) "
+                "VALUES (:uuid, :login, 'a', 'b', 'x', now(), now())"
+            ),
+            {"uuid": user_id, "login": f"responses-{user_id.hex}"},
+        )
+    yield user_id
+    # Комментарии удаляются каскадом
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text("DELETE FROM users WHERE uuid = :uuid"), {"uuid": user_id}
+        )
+
+
+async def test_comments(app_client, post, author):
+    from main import app
+
+    app.dependency_overrides[require_user_id] = lambda: author
+    try:
+        created = [
+            (
+                await app_client.post(
+                    f"{COMMENTS}/posts/{post['uuid']}", json={"body": body}
+                )
+            ).json()
+            for body in ("first", "second")
+        ]
+    finally:
+        app.dependency_overrides.pop(require_user_id, None)
+
+    thread = await app_client.get(f"{COMMENTS}/posts/{post['uuid']}")
+
+    assert thread.status_code == 200
+    comments = thread.json()["comments"]
+    assert [item["uuid"] for item in comments] == [item["uuid"] for item in created]
+    assert {item["post_id"] for item in comments} == {post["uuid"]}
+    assert {item["author_id"] for item in comments} == {str(author)}
+
+    batch = await app_client.get(
+        f"{COMMENTS}/batch", params={"post_id": post["uuid"], "limit": 1}
+    )
+
+    assert batch.status_code == 200
+    [preview] = batch.json()["posts"]
+    assert preview["post_id"] == post["uuid"]
+    assert preview["comment_count"] == 2
+    assert [item["uuid"] for item in preview["comments"]] == [created[0]["uuid"]]
+    assert preview["next_cursor"] is not None
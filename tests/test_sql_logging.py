@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.configs.app import SQLLogConfig
+from src.instrumentation.sql_logging import install_query_logging
+
+
+class _AsyncEngineStub:
+    """install_query_logging нужен только sync_engine"""
+
+    def __init__(self, sync_engine):
+        self.sync_engine = sync_engine
+
+
+@pytest.fixture
+def engine():
+    sync_engine = create_engine("sqlite://")
+    install_query_logging(
+        _AsyncEngineStub(sync_engine),
+        SQLLogConfig(enabled=True, sample_rate=1.0, slow_query_ms=10_000),
+    )
+    yield sync_engine
+    sync_engine.dispose()
+
+
+def _logged(caplog) -> list[dict]:
+    return [record.sql for record in caplog.records if record.name == "app.sql"]
+
+
+def test_failed_statement_is_logged_with_error(engine, caplog):
+    caplog.set_level(logging.INFO, logger="app.sql")
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing_table"))
+        connection.execute(text("SELECT 1"))
+
+    failed, succeeded = _logged(caplog)
+    assert failed["error"] == "OperationalError"
+    assert "missing_table" in failed["statement"]
+    assert "error" not in succeeded
+    assert succeeded["statement"] == "SELECT 1"
+
+
+def test_failures_leave_no_state_on_pooled_connection(engine, caplog):
+    caplog.set_level(logging.INFO, logger="app.sql")
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text("SELECT * FROM missing_table"))
+        assert "query_started" not in connection.info
+        connection.execute(text("SELECT 1"))
+
+    assert len(_logged(caplog)) == 4